@@ -6,8 +6,7 @@ Identifies subtle AI-specific patterns
 
 import os
 import numpy as np
-import librosa
-from problem1_voice_detection import extract_audio_features, analyze_voice_patterns
+from problem1_voice_detection import extract_file_features, analyze_voice_patterns
 
 def advanced_analysis(audio_file):
     """Perform advanced artifact analysis"""
@@ -17,10 +16,7 @@ def advanced_analysis(audio_file):
         return
     
     try:
-        with open(audio_file, 'rb') as f:
-            audio_data = f.read()
-        
-        features = extract_audio_features(audio_data)
+        features = extract_file_features(audio_file)
         result = analyze_voice_patterns(features)
         
         print(f"Advanced Analysis: {audio_file}")
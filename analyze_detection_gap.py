@@ -6,8 +6,7 @@ Investigates why Viraj audio might not be detected as AI-generated
 
 import os
 import numpy as np
-import librosa
-from problem1_voice_detection import extract_audio_features, analyze_voice_patterns
+from problem1_voice_detection import load_audio_file, extract_signal_features, analyze_voice_patterns
 
 def deep_analyze_viraj():
     """Deep analysis of Viraj audio detection gap"""
@@ -22,8 +21,8 @@ def deep_analyze_viraj():
     print("=" * 80)
     
     try:
-        y, sr = librosa.load(audio_file, sr=None)
-        features = extract_audio_features(y, sr)
+        y, sr = load_audio_file(audio_file)
+        features = extract_signal_features(y, sr)
         result = analyze_voice_patterns(features)
         
         print(f"\nBasic Classification:")
@@ -4,7 +4,7 @@ Analyze ElevenLabs audio
 """
 
 import os
-from problem1_voice_detection import extract_audio_features, analyze_voice_patterns
+from problem1_voice_detection import extract_file_features, analyze_voice_patterns
 
 def analyze_elevenlabs():
     filename = 'ElevenLabs_2026-02-05T06_26_47_Rachel_pre_sp100_s50_sb75_se0_b_m2.mp3'
@@ -17,10 +17,7 @@ def analyze_elevenlabs():
     print("(ElevenLabs AI-Generated Voice)")
     
     try:
-        with open(filename, 'rb') as f:
-            audio_data = f.read()
-        
-        features = extract_audio_features(audio_data)
+        features = extract_file_features(filename)
         result = analyze_voice_patterns(features)
         
         print(f"Classification: {result[0]}")
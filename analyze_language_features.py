@@ -4,7 +4,7 @@ Analyze language features in audio samples
 """
 
 import os
-from problem1_voice_detection import extract_audio_features
+from problem1_voice_detection import extract_file_features
 
 def analyze_language_features(audio_file):
     """Analyze language-specific features"""
@@ -16,10 +16,7 @@ def analyze_language_features(audio_file):
     print(f"Language Analysis: {audio_file}")
     
     try:
-        with open(audio_file, 'rb') as f:
-            audio_data = f.read()
-        
-        features = extract_audio_features(audio_data)
+        features = extract_file_features(audio_file)
         
         # MFCC analysis (important for language)
         mfcc_means = [v for k, v in features.items() if 'mfcc_' in k and 'mean' in k]
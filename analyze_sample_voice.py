@@ -5,8 +5,7 @@ Analyze sample voice in detail
 
 import os
 import numpy as np
-import librosa
-from problem1_voice_detection import extract_audio_features
+from problem1_voice_detection import load_audio_file, extract_signal_features
 
 def analyze_sample_voice():
     """Detailed analysis of sample voice"""
@@ -19,8 +18,8 @@ def analyze_sample_voice():
     print(f"Analyzing: {audio_file}")
     print("=" * 60)
     
-    y, sr = librosa.load(audio_file, sr=None)
-    features = extract_audio_features(y, sr)
+    y, sr = load_audio_file(audio_file)
+    features = extract_signal_features(y, sr)
     
     print(f"\nAudio Properties:")
     print(f"  Sample Rate: {sr} Hz")
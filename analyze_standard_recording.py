@@ -4,7 +4,7 @@ Analyze standard recordings
 """
 
 import os
-from problem1_voice_detection import extract_audio_features, analyze_voice_patterns
+from problem1_voice_detection import extract_file_features, analyze_voice_patterns
 
 def analyze_standard_recording(filename, label):
     """Analyze a standard recording"""
@@ -17,10 +17,7 @@ def analyze_standard_recording(filename, label):
     print("=" * 60)
     
     try:
-        with open(filename, 'rb') as f:
-            audio_data = f.read()
-        
-        features = extract_audio_features(audio_data)
+        features = extract_file_features(filename)
         result = analyze_voice_patterns(features)
         
         print(f"Classification: {result[0]}")
@@ -4,7 +4,7 @@ Analyze standard recording 2
 """
 
 import os
-from problem1_voice_detection import extract_audio_features, analyze_voice_patterns
+from problem1_voice_detection import extract_file_features, analyze_voice_patterns
 
 def analyze():
     filename = 'Standard recording 2.mp3'
@@ -16,10 +16,7 @@ def analyze():
     print(f"Analyzing: {filename}")
     
     try:
-        with open(filename, 'rb') as f:
-            audio_data = f.read()
-        
-        features = extract_audio_features(audio_data)
+        features = extract_file_features(filename)
         result = analyze_voice_patterns(features)
         
         print(f"Classification: {result[0]}")
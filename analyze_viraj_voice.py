@@ -4,7 +4,7 @@ Analyze Viraj voice sample
 """
 
 import os
-from problem1_voice_detection import extract_audio_features, analyze_voice_patterns
+from problem1_voice_detection import extract_file_features, analyze_voice_patterns
 
 def analyze_viraj():
     filename = 'voice_preview_viraj - rich, confident and expressive.mp3'
@@ -17,10 +17,7 @@ def analyze_viraj():
     print("(Viraj Advanced AI Voice)")
     
     try:
-        with open(filename, 'rb') as f:
-            audio_data = f.read()
-        
-        features = extract_audio_features(audio_data)
+        features = extract_file_features(filename)
         result = analyze_voice_patterns(features)
         
         print(f"Classification: {result[0]}")
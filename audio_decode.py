@@ -0,0 +1,558 @@
+"""
+Audio decode layer for the voice-detection service
+Turns uploaded bytes into a mono float32 signal at the analysis rate.
+
+Backends, in the order 'auto' tries them (fastest first, see benchmark_decode.py):
+- soundfile: libsndfile in-process (MP3 needs libsndfile >= 1.1). Decodes
+  in MP3-frame-aligned blocks, downmixes each block into a preallocated
+  buffer and, for soxr resamplers, resamples in-stream - straight to the
+  target rate, never holding the native-rate signal.
+- ffmpeg:    ffmpeg subprocess decoding straight to mono float32 at the
+  target rate, using ffmpeg's own resampler.
+- audioread: librosa's audioread path (GStreamer, ffmpeg, Core Audio...),
+  resampled afterwards.
+
+Raw pcm_s16le and uncompressed (16/32-bit integer, float) WAV skip the
+backends: the samples are read as a view on the uploaded bytes and only
+converted to float32 and resampled (not at all for mono float32 at the
+target rate). FLAC, compressed and 8/24-bit WAV go through libsndfile.
+"""
+
+import io
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import librosa
+import numpy as np
+import soundfile as sf
+import soxr
+from mp3_inspect import id3v2_size, inspect_mp3, iter_frames, parse_frame_header
+
+BACKENDS = ['soundfile', 'ffmpeg', 'audioread']
+DEFAULT_RES_TYPE = 'soxr_hq'  # librosa.load's default
+
+# Multiple of the MP3 frame size (1152 samples): libsndfile only reproduces
+# one-shot decoding exactly when reads stay frame-aligned
+DECODE_BLOCK_FRAMES = 1152 * 64
+
+# Live MP3 streams run through one libsndfile decoder from start to end (MP3
+# frames borrow bits from, and overlap with, their predecessors), asked only
+# for the samples of frames that have fully arrived except the last
+# MP3_LOOKAHEAD_FRAMES, which it may read into. Runs of more than
+# MP3_RESYNC_LIMIT bytes without a frame header end the stream with an error.
+MP3_LOOKAHEAD_FRAMES = 2
+MP3_RESYNC_LIMIT = 64 * 1024
+
+# soxr quality presets that can run as a streaming resampler
+SOXR_STREAM_QUALITY = {
+    'soxr_vhq': 'VHQ',
+    'soxr_hq': 'HQ',
+    'soxr_mq': 'MQ',
+    'soxr_lq': 'LQ',
+    'soxr_qq': 'QQ',
+}
+
+# ffmpeg (swresample) filter length used for each resampler quality
+FFMPEG_FILTER_SIZE = {
+    'soxr_vhq': 64,
+    'soxr_hq': 32,
+    'soxr_mq': 16,
+    'soxr_lq': 8,
+    'soxr_qq': 4,
+}
+
+# WAVE (format tag, bits per sample) read without a decoder, and the integer
+# full scale libsndfile normalizes them by when reading float
+WAV_SAMPLE_TYPES = {(1, 16): '<i2', (1, 32): '<i4', (3, 32): '<f4', (3, 64): '<f8'}
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+PCM_FULL_SCALE = {'<i2': 32768.0, '<i4': 2147483648.0}
+
+class DecodeError(Exception):
+    """Audio could not be decoded by the selected backend"""
+
+def backend_supports(backend, audio_format='mp3'):
+    """Whether a backend is installed and can decode audio_format"""
+    audio_format = audio_format.lower()
+    if backend == 'soundfile':
+        return audio_format.upper() in sf.available_formats()
+    if backend == 'ffmpeg':
+        return shutil.which('ffmpeg') is not None
+    if backend == 'audioread':
+        try:
+            import audioread
+        except ImportError:
+            return False
+        # RawAudioFile only reads uncompressed WAV/AIFF
+        backends = [cls.__name__ for cls in audioread.available_backends()]
+        return audio_format in ('wav', 'aiff') or any(name != 'RawAudioFile' for name in backends)
+    return False
+
+def available_backends(audio_format='mp3'):
+    """Installed backends able to decode audio_format, fastest first"""
+    return [backend for backend in BACKENDS if backend_supports(backend, audio_format)]
+
+def resolve_backend(name='auto', audio_format='mp3'):
+    """Concrete backend for a configured name ('auto' picks the fastest available)"""
+    if name == 'auto':
+        backends = available_backends(audio_format)
+        if not backends:
+            raise DecodeError(f"No installed audio backend can decode {audio_format}")
+        return backends[0]
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown audio decode backend: {name} (choose from auto, {', '.join(BACKENDS)})")
+    return name
+
+def decode_audio(audio_data, sr, backend='auto', res_type=DEFAULT_RES_TYPE, audio_format='mp3', sample_rate=None):
+    """
+    Decode audio bytes to a mono float32 signal at sr
+
+    Returns (y, sr). sample_rate is the declared rate of pcm_s16le input.
+    Raw PCM and plain WAV take the no-decoder path (see pcm_samples);
+    files libsndfile cannot open are retried with audioread.
+    """
+    pcm = pcm_samples(audio_data, audio_format, sample_rate)
+    if pcm is not None:
+        return _decode_pcm(*pcm, sr, res_type)
+    backend = resolve_backend(backend, audio_format)
+    if backend == 'ffmpeg':
+        return _decode_ffmpeg(audio_data, sr, res_type)
+    if backend == 'soundfile':
+        try:
+            sound_file = sf.SoundFile(io.BytesIO(audio_data))
+        except (sf.LibsndfileError, RuntimeError):
+            return _decode_audioread(audio_data, sr, res_type)
+        with sound_file:
+            return _decode_soundfile(sound_file, sr, res_type)
+    return _decode_audioread(audio_data, sr, res_type)
+
+def inspect_audio(audio_data, audio_format='mp3', sample_rate=None):
+    """
+    Header-only facts about encoded audio, or None when the header is unreadable
+
+    Returns inspect_mp3's duration, bitrate, sample_rate, channels, vbr,
+    frames, durationSource and encoder keys. MP3s are measured by
+    mp3_inspect (exact with a Xing/VBRI header, a constant-bitrate estimate
+    otherwise), raw PCM by its length, other containers by libsndfile.
+    """
+    if audio_format == 'pcm_s16le':
+        frames = len(audio_data) // 2
+        return {
+            'duration': frames / sample_rate, 'bitrate': sample_rate * 16 / 1000, 'sample_rate': sample_rate,
+            'channels': 1, 'vbr': False, 'frames': frames, 'durationSource': 'length', 'encoder': None,
+        }
+    if audio_format == 'mp3':
+        info = inspect_mp3(audio_data)
+        if info is not None:
+            return info
+    try:
+        header = sf.info(io.BytesIO(audio_data))
+    except (sf.LibsndfileError, RuntimeError):
+        return None
+    return {
+        'duration': header.duration,
+        'bitrate': round(len(audio_data) * 8 / header.duration / 1000, 1) if header.duration else 0.0,
+        'sample_rate': header.samplerate,
+        'channels': header.channels,
+        'vbr': False,
+        'frames': header.frames,
+        'durationSource': 'header',
+        'encoder': None,
+    }
+
+def probe_duration(audio_data, audio_format='mp3', sample_rate=None):
+    """Duration in seconds from the headers (see inspect_audio), or None"""
+    info = inspect_audio(audio_data, audio_format, sample_rate)
+    return info['duration'] if info is not None else None
+
+def wav_layout(data):
+    """
+    Where the samples of an uncompressed WAV sit, or None
+
+    Returns (data offset, frame count, dtype, channels, sample rate) for
+    WAV_SAMPLE_TYPES (plain or WAVE_FORMAT_EXTENSIBLE headers). Anything
+    else - compressed or 8/24-bit WAV, RF64, malformed headers - is None
+    and left to libsndfile. A data chunk size of 0 or 0xFFFFFFFF (written
+    by streaming encoders) or past the end of data means "up to the end".
+    """
+    if len(data) < 12 or data[:4] != b'RIFF' or data[8:12] != b'WAVE':
+        return None
+    position = 12
+    fmt = None
+    while position + 8 <= len(data):
+        chunk_id = data[position:position + 4]
+        size = int.from_bytes(data[position + 4:position + 8], 'little')
+        body = position + 8
+        if chunk_id == b'fmt ' and size >= 16 and body + 16 <= len(data):
+            tag, channels, rate = struct.unpack('<HHI', data[body:body + 8])
+            bits = struct.unpack('<H', data[body + 14:body + 16])[0]
+            if tag == WAVE_FORMAT_EXTENSIBLE and size >= 40:
+                tag = struct.unpack('<H', data[body + 24:body + 26])[0]
+            fmt = (WAV_SAMPLE_TYPES.get((tag, bits)), channels, rate)
+        elif chunk_id == b'data':
+            if fmt is None or fmt[0] is None or not fmt[1] or not fmt[2]:
+                return None
+            dtype, channels, rate = fmt
+            if size in (0, 0xFFFFFFFF) or size > len(data) - body:
+                size = len(data) - body
+            return body, size // (np.dtype(dtype).itemsize * channels), dtype, channels, rate
+        position = body + size + (size & 1)
+    return None
+
+def pcm_samples(audio_data, audio_format, sample_rate=None):
+    """
+    Samples of raw pcm_s16le or uncompressed WAV as a view on the bytes, or None
+
+    Returns ((frames, channels) array sharing audio_data's memory, native
+    sample rate); None when the bytes need a real decoder.
+    """
+    if audio_format == 'pcm_s16le':
+        if not sample_rate:
+            raise DecodeError("pcm_s16le audio needs a sample rate")
+        return np.frombuffer(audio_data, dtype='<i2', count=len(audio_data) // 2).reshape(-1, 1), sample_rate
+    if audio_format == 'wav':
+        layout = wav_layout(audio_data)
+        if layout is not None:
+            offset, frames, dtype, channels, rate = layout
+            samples = np.frombuffer(audio_data, dtype=dtype, count=frames * channels, offset=offset)
+            return samples.reshape(frames, channels), rate
+    return None
+
+def iter_decode(audio_data, sr, backend='auto', res_type=DEFAULT_RES_TYPE, audio_format='mp3', sample_rate=None):
+    """
+    Decode audio bytes as a stream of mono float32 blocks at sr
+
+    Concatenated, the blocks equal decode_audio's signal. Memory stays
+    bounded by the block size for raw PCM/WAV and libsndfile with a soxr
+    resampler (or no resampling) and for ffmpeg; other paths decode the
+    whole file first and then hand it out in blocks.
+    """
+    pcm = pcm_samples(audio_data, audio_format, sample_rate)
+    if pcm is not None:
+        samples, native_sr = pcm
+        if native_sr == sr or res_type in SOXR_STREAM_QUALITY:
+            yield from _pcm_blocks(samples, native_sr, sr, res_type)
+            return
+        y, _ = _decode_pcm(samples, native_sr, sr, res_type)
+        for start in range(0, len(y), DECODE_BLOCK_FRAMES):
+            yield y[start:start + DECODE_BLOCK_FRAMES]
+        return
+    backend = resolve_backend(backend, audio_format)
+    if backend == 'soundfile':
+        try:
+            sound_file = sf.SoundFile(io.BytesIO(audio_data))
+        except (sf.LibsndfileError, RuntimeError):
+            sound_file = None
+        if sound_file is not None:
+            with sound_file:
+                if sound_file.samplerate == sr or res_type in SOXR_STREAM_QUALITY:
+                    yield from _soundfile_blocks(sound_file, sr, res_type)
+                    return
+                y, _ = _decode_soundfile(sound_file, sr, res_type)
+        else:
+            y, _ = _decode_audioread(audio_data, sr, res_type)
+    elif backend == 'ffmpeg':
+        y, _ = _decode_ffmpeg(audio_data, sr, res_type)
+    else:
+        y, _ = _decode_audioread(audio_data, sr, res_type)
+    for start in range(0, len(y), DECODE_BLOCK_FRAMES):
+        yield y[start:start + DECODE_BLOCK_FRAMES]
+
+def iter_windows(blocks, window, hop):
+    """
+    Regroup a stream of sample blocks into windows of window samples, hop apart
+
+    Yields (start sample, window array). Only one window is buffered; the
+    final window is shorter when the signal does not end on a hop boundary
+    (and is the whole signal when it is shorter than one window).
+    """
+    if not 0 < hop <= window:
+        raise ValueError("hop must be between 1 and window samples")
+    buffer = np.empty(window, dtype=np.float32)
+    filled = 0
+    start = 0
+    pending = False
+    for block in blocks:
+        position = 0
+        while position < len(block):
+            take = min(window - filled, len(block) - position)
+            buffer[filled:filled + take] = block[position:position + take]
+            filled += take
+            position += take
+            pending = True
+            if filled == window:
+                yield start, buffer.copy()
+                buffer[:window - hop] = buffer[hop:]
+                filled = window - hop
+                start += hop
+                pending = False
+    if pending:
+        yield start, buffer[:filled].copy()
+
+def _soundfile_blocks(sound_file, sr, res_type):
+    """Mono blocks at sr, resampled in-stream (soxr res_type) when the native rate differs"""
+    stream = None
+    if sound_file.samplerate != sr:
+        # Bit-identical to one-shot soxr.resample, without the native-rate buffer
+        stream = soxr.ResampleStream(sound_file.samplerate, sr, 1, dtype='float32',
+                                     quality=SOXR_STREAM_QUALITY[res_type])
+    while True:
+        block = sound_file.read(DECODE_BLOCK_FRAMES, dtype='float32', always_2d=True)
+        last = len(block) == 0
+        if stream is None:
+            if last:
+                return
+            yield np.mean(block, axis=1)
+        else:
+            chunk = stream.resample_chunk(np.mean(block, axis=1), last=last)
+            if len(chunk):
+                yield chunk
+            if last:
+                return
+
+def _decode_soundfile(sound_file, sr, res_type):
+    native_sr = sound_file.samplerate
+    streaming = native_sr == sr or res_type in SOXR_STREAM_QUALITY
+    blocks = _soundfile_blocks(sound_file, sr if streaming else native_sr, res_type)
+
+    # frames is only an estimate for compressed formats: read until the
+    # decoder runs dry, growing the buffer in the rare case it was low
+    ratio = sr / native_sr if streaming else 1.0
+    y = np.empty(int(max(sound_file.frames, 0) * ratio) + 64, dtype=np.float32)
+    position = 0
+    for chunk in blocks:
+        end = position + len(chunk)
+        if end > len(y):
+            y = np.concatenate([y[:position], np.empty(end - position + DECODE_BLOCK_FRAMES, dtype=np.float32)])
+        y[position:end] = chunk
+        position = end
+    y = y[:position]
+
+    if not streaming:
+        y = librosa.resample(y, orig_sr=native_sr, target_sr=sr, res_type=res_type)
+    return y, sr
+
+def _pcm_to_mono(samples):
+    """Mono float32 from a (frames, channels) PCM block, scaled like libsndfile's float reads"""
+    scale = PCM_FULL_SCALE.get(samples.dtype.str)
+    block = samples.astype(np.float32, copy=False)
+    if scale is not None:
+        block *= np.float32(1.0 / scale)
+    # Mono float32 input stays a (read-only) view on the uploaded bytes
+    return block[:, 0] if block.shape[1] == 1 else np.mean(block, axis=1)
+
+def resample(y, native_sr, sr, res_type=DEFAULT_RES_TYPE):
+    """One-shot resampling of a mono signal, as the decoders do it (soxr directly for soxr_* types)"""
+    if native_sr == sr:
+        return y
+    if res_type in SOXR_STREAM_QUALITY:
+        return soxr.resample(y, native_sr, sr, quality=SOXR_STREAM_QUALITY[res_type])
+    return librosa.resample(y, orig_sr=native_sr, target_sr=sr, res_type=res_type)
+
+def _decode_pcm(samples, native_sr, sr, res_type):
+    return resample(_pcm_to_mono(samples), native_sr, sr, res_type), sr
+
+def _pcm_blocks(samples, native_sr, sr, res_type):
+    """Mono blocks at sr from a PCM view, converted (and soxr-resampled) one block at a time"""
+    stream = None
+    if native_sr != sr:
+        stream = soxr.ResampleStream(native_sr, sr, 1, dtype='float32', quality=SOXR_STREAM_QUALITY[res_type])
+    for start in range(0, len(samples), DECODE_BLOCK_FRAMES):
+        block = _pcm_to_mono(samples[start:start + DECODE_BLOCK_FRAMES])
+        if stream is not None:
+            block = stream.resample_chunk(block)
+        if len(block):
+            yield block
+    if stream is not None:
+        tail = stream.resample_chunk(np.empty(0, dtype=np.float32), last=True)
+        if len(tail):
+            yield tail
+
+def _decode_ffmpeg(audio_data, sr, res_type):
+    command = [
+        'ffmpeg', '-v', 'error', '-i', 'pipe:0',
+        '-af', f"aresample=filter_size={FFMPEG_FILTER_SIZE.get(res_type, 32)}",
+        '-ac', '1', '-ar', str(sr), '-f', 'f32le', 'pipe:1'
+    ]
+    process = subprocess.run(command, input=audio_data, capture_output=True)
+    if process.returncode != 0:
+        raise DecodeError(f"ffmpeg failed: {process.stderr.decode('utf-8', 'replace').strip()}")
+    # A view on ffmpeg's output buffer: no copy
+    return np.frombuffer(process.stdout, dtype='<f4'), sr
+
+def _decode_audioread(audio_data, sr, res_type):
+    # audioread backends decode from a path, not a buffer
+    fd, path = tempfile.mkstemp(suffix='.audio')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(audio_data)
+        return librosa.load(path, sr=sr, res_type=res_type, dtype=np.float32)
+    finally:
+        os.remove(path)
+
+class _GrowingInput(io.RawIOBase):
+    """
+    Read-once file over the bytes of a live stream, for libsndfile's virtual IO
+
+    Bytes the decoder has read are dropped (drop_read). Until end() the
+    reported length is UNKNOWN_LENGTH - libsndfile caps decoding at a frame
+    count estimated from it - and reads past the data while opening (the
+    ID3v1 probe at the end of the file) see zeros.
+    """
+
+    UNKNOWN_LENGTH = 1 << 31
+
+    def __init__(self):
+        self.data = bytearray()
+        self.base = 0          # stream offset of data[0]
+        self.position = 0
+        self.length = None
+        self.opening = False
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.UNKNOWN_LENGTH if self.length is None else self.length
+        self.position = offset
+        return offset
+
+    def readinto(self, buffer):
+        start = self.position - self.base
+        if start < 0:
+            raise OSError("Live MP3 decoder read back into dropped bytes")
+        chunk = self.data[start:start + len(buffer)]
+        if self.opening and self.length is None and start >= len(self.data):
+            chunk = bytes(len(buffer))
+        buffer[:len(chunk)] = chunk
+        self.position += len(chunk)
+        return len(chunk)
+
+    def drop_read(self):
+        read = min(self.position - self.base, len(self.data))
+        if read > 0:
+            del self.data[:read]
+            self.base += read
+
+    def end(self):
+        """No more bytes will arrive: a trailing ID3v1 tag is cut off, as one-shot decoding skips it"""
+        if self.length is None:
+            if len(self.data) >= 128 and self.data[-128:-125] == b'TAG':
+                del self.data[-128:]
+            self.length = self.base + len(self.data)
+
+class StreamDecoder:
+    """
+    Incremental decoder for live audio arriving in arbitrary byte chunks
+
+    audio_format is 'pcm_s16le' (mono, at the declared sample_rate) or
+    'mp3'. feed() returns the mono float32 samples at sr that the new
+    bytes completed (possibly none); finish() flushes the rest. MP3 goes
+    through a single libsndfile decoder in frame-aligned reads, so the
+    concatenated samples equal decode_audio's (soundfile backend, soxr
+    resampler). State is bounded: a partial PCM sample, or the decoder and
+    the MP3 bytes it has not read yet, and the resampler.
+    """
+
+    def __init__(self, audio_format, sr, sample_rate=None, res_type=DEFAULT_RES_TYPE):
+        if audio_format not in ('pcm_s16le', 'mp3'):
+            raise ValueError(f"Unsupported live audio format: {audio_format}")
+        if audio_format == 'pcm_s16le' and not sample_rate:
+            raise ValueError("pcm_s16le streams need a sample rate")
+        self.audio_format = audio_format
+        self.sr = sr
+        self.res_type = res_type
+        self.native_sr = sample_rate
+        self._pending = bytearray()
+        self._input = _GrowingInput()
+        self._sound_file = None
+        self._scan = None          # stream offset of the next MP3 frame to count
+        self._frames = 0
+        self._frame_samples = 0
+        self._decoded = 0
+        self._resampler = None
+
+    def feed(self, data):
+        """Samples completed by data"""
+        if self.audio_format == 'pcm_s16le':
+            self._pending += data
+            usable = len(self._pending) - len(self._pending) % 2
+            samples = np.frombuffer(bytes(self._pending[:usable]), dtype='<i2').astype(np.float32) / 32768.0
+            del self._pending[:usable]
+            return self._resample(samples, last=False)
+        self._input.data += data
+        return self._decode_mp3(final=False)
+
+    def finish(self):
+        """Remaining samples once the stream has ended"""
+        if self.audio_format == 'pcm_s16le':
+            return self._resample(np.empty(0, dtype=np.float32), last=True)
+        self._input.end()
+        return self._decode_mp3(final=True)
+
+    def _count_frames(self):
+        """Count the MP3 frames that have fully arrived"""
+        stream = self._input
+        if self._scan is None:
+            size = id3v2_size(stream.data)
+            if size is None:
+                return
+            self._scan = size
+        for offset, header in iter_frames(stream.data, max(self._scan - stream.base, 0)):
+            self._frames += 1
+            self._frame_samples = header['samples']
+            self._scan = stream.base + offset + header['length']
+        if stream.base + len(stream.data) - self._scan > MP3_RESYNC_LIMIT:
+            raise DecodeError(f"No MP3 frame header in {MP3_RESYNC_LIMIT} bytes of the stream")
+
+    def _decode_mp3(self, final):
+        self._count_frames()
+        if self._sound_file is None:
+            if not self._frames or (self._frames <= MP3_LOOKAHEAD_FRAMES and not final):
+                return self._resample(np.empty(0, dtype=np.float32), last=final)
+            self._input.opening = True
+            try:
+                self._sound_file = sf.SoundFile(self._input)
+            except (sf.LibsndfileError, RuntimeError) as e:
+                raise DecodeError(f"MP3 stream could not be decoded: {e}")
+            finally:
+                self._input.opening = False
+            self.native_sr = self._sound_file.samplerate
+
+        # Reads stay multiples of the frame size (see DECODE_BLOCK_FRAMES)
+        wanted = (self._frames - MP3_LOOKAHEAD_FRAMES) * self._frame_samples - self._decoded
+        blocks = []
+        while final or wanted > 0:
+            count = DECODE_BLOCK_FRAMES if final else min(wanted, DECODE_BLOCK_FRAMES)
+            block = self._sound_file.read(count, dtype='float32', always_2d=True)
+            if len(block):
+                blocks.append(np.mean(block, axis=1))
+            self._decoded += len(block)
+            wanted -= len(block)
+            if len(block) < count:
+                break
+        self._input.drop_read()
+        if final:
+            self._sound_file.close()
+        y = np.concatenate(blocks) if blocks else np.empty(0, dtype=np.float32)
+        return self._resample(y, last=final)
+
+    def _resample(self, samples, last):
+        if self.native_sr == self.sr:
+            return samples
+        if self._resampler is None:
+            if self.native_sr is None:
+                return samples
+            self._resampler = soxr.ResampleStream(self.native_sr, self.sr, 1, dtype='float32',
+                                                  quality=SOXR_STREAM_QUALITY.get(self.res_type, 'HQ'))
+        return self._resampler.resample_chunk(samples, last=last)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Decode benchmark: every installed backend x resampler quality on the bundled clips
+Reports the median decode time, realtime factor (audio seconds per wall
+second) and the largest sample difference from the reference decode
+(soundfile + soxr_hq, which matches librosa.load). The 'librosa.load' row
+is the original decode path, for comparison.
+
+Usage: python benchmark_decode.py [repeats]      (default: 5)
+"""
+
+import glob
+import io
+import sys
+import time
+import librosa
+import numpy as np
+from audio_decode import SOXR_STREAM_QUALITY, available_backends, decode_audio
+
+SAMPLE_RATE = 22050
+CLIPS = sorted(glob.glob('Standard recording *.mp3')) + sorted(glob.glob('ElevenLabs*.mp3'))
+RES_TYPES = list(SOXR_STREAM_QUALITY) + ['polyphase']
+
+def median_time(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)), result
+
+def run(repeats):
+    backends = available_backends('mp3')
+    print(f"Backends available for MP3: {', '.join(backends) or 'none'}\n")
+    for path in CLIPS:
+        with open(path, 'rb') as f:
+            audio_data = f.read()
+        reference, _ = decode_audio(audio_data, SAMPLE_RATE, backend='soundfile', res_type='soxr_hq')
+        duration = len(reference) / SAMPLE_RATE
+
+        print(f"{path[:40]} ({duration:.1f} s)")
+        print(f"  {'backend':<12} {'res_type':<10} {'median (ms)':>12} {'x realtime':>11} {'max |diff|':>11}")
+        runs = [('librosa.load', 'soxr_hq', lambda: librosa.load(io.BytesIO(audio_data), sr=SAMPLE_RATE))]
+        for backend in backends:
+            for res_type in RES_TYPES:
+                runs.append((backend, res_type, lambda b=backend, r=res_type: decode_audio(audio_data, SAMPLE_RATE, backend=b, res_type=r)))
+
+        for backend, res_type, fn in runs:
+            seconds, (y, _) = median_time(fn, repeats)
+            n = min(len(y), len(reference))
+            diff = float(np.max(np.abs(y[:n] - reference[:n]))) if n else float('nan')
+            print(f"  {backend:<12} {res_type:<10} {seconds * 1000:>12.1f} {duration / seconds:>11.0f} {diff:>11.2e}")
+        print()
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Format benchmark: request latency saved by sending WAV, raw PCM or FLAC instead of MP3
+Each bundled clip is re-encoded from its decoded signal as WAV (16-bit),
+raw pcm_s16le and FLAC, at its own rate and at the telephony rates
+(8/16 kHz). Reports the median decode time (load_audio) and end-to-end
+analysis time (analyze_audio, cascade) per format, and how much of the
+MP3 time each one saves.
+
+Usage: python benchmark_formats.py [repeats]      (default: 5)
+"""
+
+import glob
+import io
+import sys
+import time
+import numpy as np
+import soundfile as sf
+import soxr
+import problem1_voice_detection as voice_api
+
+CLIPS = sorted(glob.glob('Standard recording *.mp3')) + sorted(glob.glob('ElevenLabs*.mp3'))
+TELEPHONY_RATES = [8000, 16000]
+
+def median_time(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+def encodings(mp3_data):
+    """(label, audio bytes, audioFormat, sampleRate) for every variant of one clip"""
+    y, native_sr = sf.read(io.BytesIO(mp3_data), dtype='float32', always_2d=True)
+    y = y.mean(axis=1)
+    variants = [('mp3', mp3_data, 'mp3', None)]
+    for rate in [native_sr, voice_api.SAMPLE_RATE] + TELEPHONY_RATES:
+        signal = y if rate == native_sr else soxr.resample(y, native_sr, rate)
+        wav, flac = io.BytesIO(), io.BytesIO()
+        sf.write(wav, signal, rate, format='WAV', subtype='PCM_16')
+        sf.write(flac, signal, rate, format='FLAC')
+        pcm = (np.clip(signal, -1, 32767 / 32768) * 32768).astype('<i2').tobytes()
+        variants += [
+            (f'wav {rate}', wav.getvalue(), 'wav', None),
+            (f'pcm_s16le {rate}', pcm, 'pcm_s16le', rate),
+            (f'flac {rate}', flac.getvalue(), 'flac', None),
+        ]
+    return variants
+
+def run(repeats):
+    for path in CLIPS:
+        with open(path, 'rb') as f:
+            mp3_data = f.read()
+        variants = encodings(mp3_data)
+        print(f"{path[:40]} ({voice_api.probe_duration(mp3_data):.1f} s)")
+        print(f"  {'format':<16} {'decode (ms)':>12} {'analyze (ms)':>13} {'saved (ms)':>11} {'saved':>7}")
+        baseline = None
+        for label, audio_data, audio_format, sample_rate in variants:
+            decode = median_time(lambda: voice_api.load_audio(audio_data, audio_format, sample_rate), repeats)
+            analyze = median_time(lambda: voice_api.analyze_audio(audio_data, 'cascade', audio_format, sample_rate), repeats)
+            baseline = baseline or analyze
+            print(f"  {label:<16} {decode * 1000:>12.2f} {analyze * 1000:>13.1f} "
+                  f"{(baseline - analyze) * 1000:>11.1f} {(1 - analyze / baseline) * 100:>6.0f}%")
+        print()
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
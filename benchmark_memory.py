@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Peak-RSS benchmark for one /api/voice-detection request
+Each clip length runs in a fresh interpreter: import + warm-up first, then
+one JSON (base64) request through Flask's test client. The reported figure
+is how far the request pushes peak RSS above the RSS it started from
+(Linux /proc VmHWM, reset via clear_refs just before the request).
+
+Usage: python benchmark_memory.py [durations...]      (default: 10 60 300)
+"""
+
+import base64
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import numpy as np
+import soundfile as sf
+from proc_memory import read_status_mb, reset_peak_rss
+
+SAMPLE_RATE = 44100
+
+def synthetic_mp3(duration, sr=SAMPLE_RATE):
+    """Deterministic stereo speech-like MP3 clip (stereo exercises the downmix step)"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(sr * duration)) / sr
+    pitch = 130 + 50 * np.sin(2 * np.pi * 0.5 * t)
+    voice = np.sin(2 * np.pi * np.cumsum(pitch) / sr) * (0.5 + 0.4 * np.sin(2 * np.pi * 3 * t))
+    voice += 0.02 * rng.standard_normal(len(t))
+    stereo = np.stack([voice, 0.9 * voice], axis=1).astype(np.float32) * 0.7
+
+    buffer = io.BytesIO()
+    sf.write(buffer, stereo, sr, format='MP3')
+    return buffer.getvalue()
+
+def measure_request(duration, mp3_path):
+    """Runs inside the child interpreter; prints one JSON line"""
+    import problem1_voice_detection as voice_api
+
+    voice_api.warm_up_worker()
+    with open(mp3_path, 'rb') as f:
+        body = json.dumps({
+            "language": "English",
+            "audioFormat": "mp3",
+            "audioBase64": base64.b64encode(f.read()).decode('ascii')
+        }).encode('utf-8')
+    client = voice_api.app.test_client()
+    headers = {"x-api-key": voice_api.API_KEY}
+
+    reset_peak_rss()
+    baseline = read_status_mb('VmRSS')
+    response = client.post('/api/voice-detection', data=body, content_type='application/json', headers=headers)
+    peak = read_status_mb('VmHWM')
+    assert response.status_code == 200, response.get_json()
+    print(json.dumps({
+        "duration": duration,
+        "payload_mb": round(len(body) / 1e6, 2),
+        "baseline_mb": round(baseline, 1),
+        "request_peak_mb": round(peak - baseline, 1)
+    }))
+
+def run(durations):
+    print(f"{'clip (s)':>9} {'payload (MB)':>13} {'start RSS (MB)':>15} {'request peak (MB)':>18}")
+    env = dict(os.environ, VOICE_POOL_WORKERS='0', FEATURE_CACHE_SIZE='0')
+    for duration in durations:
+        # The clip is synthesized here so its temporaries never count towards the child's peak
+        with tempfile.NamedTemporaryFile(suffix='.mp3') as mp3_file:
+            mp3_file.write(synthetic_mp3(duration))
+            mp3_file.flush()
+            output = subprocess.run(
+                [sys.executable, __file__, '--child', str(duration), mp3_file.name],
+                capture_output=True, text=True, env=env, check=True
+            ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{result['duration']:>9g} {result['payload_mb']:>13} {result['baseline_mb']:>15} "
+              f"{result['request_peak_mb']:>18}")
+
+if __name__ == '__main__':
+    if len(sys.argv) > 3 and sys.argv[1] == '--child':
+        measure_request(float(sys.argv[2]), sys.argv[3])
+    else:
+        run([float(arg) for arg in sys.argv[1:]] or [10, 60, 300])
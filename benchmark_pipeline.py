@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Pipeline benchmark suite on deterministic synthetic clips
+Synthesizes "human" voice clips (generate_test_audio.synthetic_voice) for
+every duration x sample rate and times, in the style of pytest-benchmark:
+
+- extract_audio_features   every feature, from the encoded bytes
+- feature:<node>           each sub-feature alone on the decoded signal
+                           (with the intermediates it needs, e.g. the STFT)
+- analyze_voice_patterns   the threshold decision on extracted features
+- api                      a full JSON/base64 POST to /api/voice-detection
+                           through Flask's test client
+
+Each case is warmed up once and then run for at least --min-time seconds
+(at least --min-rounds, at most --max-rounds rounds); results report
+min/max/mean/stddev/median/IQR, operations per second and throughput in
+seconds of audio per second. Everything runs offline in this process:
+clips are encoded as WAV by default (no codec needed), the result cache is
+bypassed and the upload limit raised (for the run only) so the longest
+clips reach the pipeline.
+
+Results are saved as JSON under .benchmarks/ (or --output). --compare
+takes a previous results file (or 'latest') and exits 1 when any case's
+median time grew by more than --threshold.
+
+Usage: python benchmark_pipeline.py [--durations 1 10 60 600] [--rates 8000 16000 22050 44100]
+                                    [--format wav|flac|mp3] [--only api ...] [--min-time 1.0]
+                                    [--output results.json] [--compare latest|results.json] [--threshold 0.1]
+"""
+
+import argparse
+import base64
+import glob
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import librosa
+import numpy as np
+import soundfile as sf
+import problem1_voice_detection as voice_api
+from feature_cache import FeatureCache
+from generate_test_audio import synthetic_voice
+
+DURATIONS = [1, 10, 60, 600]
+SAMPLE_RATES = [8000, 16000, 22050, 44100]
+RESULTS_DIR = '.benchmarks'
+
+SUBTYPES = {'wav': 'PCM_16', 'flac': 'PCM_16', 'mp3': None}
+
+# Upload limit while benchmarking, so the longest clips reach the pipeline
+BENCHMARK_MAX_AUDIO_BYTES = 1024 ** 3
+
+def encode_clip(duration, sr, audio_format='wav', seed=0):
+    """Encoded bytes of the deterministic synthetic clip for one duration and rate"""
+    buffer = io.BytesIO()
+    sf.write(buffer, synthetic_voice('human', duration, sr, seed), sr, format=audio_format.upper(),
+             subtype=SUBTYPES[audio_format])
+    return buffer.getvalue()
+
+def measure(fn, min_time=1.0, min_rounds=1, max_rounds=50):
+    """Round times (seconds) of fn after one warm-up call"""
+    fn()
+    times = []
+    started = time.perf_counter()
+    while len(times) < max_rounds and (len(times) < min_rounds or time.perf_counter() - started < min_time):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+def summarize(times, audio_seconds):
+    """pytest-benchmark-like statistics of round times"""
+    q1, _, q3 = np.percentile(times, [25, 50, 75])
+    median = statistics.median(times)
+    return {
+        'rounds': len(times),
+        'min': min(times),
+        'max': max(times),
+        'mean': statistics.fmean(times),
+        'stddev': statistics.stdev(times) if len(times) > 1 else 0.0,
+        'median': median,
+        'iqr': float(q3 - q1),
+        'ops': 1 / median if median else None,
+        'audioSecondsPerSecond': audio_seconds / median if median else None,
+    }
+
+def cases(duration, sr, audio_format, only=None):
+    """[(name, fn)] benchmarked on one clip"""
+    audio_data = encode_clip(duration, sr, audio_format)
+    y, analysis_sr = voice_api.load_audio(audio_data, audio_format)
+    features = voice_api.extract_signal_features(y, analysis_sr)
+    body = json.dumps({
+        "language": "English",
+        "audioFormat": audio_format,
+        "audioBase64": base64.b64encode(audio_data).decode('ascii'),
+    }).encode('utf-8')
+    client = voice_api.app.test_client()
+    headers = {"x-api-key": voice_api.API_KEY}
+
+    def post():
+        response = client.post('/api/voice-detection', data=body, content_type='application/json', headers=headers)
+        if response.status_code != 200:
+            raise RuntimeError(f"/api/voice-detection answered {response.status_code}: {response.get_json()}")
+
+    def feature(node):
+        return lambda: voice_api.FeatureContext(y, analysis_sr).get(node)
+
+    found = [('extract_audio_features', lambda: voice_api.extract_audio_features(audio_data, None, audio_format))]
+    found += [(f'feature:{node}', feature(node)) for node in sorted(set(voice_api.FEATURE_PROVIDERS.values()))]
+    found += [('analyze_voice_patterns', lambda: voice_api.analyze_voice_patterns(features)), ('api', post)]
+    return [(name, fn) for name, fn in found if not only or any(name.startswith(prefix) for prefix in only)]
+
+def machine_info():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'librosa': librosa.__version__,
+    }
+
+def run(durations, rates, audio_format='wav', only=None, min_time=1.0, min_rounds=1, max_rounds=50):
+    """Benchmark every case on every clip; returns the results dict"""
+    # Time the pipeline, not the result cache; restored afterwards
+    saved = voice_api.feature_cache, voice_api.MAX_AUDIO_BYTES
+    voice_api.feature_cache = FeatureCache(max_entries=0)
+    voice_api.MAX_AUDIO_BYTES = max(voice_api.MAX_AUDIO_BYTES, BENCHMARK_MAX_AUDIO_BYTES)
+    try:
+        benchmarks = run_cases(durations, rates, audio_format, only, min_time, min_rounds, max_rounds)
+    finally:
+        voice_api.feature_cache, voice_api.MAX_AUDIO_BYTES = saved
+    return {
+        'datetime': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'machine': machine_info(),
+        'featureConfig': voice_api.feature_config_hash(),
+        'rulesId': voice_api.voice_rules.digest,
+        'benchmarks': benchmarks,
+    }
+
+def run_cases(durations, rates, audio_format, only, min_time, min_rounds, max_rounds):
+    """Benchmark entries of every case on every clip, printed as they finish"""
+    voice_api.warm_up_worker()
+    benchmarks = []
+    print(f"{'case':<34}{'clip':>14}{'rounds':>8}{'median (ms)':>13}{'stddev (ms)':>13}{'audio s/s':>11}")
+    for duration in durations:
+        for sr in rates:
+            for name, fn in cases(duration, sr, audio_format, only):
+                stats = summarize(measure(fn, min_time, min_rounds, max_rounds), duration)
+                benchmarks.append({
+                    'name': name,
+                    'group': f'{duration:g}s@{sr}',
+                    'params': {'duration': duration, 'sampleRate': sr, 'audioFormat': audio_format},
+                    'stats': stats,
+                })
+                print(f"{name:<34}{benchmarks[-1]['group']:>14}{stats['rounds']:>8}{stats['median'] * 1e3:>13.2f}"
+                      f"{stats['stddev'] * 1e3:>13.2f}{stats['audioSecondsPerSecond']:>11.0f}")
+    return benchmarks
+
+def latest_results(directory=RESULTS_DIR):
+    """Path of the newest saved results file, or None"""
+    paths = sorted(glob.glob(os.path.join(directory, 'pipeline-*.json')))
+    return paths[-1] if paths else None
+
+def compare(results, previous, threshold=0.1):
+    """
+    Per-case median changes against previous results
+
+    Returns (rows, regressions): rows are (name, group, previous median,
+    median, relative change) for the cases both runs have; regressions are
+    those slower by more than threshold.
+    """
+    before = {(benchmark['name'], benchmark['group']): benchmark['stats']['median'] for benchmark in previous['benchmarks']}
+    rows = []
+    for benchmark in results['benchmarks']:
+        key = (benchmark['name'], benchmark['group'])
+        if key in before and before[key] > 0:
+            median = benchmark['stats']['median']
+            rows.append((key[0], key[1], before[key], median, median / before[key] - 1))
+    return rows, [row for row in rows if row[4] > threshold]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the voice pipeline on deterministic synthetic clips")
+    parser.add_argument('--durations', type=float, nargs='+', default=DURATIONS, help="Clip lengths in seconds")
+    parser.add_argument('--rates', type=int, nargs='+', default=SAMPLE_RATES, help="Clip sample rates")
+    parser.add_argument('--format', choices=list(SUBTYPES), default='wav', help="Encoding of the synthetic clips")
+    parser.add_argument('--only', nargs='+', help="Run only cases whose name starts with one of these")
+    parser.add_argument('--min-time', type=float, default=1.0, help="Seconds spent measuring each case")
+    parser.add_argument('--min-rounds', type=int, default=1)
+    parser.add_argument('--max-rounds', type=int, default=50)
+    parser.add_argument('--output', help=f"Results file (default {RESULTS_DIR}/pipeline-<time>.json)")
+    parser.add_argument('--compare', help="Previous results file, or 'latest' for the newest one saved")
+    parser.add_argument('--threshold', type=float, default=0.1, help="Median slowdown that counts as a regression")
+    args = parser.parse_args(argv)
+    if args.format == 'mp3' and 'MP3' not in sf.available_formats():
+        parser.error("this libsndfile cannot encode MP3; use --format wav or flac")
+
+    previous_path = latest_results() if args.compare == 'latest' else args.compare
+    if args.compare and previous_path is None:
+        parser.error(f"no saved results in {RESULTS_DIR} to compare against")
+
+    results = run(args.durations, args.rates, args.format, args.only, args.min_time, args.min_rounds, args.max_rounds)
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+    if previous_path:
+        with open(previous_path) as f:
+            rows, regressions = compare(results, json.load(f), args.threshold)
+        print(f"\nCompared with {previous_path}:")
+        print(f"{'case':<34}{'clip':>14}{'before (ms)':>13}{'now (ms)':>11}{'change':>9}")
+        for name, group, before, median, change in rows:
+            flag = '  REGRESSION' if change > args.threshold else ''
+            print(f"{name:<34}{group:>14}{before * 1e3:>13.2f}{median * 1e3:>11.2f}{change:>+9.1%}{flag}")
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than {previous_path} by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
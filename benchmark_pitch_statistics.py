@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-frame pitch loop vs vectorized pitch_statistics
+Usage: python benchmark_pitch_statistics.py [durations...]
+"""
+
+import sys
+import timeit
+import numpy as np
+import librosa
+from problem1_voice_detection import pitch_statistics, FeatureContext, SAMPLE_RATE
+
+def pitch_statistics_loop(pitches, magnitudes):
+    """Original per-frame implementation, kept as the reference"""
+    pitch_values = []
+    for t in range(pitches.shape[1]):
+        index = magnitudes[:, t].argmax()
+        pitch = pitches[index, t]
+        if pitch > 0:
+            pitch_values.append(pitch)
+
+    if len(pitch_values) == 0:
+        return {'pitch_mean': 0, 'pitch_std': 0, 'pitch_var': 0, 'pitch_range': 0}
+
+    return {
+        'pitch_mean': np.mean(pitch_values),
+        'pitch_std': np.std(pitch_values),
+        'pitch_var': np.var(pitch_values),
+        'pitch_range': np.max(pitch_values) - np.min(pitch_values)
+    }
+
+def synthetic_voice(duration, sr=SAMPLE_RATE):
+    """Deterministic gliding-pitch signal with noise"""
+    rng = np.random.default_rng(42)
+    t = np.arange(int(sr * duration)) / sr
+    pitch = 150 + 60 * np.sin(2 * np.pi * 0.7 * t)
+    signal = np.sin(2 * np.pi * np.cumsum(pitch) / sr)
+    signal += 0.05 * rng.standard_normal(len(t))
+    return signal.astype(np.float32)
+
+def benchmark(durations):
+    print(f"{'clip (s)':>9} {'frames':>8} {'loop (ms)':>11} {'vector (ms)':>12} {'speedup':>8}")
+    for duration in durations:
+        y = synthetic_voice(duration)
+        S = FeatureContext(y, SAMPLE_RATE).get('magnitude')
+        pitches, magnitudes = librosa.piptrack(S=S, sr=SAMPLE_RATE)
+
+        # Results must be identical before timing means anything
+        expected = pitch_statistics_loop(pitches, magnitudes)
+        actual = pitch_statistics(pitches, magnitudes)
+        assert all(expected[k] == actual[k] for k in expected), "pitch statistics differ"
+
+        repeats = max(3, int(60 / duration))
+        loop_time = min(timeit.repeat(lambda: pitch_statistics_loop(pitches, magnitudes), number=1, repeat=repeats))
+        vector_time = min(timeit.repeat(lambda: pitch_statistics(pitches, magnitudes), number=1, repeat=repeats))
+
+        print(f"{duration:>9g} {pitches.shape[1]:>8} {loop_time * 1000:>11.2f} "
+              f"{vector_time * 1000:>12.3f} {loop_time / vector_time:>7.1f}x")
+
+if __name__ == '__main__':
+    durations = [float(arg) for arg in sys.argv[1:]] or [1, 10, 60, 300]
+    benchmark(durations)
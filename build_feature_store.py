@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Extract a labelled corpus into the feature store (see feature_store)
+Decodes and extracts each clip once; threshold experiments, calibration
+and training then load the stored matrix instead of touching audio.
+
+The manifest is a CSV with a header row and a path column, optionally
+label (AI_GENERATED/HUMAN, ai/human or 1/0), language, audioFormat (taken
+from the file extension otherwise) and sampleRate (pcm_s16le only).
+Relative paths are resolved against the manifest's directory and stored
+as given, as the rows' file IDs.
+
+Rows are appended in chunks as they are extracted; a rerun skips file IDs
+the current version already has, so an interrupted build resumes. Features
+from another extractor configuration are reported as stale (and deleted
+with --prune-stale).
+
+Usage: python build_feature_store.py manifest.csv STORE_DIR [--features all|analysis] [--jobs N]
+                                     [--chunk 256] [--prune-stale]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import problem1_voice_detection as voice_api
+from feature_store import open_store
+
+LABELS = {'ai_generated': 'AI_GENERATED', 'ai': 'AI_GENERATED', '1': 'AI_GENERATED',
+          'human': 'HUMAN', '0': 'HUMAN'}
+
+def read_manifest(path):
+    """[(file ID, clip path, label or None, language or None, audio format, sample rate)]"""
+    base = os.path.dirname(os.path.abspath(path))
+    entries = []
+    with open(path, newline='') as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            label = (row.get('label') or '').strip()
+            if label and label.lower() not in LABELS:
+                raise ValueError(f"{path}:{line}: unknown label {label!r}")
+            clip = os.path.join(base, row['path'])
+            audio_format = row.get('audioFormat') or os.path.splitext(clip)[1].lstrip('.').lower()
+            sample_rate = int(row['sampleRate']) if row.get('sampleRate') else None
+            entries.append((row['path'], clip, LABELS[label.lower()] if label else None,
+                            row.get('language') or None, audio_format, sample_rate))
+    return entries
+
+def current_store(root, feature_names=None):
+    """The store version of the current extractor configuration (created when feature_names are given)"""
+    return open_store(root, voice_api.feature_config_hash(), feature_names, voice_api.EXTRACTOR_CONFIG)
+
+def extract_entry(entry, feature_names):
+    """(FeatureVector, None) for one manifest entry, or (None, error)"""
+    _, clip, _, _, audio_format, sample_rate = entry
+    try:
+        with open(clip, 'rb') as f:
+            return voice_api.extract_audio_features(f.read(), feature_names, audio_format, sample_rate), None
+    except Exception as e:
+        return None, str(e)
+
+def build(manifest, root, feature_set='all', jobs=1, chunk=256, prune_stale=False):
+    """Extract the manifest's missing clips into the store; returns the store"""
+    feature_names = voice_api.ALL_FEATURES if feature_set == 'all' else voice_api.ANALYSIS_FEATURES
+    store = current_store(root, feature_names)
+    stale = store.stale_versions()
+    if stale:
+        action = "deleting" if prune_stale else "ignoring"
+        print(f"Stale features from other extractor configurations ({action}): "
+              + ", ".join(f"{name} ({rows} rows)" for name, rows in stale.items()))
+        if prune_stale:
+            store.prune_stale()
+
+    done = set(store.load().file_ids) if store.rows else set()
+    entries = [entry for entry in read_manifest(manifest) if entry[0] not in done]
+    print(f"{store.rows} clips stored for {store.config_hash}, {len(entries)} to extract")
+
+    start = time.perf_counter()
+    failed = 0
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        for offset in range(0, len(entries), chunk):
+            batch = entries[offset:offset + chunk]
+            if pool is None:
+                results = [extract_entry(entry, feature_names) for entry in batch]
+            else:
+                results = list(pool.map(extract_entry, batch, [feature_names] * len(batch)))
+            kept = [(entry, vector) for entry, (vector, error) in zip(batch, results) if vector is not None]
+            for entry, (_, error) in zip(batch, results):
+                if error is not None:
+                    failed += 1
+                    print(f"  {entry[0]}: {error}", file=sys.stderr)
+            if kept:
+                store.append([vector for _, vector in kept], [entry[0] for entry, _ in kept],
+                             [entry[2] for entry, _ in kept], [entry[3] for entry, _ in kept])
+            print(f"  {offset + len(batch)}/{len(entries)} clips ({time.perf_counter() - start:.1f} s)")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    print(f"Stored {store.rows} clips ({failed} failed) in {store.path}")
+    return store
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract a labelled corpus into the memory-mapped feature store")
+    parser.add_argument('manifest', help="CSV with path[,label,language,audioFormat,sampleRate] columns")
+    parser.add_argument('store', help="Feature store root directory")
+    parser.add_argument('--features', choices=['all', 'analysis'], default='all',
+                        help="ALL_FEATURES or ANALYSIS_FEATURES (fixed per store version)")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk', type=int, default=256, help="Clips extracted per append")
+    parser.add_argument('--prune-stale', action='store_true', help="Delete features from other extractor configurations")
+    args = parser.parse_args(argv)
+    build(args.manifest, args.store, args.features, args.jobs, args.chunk, args.prune_stale)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Bulk scan: classify every recording of a directory or manifest
+Runs the service's detection (extract_audio_features + the decision rules
+or model, via analyze_audio; recordings from AUTO_SEGMENT_SECONDS on get
+segmented analysis) over files on a process pool, appending one row per
+file to the output as soon as it is scored.
+
+Input is a directory (searched recursively for mp3, wav and flac files)
+or a manifest: a CSV with a path column (optionally audioFormat and
+sampleRate, as for train_voice_model.py; raw .pcm files need a manifest)
+or a text file with one path per line. Relative manifest paths are resolved against the manifest's
+directory.
+
+Output is CSV, JSONL or Parquet (by extension or --format). Parquet
+output is a directory of part files, one per --parquet-rows rows, and
+needs pyarrow. An interrupted scan resumes where it stopped: paths already
+in the output are skipped (--retry-errors scans failed ones again; the
+newer row for a path wins).
+
+Usage: python bulk_scan.py INPUT -o results.jsonl [--format csv|jsonl|parquet] [--jobs N]
+                           [--mode cascade|full] [--retry-errors] [--progress SECONDS]
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import problem1_voice_detection as voice_api
+
+AUDIO_EXTENSIONS = {'.mp3': 'mp3', '.wav': 'wav', '.flac': 'flac', '.pcm': 'pcm_s16le'}
+
+OUTPUT_FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.parquet': 'parquet'}
+
+# Columns of every output row
+RESULT_FIELDS = ['path', 'status', 'classification', 'confidence', 'explanation', 'decisionTier',
+                 'analysisMode', 'audioSeconds', 'processingSeconds', 'error']
+
+def list_inputs(source):
+    """[(path, audio format, sample rate)] from a directory or a manifest"""
+    if os.path.isdir(source):
+        entries = []
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                audio_format = AUDIO_EXTENSIONS.get(os.path.splitext(name)[1].lower())
+                if audio_format is not None and audio_format != 'pcm_s16le':
+                    entries.append((os.path.join(root, name), audio_format, None))
+        return entries
+
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, newline='') as f:
+        if source.lower().endswith('.csv'):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [{'path': line.strip()} for line in f if line.strip() and not line.startswith('#')]
+    entries = []
+    for row in rows:
+        path = os.path.join(base, row['path'])
+        audio_format = row.get('audioFormat') or AUDIO_EXTENSIONS.get(os.path.splitext(path)[1].lower(), 'mp3')
+        sample_rate = int(row['sampleRate']) if row.get('sampleRate') else None
+        entries.append((path, audio_format, sample_rate))
+    return entries
+
+def scan_file(entry, mode=None):
+    """Output row for one (path, audio format, sample rate) entry; errors become error rows"""
+    path, audio_format, sample_rate = entry
+    start = time.perf_counter()
+    row = dict.fromkeys(RESULT_FIELDS)
+    row['path'] = path
+    try:
+        with open(path, 'rb') as f:
+            audio_data = f.read()
+        analysis_mode, info = voice_api.inspect_upload(audio_data, None, audio_format, sample_rate)
+        if analysis_mode == 'segmented':
+            result = voice_api.analyze_segmented(audio_data, mode, audio_format, sample_rate)
+        else:
+            result = voice_api.analyze_audio(audio_data, mode, audio_format, sample_rate)
+        duration = result.get('audioDuration')
+        row.update(
+            status='ok',
+            classification=result['classification'],
+            confidence=round(float(result['confidence']), 4),
+            explanation=result['explanation'],
+            decisionTier=result.get('decisionTier'),
+            analysisMode=analysis_mode,
+            audioSeconds=duration['received'] if duration else (info['duration'] if info else None),
+        )
+    except Exception as e:
+        row.update(status='error', error=str(e) or type(e).__name__)
+    row['processingSeconds'] = round(time.perf_counter() - start, 4)
+    return row
+
+class CsvOutput:
+    """Rows appended to a CSV file, flushed per row"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def read_rows(self):
+        with open(self.path, newline='') as f:
+            return list(csv.DictReader(f))
+
+    def open(self, append):
+        self.file = open(self.path, 'a' if append else 'w', newline='')
+        self.writer = csv.DictWriter(self.file, fieldnames=RESULT_FIELDS)
+        if not append:
+            self.writer.writeheader()
+
+    def write(self, row):
+        self.writer.writerow(row)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class JsonlOutput(CsvOutput):
+    """Rows appended to a JSON Lines file, flushed per row"""
+
+    def read_rows(self):
+        rows = []
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    pass
+        return rows
+
+    def open(self, append):
+        self.file = open(self.path, 'a' if append else 'w')
+
+    def write(self, row):
+        self.file.write(json.dumps(row) + '\n')
+        self.file.flush()
+
+class ParquetOutput:
+    """Rows buffered into numbered part files of a Parquet dataset directory"""
+
+    def __init__(self, path, rows_per_part=1000):
+        import pyarrow
+        import pyarrow.parquet
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.path = path
+        self.rows_per_part = rows_per_part
+        self.schema = pyarrow.schema([
+            (name, pyarrow.float64() if name in ('confidence', 'audioSeconds', 'processingSeconds') else pyarrow.string())
+            for name in RESULT_FIELDS
+        ])
+
+    def parts(self):
+        return sorted(name for name in os.listdir(self.path) if name.startswith('part-') and name.endswith('.parquet'))
+
+    def read_rows(self):
+        rows = []
+        for name in self.parts():
+            rows.extend(self.pq.read_table(os.path.join(self.path, name), columns=['path', 'status']).to_pylist())
+        return rows
+
+    def open(self, append):
+        os.makedirs(self.path, exist_ok=True)
+        if not append:
+            for name in self.parts():
+                os.remove(os.path.join(self.path, name))
+        self.next_part = len(self.parts())
+        self.buffer = []
+
+    def write(self, row):
+        self.buffer.append(row)
+        if len(self.buffer) >= self.rows_per_part:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered rows as the next part (temp file + rename, so parts are never partial)"""
+        if not self.buffer:
+            return
+        part = os.path.join(self.path, f"part-{self.next_part:05d}.parquet")
+        self.pq.write_table(self.pa.Table.from_pylist(self.buffer, schema=self.schema), part + '.tmp')
+        os.replace(part + '.tmp', part)
+        self.next_part += 1
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+
+def open_output(path, output_format, parquet_rows=1000):
+    if output_format == 'parquet':
+        return ParquetOutput(path, parquet_rows)
+    return CsvOutput(path) if output_format == 'csv' else JsonlOutput(path)
+
+def drop_partial_line(path):
+    """Cut a row torn by an interrupted write off the end of a text output"""
+    with open(path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+
+def completed_paths(output, retry_errors=False):
+    """Paths the output already has a row for (a successful one, with retry_errors)"""
+    status = {}
+    for row in output.read_rows():
+        status[row['path']] = row['status']
+    return {path for path, state in status.items() if state == 'ok' or not retry_errors}
+
+class Progress:
+    """Periodic progress lines and the final throughput report (on stderr)"""
+
+    def __init__(self, total, skipped, every=5.0, stream=sys.stderr):
+        self.total = total
+        self.skipped = skipped
+        self.every = every
+        self.stream = stream
+        self.start = time.perf_counter()
+        self.last_report = self.start
+        self.done = 0
+        self.errors = 0
+        self.audio_seconds = 0.0
+
+    def update(self, row):
+        self.done += 1
+        if row['status'] == 'ok':
+            self.audio_seconds += row['audioSeconds'] or 0.0
+        else:
+            self.errors += 1
+        now = time.perf_counter()
+        if self.every and now - self.last_report >= self.every:
+            self.last_report = now
+            print(self.line(now), file=self.stream, flush=True)
+
+    def rates(self, now):
+        elapsed = max(now - self.start, 1e-9)
+        return elapsed, self.done / elapsed, self.audio_seconds / elapsed
+
+    def line(self, now):
+        elapsed, files_per_second, audio_per_second = self.rates(now)
+        remaining = self.total - self.done
+        eta = f", ETA {remaining / files_per_second:.0f} s" if files_per_second else ""
+        return (f"{self.done}/{self.total} files ({100 * self.done / max(self.total, 1):.1f}%), "
+                f"{self.errors} errors, {files_per_second:.2f} files/s, "
+                f"{audio_per_second:.1f} audio-s/s{eta}")
+
+    def report(self):
+        """Throughput summary dict (also printed)"""
+        now = time.perf_counter()
+        elapsed, files_per_second, audio_per_second = self.rates(now)
+        summary = {
+            'files': self.done,
+            'errors': self.errors,
+            'skipped': self.skipped,
+            'seconds': round(elapsed, 3),
+            'filesPerSecond': round(files_per_second, 3),
+            'audioSeconds': round(self.audio_seconds, 3),
+            'audioSecondsPerSecond': round(audio_per_second, 3),
+        }
+        print(f"Scanned {self.done} files ({self.errors} errors, {self.skipped} already done) in {elapsed:.1f} s: "
+              f"{files_per_second:.2f} files/s, {audio_per_second:.1f} audio-s/s "
+              f"({audio_per_second:.0f}x real time)", file=self.stream, flush=True)
+        return summary
+
+def worker_died(entry):
+    row = dict.fromkeys(RESULT_FIELDS)
+    row.update(path=entry[0], status='error', error="Worker process died")
+    return row
+
+def iter_results(entries, jobs, mode):
+    """
+    Rows as files finish, at most 4 per worker in flight
+
+    A crashed worker breaks the whole pool, failing every file in flight
+    with it. The pool is restarted and those files rerun one at a time, so
+    only the file that crashes on its own is reported as "Worker process died".
+    """
+    if jobs <= 1:
+        for entry in entries:
+            yield scan_file(entry, mode)
+        return
+
+    pending = iter(entries)
+    pool = ProcessPoolExecutor(max_workers=jobs)
+    in_flight = {}   # future -> (entry, run alone)
+    suspects = []
+    try:
+        while True:
+            if suspects:
+                if not in_flight:
+                    entry = suspects.pop()
+                    in_flight[pool.submit(scan_file, entry, mode)] = (entry, True)
+            else:
+                while len(in_flight) < 4 * jobs:
+                    entry = next(pending, None)
+                    if entry is None:
+                        break
+                    in_flight[pool.submit(scan_file, entry, mode)] = (entry, False)
+            if not in_flight:
+                return
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                entry, alone = in_flight.pop(future)
+                try:
+                    yield future.result()
+                except BrokenProcessPool:
+                    broken = True
+                    if alone:
+                        yield worker_died(entry)
+                    else:
+                        suspects.append(entry)
+            if broken:
+                suspects.extend(entry for entry, _ in in_flight.values())
+                in_flight = {}
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = ProcessPoolExecutor(max_workers=jobs)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def scan(source, output_path, output_format=None, jobs=1, mode=None, resume=True, retry_errors=False,
+         progress_every=5.0, parquet_rows=1000):
+    """Scan source into output_path; returns the throughput summary dict"""
+    output_format = output_format or OUTPUT_FORMATS.get(os.path.splitext(output_path)[1].lower(), 'jsonl')
+    output = open_output(output_path, output_format, parquet_rows)
+    entries = list_inputs(source)
+
+    append = resume and os.path.exists(output_path)
+    done = set()
+    if append:
+        if output_format != 'parquet':
+            drop_partial_line(output_path)
+        done = completed_paths(output, retry_errors)
+    todo = [entry for entry in entries if entry[0] not in done]
+
+    progress = Progress(len(todo), len(entries) - len(todo), progress_every)
+    output.open(append)
+    try:
+        for row in iter_results(todo, jobs, mode):
+            output.write(row)
+            progress.update(row)
+    finally:
+        output.close()
+    return progress.report()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classify every recording of a directory or manifest")
+    parser.add_argument('input', help="Directory of audio files, CSV manifest (path[,audioFormat,sampleRate]) or list of paths")
+    parser.add_argument('-o', '--output', required=True, help="Results file (.csv, .jsonl) or Parquet directory (.parquet)")
+    parser.add_argument('--format', choices=['csv', 'jsonl', 'parquet'], help="Output format (default: from the extension)")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--mode', choices=['cascade', 'full'], help="Detection mode (default: DETECTION_MODE)")
+    parser.add_argument('--no-resume', action='store_true', help="Overwrite the output instead of resuming it")
+    parser.add_argument('--retry-errors', action='store_true', help="When resuming, scan files that failed before again")
+    parser.add_argument('--progress', type=float, default=5.0, help="Seconds between progress lines (0: none)")
+    parser.add_argument('--parquet-rows', type=int, default=1000, help="Rows per Parquet part file")
+    parser.add_argument('--report', help="Also write the throughput summary to this JSON file")
+    args = parser.parse_args(argv)
+
+    output_format = args.format or OUTPUT_FORMATS.get(os.path.splitext(args.output)[1].lower(), 'jsonl')
+    if output_format == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("Parquet output needs pyarrow (pip install pyarrow)")
+
+    summary = scan(args.input, args.output, output_format, args.jobs, args.mode, not args.no_resume,
+                   args.retry_errors, args.progress, args.parquet_rows)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
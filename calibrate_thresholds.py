@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Threshold calibration for the decision rules, over stored features
+Loads the labelled rows of a feature store (build_feature_store.py) and
+searches the thresholds of every rule condition in a rules file
+(voice_rules.json by default) for the best precision/recall trade-off,
+then writes the result as a new rules file - a threshold profile the
+service loads at startup with DECISION_RULES_PATH.
+
+Each condition gets a small set of candidate thresholds: quantiles of its
+feature over the corpus plus the current value. A condition's outcome
+for every clip and candidate is computed once and bit-packed (64 clips
+per uint64), so a threshold combination costs a few AND/OR operations and
+a popcount per 64 clips:
+
+- grid:       every combination of candidates (the largest rule's
+              combinations vectorized, the rest looped)
+- coordinate: one condition at a time over its candidates, others fixed,
+              until no change improves the objective
+
+Every evaluated candidate gets precision, recall and false-positive rate;
+the report lists the best ones and the ROC frontier they trace. With
+--per-language, languages with enough labelled clips get their own
+thresholds under "languages" in the profile.
+
+Usage: python calibrate_thresholds.py STORE_DIR [-o voice_rules.calibrated.json] [--rules voice_rules.json]
+                                      [--search grid|coordinate] [--grid 8] [--objective f1|youden|accuracy]
+                                      [--min-precision P] [--per-language] [--min-clips 50] [--report report.json]
+"""
+
+import argparse
+import copy
+import itertools
+import json
+import sys
+import time
+import numpy as np
+import problem1_voice_detection as voice_api
+from build_feature_store import current_store
+from decision_rules import RuleSet, load_rules
+
+OBJECTIVES = ['f1', 'youden', 'accuracy']
+
+# Largest grid evaluated (use --search coordinate or a smaller --grid beyond)
+MAX_GRID_COMBINATIONS = 100_000_000
+
+# uint64 words per vectorized block, bounding the working memory of a step
+BLOCK_WORDS = 1 << 21
+
+POPCOUNT8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+def pack_bits(mask):
+    """Boolean (..., N) array -> uint64 (..., ceil(N / 64)) bitsets"""
+    packed = np.packbits(mask, axis=-1, bitorder='little')
+    padding = (-packed.shape[-1]) % 8
+    if padding:
+        packed = np.pad(packed, [(0, 0)] * (packed.ndim - 1) + [(0, padding)])
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+def popcount(words):
+    """Set bits of uint64 bitsets, summed over the last axis"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+    return POPCOUNT8[words.view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+class Calibration:
+    """
+    One labelled subset, packed for threshold search against a RuleSet
+
+    candidates[c] are condition c's candidate thresholds (sorted, with the
+    current one at current[c]); masks[c] is the (candidates, words) bitset
+    of the clips meeting condition c at each candidate.
+    """
+
+    def __init__(self, rules, values, labels, grid=8):
+        self.rules = rules
+        self.n = len(labels)
+        self.n_pos = int((labels == 1).sum())
+        self.n_neg = self.n - self.n_pos
+        self.positives = pack_bits(labels == 1)
+        self.everyone = pack_bits(np.ones(self.n, dtype=bool))
+
+        condition_values = values[:, rules.columns].astype(np.float64)
+        comparisons = {}
+        for compare, mask in rules.comparisons:
+            for c in np.flatnonzero(mask):
+                comparisons[c] = compare
+        self.candidates, self.masks, self.current = [], [], []
+        for c, threshold in enumerate(rules.thresholds):
+            column = condition_values[:, c]
+            finite = column[np.isfinite(column)]
+            quantiles = np.quantile(finite, np.linspace(0, 1, grid)) if len(finite) else np.empty(0)
+            candidates = np.unique(np.append(quantiles, threshold))
+            self.candidates.append(candidates)
+            self.current.append(int(np.searchsorted(candidates, threshold)))
+            self.masks.append(pack_bits(comparisons[c](column[None, :], candidates[:, None])))
+
+        self.rule_conditions = [list(np.flatnonzero(row)) for row in rules.membership]
+        self.ai_rules = [rules.label_names[label] == 'AI_GENERATED' for label in rules.labels[:-1]]
+        self.default_ai = rules.label_names[rules.labels[-1]] == 'AI_GENERATED'
+
+    def rule_mask(self, rule, indices, vary=None):
+        """A rule's match bitset at the candidate indices, (1, W); (candidates, W) over condition vary"""
+        match = self.everyone[None, :]
+        for c in self.rule_conditions[rule]:
+            match = match & (self.masks[c] if c == vary else self.masks[c][indices[c]][None, :])
+        return match
+
+    def rule_combinations(self, rule):
+        """(combinations, W) bitsets of every candidate combination of a rule's conditions"""
+        match = self.everyone
+        for c in self.rule_conditions[rule]:
+            match = (match[..., None, :] & self.masks[c]) if match.ndim > 1 else (match[None, :] & self.masks[c])
+        return match.reshape(-1, self.everyone.shape[-1])
+
+    def predicted_ai(self, rule_masks):
+        """Bitsets of the clips classified AI_GENERATED (first matching rule, else the default)"""
+        decided = np.zeros_like(self.everyone)[None, :]
+        ai = np.zeros_like(self.everyone)[None, :]
+        for is_ai, match in zip(self.ai_rules, rule_masks):
+            if is_ai:
+                ai = ai | (match & ~decided)
+            decided = decided | match
+        if self.default_ai:
+            ai = ai | (self.everyone & ~decided)
+        return ai
+
+    def counts(self, ai):
+        """(true positives, false positives) per bitset"""
+        true_positives = popcount(ai & self.positives)
+        return true_positives, popcount(ai) - true_positives
+
+    def metrics(self, true_positives, false_positives):
+        """Precision, recall (TPR), false-positive rate, F1, Youden's J and accuracy arrays"""
+        true_positives = np.asarray(true_positives, dtype=np.float64)
+        false_positives = np.asarray(false_positives, dtype=np.float64)
+        predicted = true_positives + false_positives
+        recall = true_positives / max(self.n_pos, 1)
+        fpr = false_positives / max(self.n_neg, 1)
+        return {
+            'precision': np.divide(true_positives, predicted, out=np.ones_like(predicted), where=predicted > 0),
+            'recall': recall,
+            'fpr': fpr,
+            'f1': 2 * true_positives / np.maximum(predicted + self.n_pos, 1),
+            'youden': recall - fpr,
+            'accuracy': (true_positives + self.n_neg - false_positives) / max(self.n, 1),
+        }
+
+    def score(self, true_positives, false_positives, objective='f1', min_precision=None):
+        """Objective per candidate; with min_precision, recall among candidates that reach it"""
+        metrics = self.metrics(true_positives, false_positives)
+        if min_precision is None:
+            return metrics[objective]
+        return np.where(metrics['precision'] >= min_precision, metrics['recall'], -np.inf)
+
+    def thresholds(self, indices):
+        return [float(self.candidates[c][i]) for c, i in enumerate(indices)]
+
+    def grid_size(self):
+        return int(np.prod([len(candidates) for candidates in self.candidates], dtype=np.float64))
+
+    def grid_search(self, objective='f1', min_precision=None):
+        """
+        Best candidate indices over the full grid
+
+        Returns (indices, (true positives, false positives) of every
+        combination as flat arrays).
+        """
+        combos = [self.rule_combinations(rule) for rule in range(len(self.rule_conditions))]
+        shapes = [[len(self.candidates[c]) for c in conditions] for conditions in self.rule_conditions]
+        vary = int(np.argmax([len(combo) for combo in combos]))
+        words = self.everyone.shape[-1]
+        block = max(1, BLOCK_WORDS // max(words, 1))
+        outer = list(itertools.product(*[range(len(combo)) for rule, combo in enumerate(combos) if rule != vary]))
+        true_positives = np.empty((len(outer), len(combos[vary])), dtype=np.int64)
+        false_positives = np.empty_like(true_positives)
+
+        for row, picks in enumerate(outer):
+            picks = iter(picks)
+            fixed = [None if rule == vary else combo[next(picks)][None, :] for rule, combo in enumerate(combos)]
+            for start in range(0, len(combos[vary]), block):
+                masks = [combos[vary][start:start + block] if mask is None else mask for mask in fixed]
+                tp, fp = self.counts(self.predicted_ai(masks))
+                true_positives[row, start:start + block] = tp
+                false_positives[row, start:start + block] = fp
+
+        best_row, best_column = np.unravel_index(np.argmax(self.score(true_positives, false_positives, objective, min_precision)),
+                                                 true_positives.shape)
+        indices = list(self.current)
+        picks = iter(outer[best_row])
+        for rule, conditions in enumerate(self.rule_conditions):
+            combo = best_column if rule == vary else next(picks)
+            for c, i in zip(conditions, np.unravel_index(combo, shapes[rule]) if conditions else []):
+                indices[c] = int(i)
+        return indices, (true_positives.ravel(), false_positives.ravel())
+
+    def coordinate_search(self, objective='f1', min_precision=None, max_passes=20):
+        """
+        Best candidate indices by coordinate ascent from the current thresholds
+
+        Returns (indices, (true positives, false positives) of every
+        evaluated candidate).
+        """
+        indices = list(self.current)
+        evaluated_tp, evaluated_fp = [], []
+        best = self.score(*self.counts(self.predicted_ai(
+            [self.rule_mask(rule, indices) for rule in range(len(self.rule_conditions))])), objective, min_precision)[0]
+        for _ in range(max_passes):
+            improved = False
+            for rule, conditions in enumerate(self.rule_conditions):
+                for c in conditions:
+                    masks = [self.rule_mask(other, indices, vary=c if other == rule else None)
+                             for other in range(len(self.rule_conditions))]
+                    tp, fp = self.counts(self.predicted_ai(masks))
+                    evaluated_tp.append(tp)
+                    evaluated_fp.append(fp)
+                    scores = self.score(tp, fp, objective, min_precision)
+                    candidate = int(np.argmax(scores))
+                    if scores[candidate] > best + 1e-12:
+                        best, indices[c], improved = scores[candidate], candidate, True
+            if not improved:
+                break
+        return indices, (np.concatenate(evaluated_tp), np.concatenate(evaluated_fp))
+
+    def evaluate_indices(self, indices):
+        """Metrics dict of one threshold choice"""
+        tp, fp = self.counts(self.predicted_ai(
+            [self.rule_mask(rule, indices) for rule in range(len(self.rule_conditions))]))
+        return {name: round(float(values[0]), 4) for name, values in self.metrics(tp, fp).items()}
+
+def roc_frontier(calibration, true_positives, false_positives, max_points=20):
+    """Upper-left frontier of the evaluated (FPR, TPR) points, thinned, and the area under it"""
+    metrics = calibration.metrics(true_positives, false_positives)
+    points = np.unique(np.stack([metrics['fpr'], metrics['recall']], axis=1), axis=0)
+    frontier = [(0.0, 0.0)]
+    for fpr, tpr in points[np.lexsort((-points[:, 1], points[:, 0]))]:
+        if tpr > frontier[-1][1]:
+            frontier.append((float(fpr), float(tpr)))
+    frontier.append((1.0, 1.0))
+    frontier = np.array(frontier)
+    area = float(np.sum(np.diff(frontier[:, 0]) * (frontier[1:, 1] + frontier[:-1, 1]) / 2))
+    keep = np.unique(np.linspace(0, len(frontier) - 1, min(max_points, len(frontier))).round().astype(int))
+    return [{'fpr': round(float(x), 4), 'tpr': round(float(y), 4)} for x, y in frontier[keep]], round(area, 4)
+
+def calibrate(rules, values, labels, search='grid', grid=8, objective='f1', min_precision=None):
+    """Calibrate one labelled subset; returns (threshold per condition, report dict)"""
+    calibration = Calibration(rules, values, labels, grid)
+    start = time.perf_counter()
+    if search == 'grid':
+        if calibration.grid_size() > MAX_GRID_COMBINATIONS:
+            raise ValueError(f"{calibration.grid_size()} combinations is too many for a grid search; "
+                             f"use a smaller --grid or --search coordinate")
+        indices, (tp, fp) = calibration.grid_search(objective, min_precision)
+    else:
+        indices, (tp, fp) = calibration.coordinate_search(objective, min_precision)
+    elapsed = time.perf_counter() - start
+
+    scores = calibration.score(tp, fp, objective, min_precision)
+    metrics = calibration.metrics(tp, fp)
+    top = np.argsort(-scores, kind='stable')[:10]
+    frontier, auc = roc_frontier(calibration, tp, fp)
+    report = {
+        'clips': calibration.n,
+        'aiClips': calibration.n_pos,
+        'search': search,
+        'candidatesEvaluated': int(len(tp)),
+        'seconds': round(elapsed, 3),
+        'current': dict(calibration.evaluate_indices(calibration.current), thresholds=calibration.thresholds(calibration.current)),
+        'calibrated': dict(calibration.evaluate_indices(indices), thresholds=calibration.thresholds(indices)),
+        'topCandidates': [{name: round(float(metrics[name][i]), 4) for name in ('precision', 'recall', 'fpr', 'f1')}
+                          for i in top],
+        'roc': frontier,
+        'rocAuc': auc,
+    }
+    return calibration.thresholds(indices), report
+
+def with_thresholds(spec, thresholds):
+    """Copy of a rules spec's rules with the condition thresholds replaced (in condition order)"""
+    rules = copy.deepcopy(spec['rules'])
+    values = iter(thresholds)
+    for rule in rules:
+        rule['conditions'] = [[feature, comparison, next(values)] for feature, comparison, _ in rule['conditions']]
+    return rules
+
+def print_report(name, report):
+    current, calibrated = report['current'], report['calibrated']
+    print(f"{name}: {report['clips']} clips ({report['aiClips']} AI), {report['candidatesEvaluated']} candidates "
+          f"in {report['seconds']:.2f} s, ROC AUC {report['rocAuc']:.3f}")
+    for label, metrics in (('current', current), ('calibrated', calibrated)):
+        print(f"  {label:>10}: precision {metrics['precision']:.3f}, recall {metrics['recall']:.3f}, "
+              f"FPR {metrics['fpr']:.3f}, F1 {metrics['f1']:.3f}  thresholds {', '.join(f'{value:.6g}' for value in metrics['thresholds'])}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calibrate the decision-rule thresholds on a labelled feature store")
+    parser.add_argument('store', help="Feature store root (build_feature_store.py)")
+    parser.add_argument('-o', '--output', default='voice_rules.calibrated.json', help="Threshold profile to write")
+    parser.add_argument('--rules', default=voice_api.DECISION_RULES_PATH, help="Rules file whose thresholds are calibrated")
+    parser.add_argument('--search', choices=['grid', 'coordinate'], default='grid')
+    parser.add_argument('--grid', type=int, default=8, help="Candidate thresholds per condition (plus the current one)")
+    parser.add_argument('--objective', choices=OBJECTIVES, default='f1')
+    parser.add_argument('--min-precision', type=float, help="Maximize recall among candidates with at least this precision")
+    parser.add_argument('--per-language', action='store_true', help="Also calibrate each language with enough clips")
+    parser.add_argument('--min-clips', type=int, default=50, help="Labelled clips a language needs (--per-language)")
+    parser.add_argument('--report', help="Write the full calibration report to this JSON file")
+    args = parser.parse_args(argv)
+
+    rules = load_rules(args.rules)
+    stored = current_store(args.store).load()
+    missing = [name for name in rules.feature_names if name not in stored.matrix.schema]
+    if missing:
+        parser.error(f"the store has no {', '.join(missing)} features")
+    labelled = stored.labels >= 0
+    values = stored.matrix.select(rules.feature_names).values
+    labels = stored.labels
+
+    thresholds, report = calibrate(rules, values[labelled], labels[labelled], args.search, args.grid,
+                                   args.objective, args.min_precision)
+    print_report("All languages", report)
+    profile = dict(copy.deepcopy(rules.spec), rules=with_thresholds(rules.spec, thresholds))
+    calibration = {
+        'calibratedAt': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'featureConfig': stored.config_hash,
+        'objective': f"recall at precision >= {args.min_precision}" if args.min_precision else args.objective,
+        'report': report,
+    }
+    profile['calibration'] = calibration
+
+    if args.per_language:
+        languages = profile.setdefault('languages', {})
+        for language in stored.languages:
+            rows = labelled & stored.language_mask(language)
+            if rows.sum() < args.min_clips or len(np.unique(labels[rows])) < 2:
+                print(f"{language}: {int(rows.sum())} labelled clips, keeping the shared thresholds")
+                continue
+            language_thresholds, language_report = calibrate(rules, values[rows], labels[rows], args.search,
+                                                             args.grid, args.objective, args.min_precision)
+            print_report(language, language_report)
+            languages[language] = {'rules': with_thresholds(rules.spec, language_thresholds),
+                                   'calibration': {'report': language_report}}
+
+    RuleSet(profile)  # the service must be able to load it
+    with open(args.output, 'w') as f:
+        json.dump(profile, f, indent=2)
+    print(f"Wrote threshold profile to {args.output} (load it with DECISION_RULES_PATH={args.output})")
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'all': report, 'languages': {name: language['calibration']['report']
+                                                    for name, language in profile.get('languages', {}).items()
+                                                    if 'calibration' in language}}, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,7 +4,7 @@ Comparison report for voice detection
 """
 
 import os
-from problem1_voice_detection import extract_audio_features, analyze_voice_patterns
+from problem1_voice_detection import extract_file_features, analyze_voice_patterns
 
 def compare_voices():
     """Compare all voice samples"""
@@ -27,10 +27,7 @@ def compare_voices():
             continue
         
         try:
-            with open(filepath, 'rb') as f:
-                audio_data = f.read()
-            
-            features = extract_audio_features(audio_data)
+            features = extract_file_features(filepath)
             result = analyze_voice_patterns(features)
             
             results.append({
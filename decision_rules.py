@@ -0,0 +1,184 @@
+"""
+Declarative decision rules, evaluated over whole feature matrices
+The threshold decision is data, not code: a JSON rule set (voice_rules.json)
+lists rules in priority order, each a label, a score (the confidence it
+reports), an explanation and its conditions as [feature, comparison,
+threshold] triples. A clip gets the first rule whose conditions all hold,
+or the default decision when none does.
+
+RuleSet.evaluate applies every rule to an (n, F) FeatureMatrix at once:
+one array comparison per comparison operator and one matrix product that
+counts each rule's failed conditions, so scoring an archive is a handful
+of NumPy calls instead of a Python decision per clip. decide() is the
+single-clip form; cascade() evaluates the rules tier by tier on a feature
+context, stopping once no uncomputed feature can change the outcome.
+
+A rules file may also hold per-language overrides ("languages": {name:
+{"rules": [...], ...}}, e.g. written by calibrate_thresholds.py); each
+replaces those top-level keys for clips of that language.
+"""
+
+import hashlib
+import json
+import numpy as np
+from feature_vector import FeatureMatrix, FeatureVector, feature_schema
+
+RULES_FORMAT_VERSION = 1
+
+COMPARISONS = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+}
+
+class RuleSet:
+    """
+    A parsed rule set, compiled to arrays
+
+    Conditions are flattened in rule order: column (index into
+    feature_names), comparison and threshold per condition, and a
+    (rules, conditions) membership matrix. The default decision is the
+    last entry of labels/confidences/explanations.
+    """
+
+    def __init__(self, spec):
+        if spec.get('version') != RULES_FORMAT_VERSION:
+            raise ValueError(f"Unsupported decision rules version: {spec.get('version')}")
+        self.spec = spec
+        self.rules = list(spec['rules'])
+        default = spec['default']
+        low, high = spec.get('confidenceRange', (0.0, 1.0))
+
+        conditions = []
+        for rule in self.rules:
+            for feature, comparison, threshold in rule['conditions']:
+                if comparison not in COMPARISONS:
+                    raise ValueError(f"Rule {rule.get('name')!r}: unknown comparison {comparison!r}")
+                conditions.append((feature, comparison, float(threshold)))
+
+        # Unique condition features, in first-use order
+        self.feature_names = list(dict.fromkeys(feature for feature, _, _ in conditions))
+        self.schema = feature_schema(self.feature_names)
+        self.defaults = {name: float(value) for name, value in spec.get('defaults', {}).items()}
+
+        self.columns = np.array([self.schema.index[feature] for feature, _, _ in conditions], dtype=np.intp)
+        self.thresholds = np.array([threshold for _, _, threshold in conditions], dtype=np.float64)
+        comparisons = np.array([comparison for _, comparison, _ in conditions], dtype=object)
+        self.comparisons = [(COMPARISONS[name], comparisons == name) for name in COMPARISONS if (comparisons == name).any()]
+        self.membership = np.zeros((len(self.rules), len(conditions)), dtype=np.int32)
+        start = 0
+        for i, rule in enumerate(self.rules):
+            self.membership[i, start:start + len(rule['conditions'])] = 1
+            start += len(rule['conditions'])
+
+        decisions = self.rules + [default]
+        self.label_names = list(dict.fromkeys(decision['label'] for decision in decisions))
+        self._label_array = np.array(self.label_names)
+        self.labels = np.array([self.label_names.index(decision['label']) for decision in decisions], dtype=np.intp)
+        self.confidences = np.clip([float(decision['score']) for decision in decisions], low, high)
+        self.explanations = [decision['explanation'] for decision in decisions]
+        self.digest = hashlib.sha1(json.dumps(spec, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+        base = {key: value for key, value in spec.items() if key != 'languages'}
+        self.language_rules = {language: RuleSet(dict(base, **override))
+                               for language, override in spec.get('languages', {}).items()}
+        # Every feature some language's rules read
+        self.all_feature_names = list(dict.fromkeys(
+            self.feature_names + [name for rules in self.language_rules.values() for name in rules.feature_names]
+        ))
+
+    def for_language(self, language):
+        """The rule set for clips of language (its override, or these rules)"""
+        return self.language_rules.get(language, self)
+
+    def _condition_values(self, values):
+        """Each condition's feature value from rule-feature-ordered values (..., F) -> (..., C)"""
+        return values[..., self.columns]
+
+    def _failed_rules(self, condition_values, known=None):
+        """
+        Per rule: any condition known to fail, and all conditions known to hold
+
+        known (same shape as condition_values) marks computed features; NaN
+        values never satisfy a comparison.
+        """
+        passed = np.zeros(condition_values.shape, dtype=bool)
+        for compare, mask in self.comparisons:
+            passed[..., mask] = compare(condition_values[..., mask], self.thresholds[mask])
+        failed = ~passed if known is None else ~passed & known
+        held = passed if known is None else passed & known
+        failed_rules = failed.astype(np.int32) @ self.membership.T > 0
+        held_rules = held.astype(np.int32) @ self.membership.T == self.membership.sum(axis=1)
+        return failed_rules, held_rules
+
+    def matrix_values(self, features):
+        """(n, F) values over feature_names from a FeatureMatrix, (n, F) array or feature mappings"""
+        if isinstance(features, FeatureMatrix):
+            return features.select(self.feature_names).values
+        if isinstance(features, np.ndarray):
+            return features
+        return np.array([self.vector_values(mapping) for mapping in features], dtype=np.float64).reshape(-1, len(self.schema))
+
+    def vector_values(self, features):
+        """Values over feature_names from one features mapping (rule defaults fill missing features)"""
+        if isinstance(features, FeatureVector) and all(name in features.schema for name in self.feature_names):
+            return features.select(self.feature_names).values
+        return np.array([features.get(name, self.defaults.get(name, np.nan)) for name in self.feature_names],
+                        dtype=np.float64)
+
+    def evaluate(self, features):
+        """
+        Decisions for a batch
+
+        features is a FeatureMatrix (any schema containing feature_names),
+        an (n, F) array over feature_names, or a sequence of feature
+        mappings. Returns (classifications, confidences, explanation
+        indices into explanations), each an array of n entries.
+        """
+        values = self.matrix_values(features)
+        failed_rules, _ = self._failed_rules(self._condition_values(values))
+        matched = ~failed_rules
+        # First matching rule, or the default (index len(rules))
+        decision = np.where(matched.any(axis=1), matched.argmax(axis=1), len(self.rules))
+        return self._label_array[self.labels[decision]], self.confidences[decision], decision
+
+    def decide(self, features):
+        """Classification, confidence and explanation for one features mapping"""
+        classifications, confidences, decisions = self.evaluate(self.vector_values(features)[None, :])
+        return str(classifications[0]), float(confidences[0]), self.explanations[decisions[0]]
+
+    def cascade(self, ctx, tiers):
+        """
+        Tiered early-exit decision on a feature context
+
+        tiers is [(tier name, feature names)], cheapest first; rule features
+        in no tier are computed with the last one. After each tier the
+        outcome is settled when the first rule not yet ruled out has all its
+        conditions met, or when every rule is ruled out (the default).
+        Returns (classification, confidence, explanation, tier, features
+        computed as a dict) - the same decision as decide() on all features.
+        """
+        features = {}
+        for i, (tier, names) in enumerate(tiers):
+            if i == len(tiers) - 1:
+                names = list(names) + [name for name in self.feature_names if name not in features and name not in names]
+            features.update(ctx.features(names))
+            known = np.array([name in features for name in self.feature_names])
+            values = np.array([features.get(name, np.nan) for name in self.feature_names], dtype=np.float64)
+            failed_rules, held_rules = self._failed_rules(self._condition_values(values), known[self.columns])
+            open_rules = np.flatnonzero(~failed_rules)
+            if len(open_rules) == 0:
+                decision = len(self.rules)
+            elif held_rules[open_rules[0]]:
+                decision = open_rules[0]
+            else:
+                continue
+            return (self.label_names[self.labels[decision]], float(self.confidences[decision]),
+                    self.explanations[decision], tier, features)
+        raise ValueError("Cascade tiers do not settle every rule")
+
+def load_rules(path):
+    """RuleSet from a JSON rules file"""
+    with open(path, 'r') as f:
+        return RuleSet(json.load(f))
@@ -4,7 +4,7 @@ Deep analysis of sample voice
 """
 
 import os
-from problem1_voice_detection import extract_audio_features, analyze_voice_patterns
+from problem1_voice_detection import extract_file_features, analyze_voice_patterns
 
 def deep_analyze():
     filename = 'sample voice 1.mp3'
@@ -16,10 +16,7 @@ def deep_analyze():
     print(f"Deep Analysis: {filename}")
     
     try:
-        with open(filename, 'rb') as f:
-            audio_data = f.read()
-        
-        features = extract_audio_features(audio_data)
+        features = extract_file_features(filename)
         result = analyze_voice_patterns(features)
         
         print(f"Classification: {result[0]}")
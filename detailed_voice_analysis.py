@@ -5,8 +5,7 @@ Detailed voice analysis for all sample files
 
 import os
 import numpy as np
-import librosa
-from problem1_voice_detection import extract_audio_features, analyze_voice_patterns
+from problem1_voice_detection import load_audio_file, extract_signal_features, analyze_voice_patterns
 
 def analyze_all_voices():
     """Analyze all available voice files"""
@@ -34,8 +33,8 @@ def analyze_all_voices():
         print(f"{'=' * 80}")
         
         try:
-            y, sr = librosa.load(filepath, sr=None)
-            features = extract_audio_features(y, sr)
+            y, sr = load_audio_file(filepath)
+            features = extract_signal_features(y, sr)
             result = analyze_voice_patterns(features)
             
             print(f"\nClassification: {result['classification']}")
@@ -7,7 +7,7 @@ Combines multiple detection methods for improved accuracy
 import os
 import numpy as np
 import librosa
-from problem1_voice_detection import extract_audio_features, analyze_voice_patterns
+from problem1_voice_detection import load_audio_file, extract_signal_features, analyze_voice_patterns
 
 def ensemble_detect(audio_file):
     """Ensemble detection using multiple methods"""
@@ -17,8 +17,8 @@ def ensemble_detect(audio_file):
         return None
     
     try:
-        y, sr = librosa.load(audio_file, sr=None)
-        features = extract_audio_features(y, sr)
+        y, sr = load_audio_file(audio_file)
+        features = extract_signal_features(y, sr)
         
         # Method 1: Pattern-based detection (original)
         result_pattern = analyze_voice_patterns(features)
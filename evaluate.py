@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Evaluation harness: accuracy and per-stage latency/memory on a labelled manifest
+Runs the detection pipeline over every clip of a manifest (the
+build_feature_store.py format: path, label, language, audioFormat,
+sampleRate) on a process pool and reports:
+
+- the confusion matrix, overall and per-label accuracy, and the
+  misclassified and failed clips
+- p50/p95/p99 latency and peak memory of every pipeline stage: decode,
+  resample, vad (with VAD_ENABLED), each feature-graph node (features and
+  shared intermediates such as the STFT, each timed without its
+  dependencies), decision, and the whole clip
+- how many clips took each pipeline: clips the service analyzes in
+  segmented mode (AUTO_SEGMENT_SECONDS) or with streaming extraction
+  (STREAMING_MIN_SECONDS) run through that same path, timed as one
+  "segmented" or "streaming" stage
+
+The service decodes and resamples in one streaming pass; the harness
+decodes at the native rate first and then resamples in one shot (the same
+samples) so the two costs can be told apart. Peak memory is how far a
+stage pushes its worker's peak RSS (Linux /proc VmHWM, see
+proc_memory) above the RSS it started from.
+
+With --baseline, the report is compared against a stored one (written
+with --save-baseline) and the exit status is 1 on a regression: lower
+accuracy (overall or any label), more failed clips, or a stage's p95
+latency or peak memory above the baseline's by more than the tolerance.
+
+Usage: python evaluate.py manifest.csv [--jobs N] [--mode cascade|full] [--report report.json]
+                          [--baseline baseline.json] [--save-baseline baseline.json]
+                          [--latency-tolerance 0.25] [--memory-tolerance 0.25] [--accuracy-tolerance 0]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import problem1_voice_detection as voice_api
+from audio_decode import decode_audio, resample
+from build_feature_store import read_manifest
+from proc_memory import read_status_mb, reset_peak_rss
+
+LABELS = ['AI_GENERATED', 'HUMAN']
+PERCENTILES = [50, 95, 99]
+
+# Latency and memory differences below these never count as regressions
+# (timer noise on sub-millisecond stages, allocator noise on small ones)
+LATENCY_FLOOR_MS = 2.0
+MEMORY_FLOOR_MB = 8.0
+
+class StageProbe:
+    """Wall time and peak-RSS increase of one pipeline stage"""
+
+    def __init__(self, stages):
+        self.stages = stages
+
+    def run(self, name, fn, *args):
+        try:
+            reset_peak_rss()
+            start_mb = read_status_mb('VmRSS')
+        except (OSError, RuntimeError):
+            start_mb = None
+        start = time.perf_counter()
+        value = fn(*args)
+        elapsed = time.perf_counter() - start
+        peak_mb = read_status_mb('VmHWM') - start_mb if start_mb is not None else None
+        self.stages[name] = [elapsed, peak_mb]
+        return value
+
+class TimedFeatureContext(voice_api.FeatureContext):
+    """FeatureContext that times each node it computes, exclusive of the nodes it depends on"""
+
+    def __init__(self, y, sr, probe):
+        super().__init__(y, sr)
+        self.probe = probe
+
+    def get(self, name):
+        if name not in self._values:
+            requires, compute = voice_api.FEATURE_NODES[name]
+            inputs = [self.get(dep) for dep in requires]
+            self._values[name] = self.probe.run(name, compute, self, *inputs)
+        return self._values[name]
+
+def timed_standard_pipeline(audio_data, info, audio_format, sample_rate, mode, language, probe):
+    """The service's whole-clip path, one stage at a time; returns (decision, audio seconds)"""
+    native_sr = info['sample_rate'] if info else voice_api.SAMPLE_RATE
+    y, _ = probe.run('decode', decode_audio, audio_data, native_sr, voice_api.DECODE_BACKEND,
+                     voice_api.RESAMPLE_TYPE, audio_format, sample_rate)
+    y = probe.run('resample', resample, y, native_sr, voice_api.SAMPLE_RATE, voice_api.RESAMPLE_TYPE)
+    audio_seconds = round(len(y) / voice_api.SAMPLE_RATE, 3)
+    if voice_api.VAD_ENABLED:
+        y = probe.run('vad', lambda: voice_api.trim_to_speech(y, voice_api.SAMPLE_RATE, frame_length=voice_api.HOP_LENGTH,
+                                                              top_db=voice_api.VAD_TOP_DB,
+                                                              min_silence=voice_api.VAD_MIN_SILENCE))
+
+    ctx = TimedFeatureContext(y, voice_api.SAMPLE_RATE, probe)
+    decision_start = time.perf_counter()
+    decision = voice_api.classify_context(ctx, mode, language)
+    node_seconds = sum(seconds for name, (seconds, _) in probe.stages.items() if name in voice_api.FEATURE_NODES)
+    probe.stages['decision'] = [max(time.perf_counter() - decision_start - node_seconds, 0.0), None]
+    return decision, audio_seconds
+
+def evaluate_clip(entry, mode=None):
+    """
+    Run one manifest entry through the timed pipeline
+
+    Returns {path, label, language, pipeline, predicted, confidence,
+    audioSeconds, stages: {stage: [seconds, peak MB]}, error}.
+    """
+    file_id, clip, label, language, audio_format, sample_rate = entry
+    result = {'path': file_id, 'label': label, 'language': language, 'pipeline': None, 'predicted': None,
+              'confidence': None, 'audioSeconds': None, 'stages': {}, 'error': None}
+    probe = StageProbe(result['stages'])
+    start = time.perf_counter()
+    try:
+        with open(clip, 'rb') as f:
+            audio_data = f.read()
+        # The service's choice of pipeline (and its rejection of overlong clips)
+        analysis_mode, info = voice_api.inspect_upload(audio_data, None, audio_format, sample_rate)
+        duration = info['duration'] if info else None
+        if analysis_mode == 'segmented' or (duration is not None and duration >= voice_api.STREAMING_MIN_SECONDS):
+            result['pipeline'] = 'segmented' if analysis_mode == 'segmented' else 'streaming'
+            analyze = voice_api.analyze_segmented if analysis_mode == 'segmented' else voice_api.analyze_audio
+            decision = probe.run(result['pipeline'], analyze, audio_data, mode, audio_format, sample_rate, language)
+            result['audioSeconds'] = decision['audioDuration']['received']
+        else:
+            result['pipeline'] = 'standard'
+            decision, result['audioSeconds'] = timed_standard_pipeline(audio_data, info, audio_format, sample_rate,
+                                                                       mode, language, probe)
+        result['predicted'] = decision['classification']
+        result['confidence'] = round(float(decision['confidence']), 4)
+    except Exception as e:
+        result['error'] = str(e)
+    result['stages']['total'] = [time.perf_counter() - start, None]
+    return result
+
+def stage_summary(results):
+    """{stage: {clips, p50Ms, p95Ms, p99Ms, peakMb}} in pipeline order"""
+    order = []
+    for result in results:
+        for name in result['stages']:
+            if name not in order:
+                order.append(name)
+    order = [name for name in order if name not in ('decision', 'total')] + ['decision', 'total']
+
+    summary = {}
+    for name in order:
+        samples = [result['stages'][name] for result in results if name in result['stages']]
+        if not samples:
+            continue
+        milliseconds = np.array([seconds for seconds, _ in samples]) * 1e3
+        peaks = [peak for _, peak in samples if peak is not None]
+        summary[name] = dict(
+            {f'p{q}Ms': round(float(value), 3) for q, value in zip(PERCENTILES, np.percentile(milliseconds, PERCENTILES))},
+            clips=len(samples),
+            peakMb=round(max(peaks), 1) if peaks else None,
+        )
+    return summary
+
+def accuracy_summary(results):
+    """Confusion matrix {true label: {predicted label or ERROR: clips}}, per-label and overall accuracy"""
+    labelled = [result for result in results if result['label'] is not None]
+    confusion = {label: {predicted: 0 for predicted in LABELS + ['ERROR']} for label in LABELS}
+    for result in labelled:
+        confusion[result['label']][result['predicted'] or 'ERROR'] += 1
+    per_label = {}
+    for label in LABELS:
+        clips = sum(confusion[label].values())
+        per_label[label] = {'clips': clips, 'correct': confusion[label][label],
+                            'accuracy': round(confusion[label][label] / clips, 4) if clips else None}
+    correct = sum(confusion[label][label] for label in LABELS)
+    return {
+        'accuracy': round(correct / len(labelled), 4) if labelled else None,
+        'confusion': confusion,
+        'perLabel': per_label,
+    }
+
+def evaluate(manifest, jobs=1, mode=None):
+    """Evaluate a manifest; returns the report dict"""
+    entries = read_manifest(manifest)
+    start = time.perf_counter()
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=voice_api.warm_up_worker) as pool:
+            results = list(pool.map(evaluate_clip, entries, [mode] * len(entries)))
+    else:
+        voice_api.warm_up_worker()
+        results = [evaluate_clip(entry, mode) for entry in entries]
+    wall = time.perf_counter() - start
+
+    report = dict(accuracy_summary(results), stages=stage_summary(results))
+    report.update({
+        'manifest': manifest,
+        'mode': 'model' if voice_api.voice_model is not None else (mode or voice_api.DETECTION_MODE),
+        'clips': len(results),
+        'errors': sum(result['error'] is not None for result in results),
+        'pipelines': {name: sum(result['pipeline'] == name for result in results)
+                      for name in ('standard', 'streaming', 'segmented')},
+        'audioSeconds': round(sum(result['audioSeconds'] or 0 for result in results), 3),
+        'wallSeconds': round(wall, 3),
+        'jobs': jobs,
+        'misclassified': [{'path': result['path'], 'label': result['label'], 'predicted': result['predicted'],
+                           'confidence': result['confidence']}
+                          for result in results if result['label'] and result['predicted'] not in (None, result['label'])],
+        'failed': [{'path': result['path'], 'error': result['error']} for result in results if result['error']],
+    })
+    return report
+
+def find_regressions(report, baseline, latency_tolerance=0.25, memory_tolerance=0.25, accuracy_tolerance=0.0):
+    """Descriptions of everything report does worse than baseline (beyond the tolerances)"""
+    regressions = []
+    if report['accuracy'] is not None and baseline.get('accuracy') is not None \
+            and report['accuracy'] < baseline['accuracy'] - accuracy_tolerance:
+        regressions.append(f"accuracy {report['accuracy']:.4f} < baseline {baseline['accuracy']:.4f}")
+    for label, stats in report['perLabel'].items():
+        before = baseline.get('perLabel', {}).get(label, {}).get('accuracy')
+        if stats['accuracy'] is not None and before is not None and stats['accuracy'] < before - accuracy_tolerance:
+            regressions.append(f"{label} accuracy {stats['accuracy']:.4f} < baseline {before:.4f}")
+    if report['errors'] > baseline.get('errors', 0):
+        regressions.append(f"{report['errors']} failed clips > baseline {baseline.get('errors', 0)}")
+
+    for name, stats in report['stages'].items():
+        before = baseline.get('stages', {}).get(name)
+        if before is None:
+            continue
+        if stats['p95Ms'] > before['p95Ms'] * (1 + latency_tolerance) and stats['p95Ms'] - before['p95Ms'] > LATENCY_FLOOR_MS:
+            regressions.append(f"{name} p95 {stats['p95Ms']:.1f} ms > baseline {before['p95Ms']:.1f} ms")
+        if stats['peakMb'] is not None and before.get('peakMb') is not None \
+                and stats['peakMb'] > before['peakMb'] * (1 + memory_tolerance) \
+                and stats['peakMb'] - before['peakMb'] > MEMORY_FLOOR_MB:
+            regressions.append(f"{name} peak memory {stats['peakMb']:.1f} MB > baseline {before['peakMb']:.1f} MB")
+    return regressions
+
+def print_report(report):
+    print(f"{report['clips']} clips ({report['audioSeconds']:.1f} s of audio) in {report['wallSeconds']:.1f} s "
+          f"on {report['jobs']} worker(s), mode {report['mode']}, {report['errors']} failed")
+    print()
+    print(f"{'true / predicted':>18}" + ''.join(f"{label:>14}" for label in LABELS + ['ERROR']))
+    for label in LABELS:
+        print(f"{label:>18}" + ''.join(f"{report['confusion'][label][predicted]:>14}" for predicted in LABELS + ['ERROR']))
+    print()
+    for label, stats in report['perLabel'].items():
+        accuracy = f"{stats['accuracy']:.1%}" if stats['accuracy'] is not None else 'n/a'
+        print(f"  {label}: {stats['correct']}/{stats['clips']} correct ({accuracy})")
+    if report['accuracy'] is not None:
+        print(f"  overall accuracy: {report['accuracy']:.1%}")
+    for clip in report['misclassified']:
+        print(f"  misclassified: {clip['path']} ({clip['label']} -> {clip['predicted']})")
+    for clip in report['failed']:
+        print(f"  failed: {clip['path']}: {clip['error']}")
+    print()
+    print(f"{'stage':<24}{'clips':>6}{'p50 (ms)':>11}{'p95 (ms)':>11}{'p99 (ms)':>11}{'peak (MB)':>11}")
+    for name, stats in report['stages'].items():
+        peak = f"{stats['peakMb']:.1f}" if stats['peakMb'] is not None else '-'
+        print(f"{name:<24}{stats['clips']:>6}{stats['p50Ms']:>11.2f}{stats['p95Ms']:>11.2f}{stats['p99Ms']:>11.2f}{peak:>11}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate detection accuracy and per-stage latency on a labelled manifest")
+    parser.add_argument('manifest', help="CSV with path,label[,language,audioFormat,sampleRate] columns")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument('--mode', choices=['cascade', 'full'], help="Detection mode (default DETECTION_MODE)")
+    parser.add_argument('--report', help="Write the report to this JSON file")
+    parser.add_argument('--baseline', help="Stored report to check for regressions against (exit 1 on any)")
+    parser.add_argument('--save-baseline', help="Store this run's report as a baseline")
+    parser.add_argument('--latency-tolerance', type=float, default=0.25, help="Allowed relative p95 increase per stage")
+    parser.add_argument('--memory-tolerance', type=float, default=0.25, help="Allowed relative peak-memory increase per stage")
+    parser.add_argument('--accuracy-tolerance', type=float, default=0.0, help="Allowed absolute accuracy drop")
+    args = parser.parse_args(argv)
+
+    report = evaluate(args.manifest, args.jobs, args.mode)
+    print_report(report)
+    for path in (args.report, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(report, baseline, args.latency_tolerance, args.memory_tolerance,
+                                       args.accuracy_tolerance)
+        print()
+        if regressions:
+            print(f"REGRESSIONS against {args.baseline}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
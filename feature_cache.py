@@ -0,0 +1,126 @@
+"""
+Content-addressed cache for voice-detection results
+Keyed by a SHA-256 of the decoded audio bytes, so retries and forwarded
+copies of the same clip skip decoding and feature extraction entirely.
+
+Two tiers:
+- In-memory LRU (per process, bounded by entry count)
+- Optional on-disk JSON store, shared by every gunicorn worker pointing
+  at the same directory and surviving restarts
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from feature_vector import FeatureVector
+
+class FeatureCache:
+    """Two-tier (memory LRU + optional disk) cache of features and classifications"""
+
+    def __init__(self, max_entries=256, cache_dir=None, namespace='default'):
+        self.max_entries = max_entries
+        self.cache_dir = os.path.join(cache_dir, namespace) if cache_dir else None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key_for(audio_data):
+        """Cache key for a clip: SHA-256 of its decoded bytes"""
+        return hashlib.sha256(audio_data).hexdigest()
+
+    def get(self, key):
+        """Return the cached entry for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return entry
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key, result):
+        """
+        Store a detection result (features and final classification)
+        
+        result needs features, classification, confidence and explanation;
+        other keys (e.g. decisionTier) are kept as-is. Features are held as a
+        FeatureVector (a dict on disk). Returns the stored entry.
+        """
+        entry = dict(result)
+        entry["features"] = FeatureVector.from_mapping(result["features"])
+        entry["confidence"] = float(result["confidence"])
+        with self._lock:
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+        return entry
+
+    def stats(self):
+        """Hit/miss counters for the /health endpoint"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memoryHits": self.memory_hits,
+                "diskHits": self.disk_hits,
+                "misses": self.misses,
+                "hitRate": round(hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "diskEnabled": self.cache_dir is not None
+            }
+
+    def _remember(self, key, entry):
+        """Insert into the memory tier, evicting least recently used entries (lock held)"""
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.json')
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._disk_path(key), 'r') as f:
+                entry = json.load(f)
+            entry["features"] = FeatureVector.from_mapping(entry["features"])
+            return entry
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_disk(self, key, entry):
+        """Atomic write (temp file + rename) so concurrent workers never see partial files"""
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(dict(entry, features=entry["features"].to_dict()), f)
+            os.replace(tmp_path, path)
+        except OSError:
+            # The disk tier is best-effort; the memory tier still holds the entry
+            pass
@@ -0,0 +1,257 @@
+"""
+Memory-mapped feature store for labelled audio corpora
+Extracted features are kept on disk as flat column files, so analysis and
+calibration tools load a whole corpus without decoding any audio:
+
+- features.f32   (rows, F) float32, row-major
+- labels.i1      int8 per row: 1 AI_GENERATED, 0 HUMAN, -1 unlabelled
+- language.i2    int16 per row: index into meta.json's languages, -1 unknown
+- file_ids.bin   the UTF-8 file IDs back to back, with file_ids.end (int64
+                 end offset of each)
+- meta.json      feature names, extractor config and the committed row count
+
+Loading maps the columns read-only (np.memmap), so a million rows open in
+milliseconds and only the pages actually read are ever loaded.
+
+Appends write every column first and then commit the new row count to
+meta.json (temp file + rename); a crash mid-append leaves at most an
+uncommitted tail, which readers ignore and the next append overwrites.
+One writer at a time.
+
+Each extractor configuration (see problem1_voice_detection.feature_config_hash)
+gets its own version directory under the store root. Features extracted
+under any other configuration are stale: open_store reports them and
+refuses to serve them as current.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from feature_vector import FeatureMatrix, FeatureVector, feature_schema
+
+STORE_FORMAT_VERSION = 1
+
+LABEL_CODES = {'HUMAN': 0, 'AI_GENERATED': 1}
+
+class StaleFeatureStore(Exception):
+    """The store only holds features extracted under another extractor configuration"""
+
+class FileIds:
+    """Read-only sequence of a store's file IDs, decoded on access"""
+
+    def __init__(self, data, ends):
+        self.data = data
+        self.ends = ends
+
+    def __len__(self):
+        return len(self.ends)
+
+    def __getitem__(self, row):
+        start = int(self.ends[row - 1]) if row > 0 else 0
+        return bytes(self.data[start:int(self.ends[row])]).decode('utf-8')
+
+    def __iter__(self):
+        data = bytes(self.data)
+        ends = self.ends.tolist()
+        return (data[start:end].decode('utf-8') for start, end in zip([0] + ends[:-1], ends))
+
+    def tolist(self):
+        return list(self)
+
+class StoredFeatures:
+    """
+    A loaded store: matrix (FeatureMatrix over the mapped features),
+    file_ids, labels (int8) and language codes (int16) with their names
+    """
+
+    def __init__(self, matrix, file_ids, labels, language_codes, languages, config_hash):
+        self.matrix = matrix
+        self.file_ids = file_ids
+        self.labels = labels
+        self.language_codes = language_codes
+        self.languages = languages
+        self.config_hash = config_hash
+
+    def __len__(self):
+        return len(self.labels)
+
+    def language_mask(self, language):
+        """Boolean row mask of one language"""
+        if language not in self.languages:
+            return np.zeros(len(self), dtype=bool)
+        return self.language_codes == self.languages.index(language)
+
+class FeatureStore:
+    """One version (extractor configuration) of a feature store"""
+
+    def __init__(self, root, config_hash, feature_names=None, config=None):
+        self.root = root
+        self.config_hash = config_hash
+        self.path = os.path.join(root, config_hash)
+        self.meta = self._read_meta()
+        if self.meta is None:
+            if feature_names is None:
+                raise ValueError(f"No feature store at {self.path}; feature_names are needed to create one")
+            self.meta = {
+                'format_version': STORE_FORMAT_VERSION,
+                'config_hash': config_hash,
+                'config': config,
+                'feature_names': list(feature_names),
+                'languages': [],
+                'rows': 0,
+            }
+        elif self.meta.get('format_version') != STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported feature store format: {self.meta.get('format_version')}")
+        elif feature_names is not None and list(feature_names) != self.meta['feature_names']:
+            raise ValueError("feature_names differ from the store's; use a new store root")
+        self.schema = feature_schema(self.meta['feature_names'])
+
+    @property
+    def rows(self):
+        return self.meta['rows']
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _read_meta(self):
+        try:
+            with open(self._file('meta.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _commit(self, meta):
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(meta, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._file('meta.json'))
+        self.meta = meta
+
+    def append(self, features, file_ids, labels=None, languages=None):
+        """
+        Append rows: features is a FeatureMatrix, a sequence of FeatureVectors
+        / feature mappings, or an (n, F) array in the store's column order.
+        labels are 'AI_GENERATED'/'HUMAN'/None (or 1/0/-1), languages names
+        or None. Returns the new row count.
+        """
+        if isinstance(features, FeatureMatrix):
+            values = features.select(self.schema.names).values
+        elif isinstance(features, np.ndarray):
+            values = np.asarray(features, dtype=np.float32)
+        else:
+            values = FeatureMatrix.stack([FeatureVector.from_mapping(vector) for vector in features], self.schema.names).values
+        n = len(file_ids)
+        if values.shape != (n, len(self.schema)):
+            raise ValueError(f"Expected ({n}, {len(self.schema)}) feature values, got {values.shape}")
+
+        label_codes = np.array([label_code(label) for label in (labels if labels is not None else [None] * n)], dtype=np.int8)
+        meta = dict(self.meta, languages=list(self.meta['languages']))
+        codes = []
+        for language in (languages if languages is not None else [None] * n):
+            if language is None:
+                codes.append(-1)
+                continue
+            if language not in meta['languages']:
+                meta['languages'].append(language)
+            codes.append(meta['languages'].index(language))
+        encoded = [file_id.encode('utf-8') for file_id in file_ids]
+
+        os.makedirs(self.path, exist_ok=True)
+        rows = self.rows
+        id_bytes = self._committed_id_bytes()
+        ends = id_bytes + np.cumsum([len(data) for data in encoded], dtype=np.int64)
+        self._write_tail('features.f32', rows * len(self.schema) * 4, np.ascontiguousarray(values, dtype=np.float32).tobytes())
+        self._write_tail('labels.i1', rows, label_codes.tobytes())
+        self._write_tail('language.i2', rows * 2, np.array(codes, dtype=np.int16).tobytes())
+        self._write_tail('file_ids.end', rows * 8, ends.astype(np.int64).tobytes())
+        self._write_tail('file_ids.bin', id_bytes, b''.join(encoded))
+        meta['rows'] = rows + n
+        self._commit(meta)
+        return meta['rows']
+
+    def _committed_id_bytes(self):
+        if not self.rows:
+            return 0
+        return int(np.fromfile(self._file('file_ids.end'), dtype=np.int64, count=1, offset=(self.rows - 1) * 8)[0])
+
+    def _write_tail(self, name, committed_bytes, data):
+        """Write data after the committed part of a column file, dropping any uncommitted tail"""
+        path = self._file(name)
+        with open(path, 'r+b' if os.path.exists(path) else 'w+b') as f:
+            f.truncate(committed_bytes)
+            f.seek(committed_bytes)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _map(self, name, dtype, shape):
+        if not shape[0]:
+            return np.zeros(shape, dtype=dtype)
+        return np.asarray(np.memmap(self._file(name), dtype=dtype, mode='r', shape=shape))
+
+    def load(self):
+        """StoredFeatures over the committed rows, memory-mapped read-only"""
+        rows, width = self.rows, len(self.schema)
+        ends = self._map('file_ids.end', np.int64, (rows,))
+        id_data = self._map('file_ids.bin', np.uint8, (int(ends[-1]) if rows else 0,))
+        return StoredFeatures(
+            FeatureMatrix(self.schema, self._map('features.f32', np.float32, (rows, width))),
+            FileIds(id_data, ends),
+            self._map('labels.i1', np.int8, (rows,)),
+            self._map('language.i2', np.int16, (rows,)),
+            list(self.meta['languages']),
+            self.config_hash,
+        )
+
+    def stale_versions(self):
+        """{config hash: committed rows} of the other (stale) versions under the root"""
+        return {name: rows for name, rows in store_versions(self.root).items() if name != self.config_hash}
+
+    def prune_stale(self):
+        """Delete every stale version; returns the hashes removed"""
+        stale = list(self.stale_versions())
+        for name in stale:
+            shutil.rmtree(os.path.join(self.root, name))
+        return stale
+
+def label_code(label):
+    """int8 code of a label: 1 AI_GENERATED, 0 HUMAN, -1 unlabelled"""
+    if label is None or label == -1:
+        return -1
+    if label in (0, 1):
+        return int(label)
+    return LABEL_CODES[str(label).upper()]
+
+def store_versions(root):
+    """{config hash: committed rows} of every version under a store root"""
+    versions = {}
+    if not os.path.isdir(root):
+        return versions
+    for name in sorted(os.listdir(root)):
+        try:
+            with open(os.path.join(root, name, 'meta.json')) as f:
+                versions[name] = json.load(f)['rows']
+        except (OSError, ValueError, KeyError):
+            continue
+    return versions
+
+def open_store(root, config_hash, feature_names=None, config=None):
+    """
+    The current version of a store
+
+    Without feature_names (reading) the version must exist: raises
+    StaleFeatureStore when the root only has rows from other extractor
+    configurations. With feature_names the version is created if needed.
+    """
+    versions = store_versions(root)
+    if feature_names is None and not versions.get(config_hash):
+        stale = ', '.join(f"{name} ({rows} rows)" for name, rows in versions.items() if name != config_hash)
+        if stale:
+            raise StaleFeatureStore(f"{root} only has features from other extractor configurations: {stale}; "
+                                    f"rebuild it for {config_hash}")
+        raise ValueError(f"No features for extractor configuration {config_hash} in {root}")
+    return FeatureStore(root, config_hash, feature_names, config)
@@ -0,0 +1,175 @@
+"""
+Array-backed feature vectors
+A clip's features as one float32 array under a fixed FeatureSchema (the
+ordered feature names and their name -> column index map) instead of a
+dict of Python floats:
+
+- FeatureVector reads like the dict it replaces - a read-only Mapping, so
+  vector['pitch_std'], .get(), .items() and dict(vector) keep working in
+  the analysis scripts - while .values is the array batch code uses.
+- FeatureMatrix holds many clips under one schema as a single contiguous
+  (n, F) float32 array; its rows are FeatureVector views, not copies.
+
+Schemas are interned (feature_schema), so vectors computed for the same
+feature list share one schema object and stack without name lookups.
+"""
+
+from collections.abc import Mapping
+from functools import lru_cache
+import numpy as np
+
+class FeatureSchema:
+    """Ordered feature names with their column indices"""
+
+    __slots__ = ('names', 'index')
+
+    def __init__(self, names):
+        self.names = tuple(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        if len(self.index) != len(self.names):
+            raise ValueError("Feature names must be unique")
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __eq__(self, other):
+        return isinstance(other, FeatureSchema) and self.names == other.names
+
+    def __hash__(self):
+        return hash(self.names)
+
+    def __reduce__(self):
+        # Unpickling (pool results, caches) interns the schema again
+        return feature_schema, (self.names,)
+
+    def __repr__(self):
+        return f"FeatureSchema({len(self.names)} features)"
+
+    def columns(self, names):
+        """Column indices of names, for projecting arrays onto another schema"""
+        return np.array([self.index[name] for name in names], dtype=np.intp)
+
+    def vector(self, features):
+        """FeatureVector of this schema from any features mapping"""
+        return FeatureVector(self, [features[name] for name in self.names])
+
+@lru_cache(maxsize=256)
+def _interned_schema(names):
+    return FeatureSchema(names)
+
+def feature_schema(names):
+    """The shared FeatureSchema for a sequence of feature names"""
+    return _interned_schema(tuple(names))
+
+class FeatureVector(Mapping):
+    """
+    One clip's features: a float32 array under a FeatureSchema
+
+    Reads as a Mapping of feature name -> float. Values are stored (and
+    therefore returned) at float32 precision.
+    """
+
+    __slots__ = ('schema', 'values')
+
+    def __init__(self, schema, values):
+        values = np.asarray(values, dtype=np.float32)
+        if values.shape != (len(schema),):
+            raise ValueError(f"Expected {len(schema)} feature values, got shape {values.shape}")
+        self.schema = schema
+        self.values = values
+
+    @classmethod
+    def from_mapping(cls, features, names=None):
+        """Vector over names (all of features' keys when None); vectors are returned as-is"""
+        if isinstance(features, FeatureVector) and names is None:
+            return features
+        return feature_schema(list(features) if names is None else names).vector(features)
+
+    def __getitem__(self, name):
+        return float(self.values[self.schema.index[name]])
+
+    def __contains__(self, name):
+        return name in self.schema.index
+
+    def __iter__(self):
+        return iter(self.schema.names)
+
+    def __len__(self):
+        return len(self.schema.names)
+
+    def __reduce__(self):
+        return FeatureVector, (self.schema, self.values)
+
+    def __repr__(self):
+        return f"FeatureVector({self.to_dict()})"
+
+    def select(self, names):
+        """This vector's values for names, in that order (a new vector)"""
+        if tuple(names) == self.schema.names:
+            return self
+        return FeatureVector(feature_schema(names), self.values[self.schema.columns(names)])
+
+    def to_dict(self):
+        """Plain {name: float} dict (e.g. for JSON)"""
+        return dict(zip(self.schema.names, self.values.tolist()))
+
+class FeatureMatrix:
+    """Features of many clips under one schema: a contiguous (n, F) float32 array"""
+
+    __slots__ = ('schema', 'values')
+
+    def __init__(self, schema, values):
+        values = np.asarray(values, dtype=np.float32)
+        if values.ndim != 2 or values.shape[1] != len(schema):
+            raise ValueError(f"Expected an (n, {len(schema)}) matrix, got shape {values.shape}")
+        self.schema = schema
+        self.values = values
+
+    @classmethod
+    def stack(cls, vectors, names=None):
+        """
+        Stack FeatureVectors (or feature mappings) into one matrix
+
+        The schema is names, else the first vector's. Vectors already under
+        that schema are copied in as arrays; others are projected first.
+        """
+        vectors = list(vectors)
+        if names is not None:
+            schema = feature_schema(names)
+        elif vectors:
+            schema = FeatureVector.from_mapping(vectors[0]).schema
+        else:
+            raise ValueError("Cannot infer the schema of an empty stack; pass names")
+        if not vectors:
+            return cls(schema, np.empty((0, len(schema)), dtype=np.float32))
+        rows = [
+            vector.values if isinstance(vector, FeatureVector) and vector.schema is schema else schema.vector(vector).values
+            for vector in vectors
+        ]
+        return cls(schema, np.stack(rows))
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, row):
+        """Row view as a FeatureVector (shares this matrix's memory)"""
+        return FeatureVector(self.schema, self.values[row])
+
+    def __iter__(self):
+        return (FeatureVector(self.schema, values) for values in self.values)
+
+    def column(self, name):
+        """One feature across all clips (a view)"""
+        return self.values[:, self.schema.index[name]]
+
+    def select(self, names):
+        """Matrix over names, in that order"""
+        if tuple(names) == self.schema.names:
+            return self
+        return FeatureMatrix(feature_schema(names), self.values[:, self.schema.columns(names)])
@@ -8,6 +8,32 @@ import numpy as np
 import soundfile as sf
 from scipy.io import wavfile
 
+def synthetic_voice(kind='human', duration=3.0, sr=22050, seed=0):
+    """
+    Deterministic voice-like float32 signal of duration seconds at sr
+    
+    'human' glides its pitch (100-200 Hz), varies its loudness and adds
+    breath noise; 'ai' holds a steady pitch and level. The same arguments
+    always give the same samples.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(sr * duration)) / sr
+    if kind == 'human':
+        pitch = 150 + 50 * np.sin(2 * np.pi * 0.7 * t) + 15 * np.sin(2 * np.pi * 3.1 * t)
+        envelope = 0.5 + 0.4 * np.sin(2 * np.pi * 3 * t)
+        noise = 0.05
+    elif kind == 'ai':
+        pitch = np.full(len(t), 120.0)
+        envelope = np.full(len(t), 0.7)
+        noise = 0.0
+    else:
+        raise ValueError(f"Unknown voice kind: {kind}")
+    phase = 2 * np.pi * np.cumsum(pitch) / sr
+    # Fundamental plus two harmonics, so there is a spectrum to analyze
+    signal = np.sin(phase) + 0.5 * np.sin(2 * phase) + 0.25 * np.sin(3 * phase)
+    signal = envelope * signal / 1.75 + noise * rng.standard_normal(len(t))
+    return (0.8 * signal / max(np.max(np.abs(signal)), 1e-9)).astype(np.float32)
+
 def generate_test_audio():
     """Generate test audio files"""
     
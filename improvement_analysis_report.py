@@ -7,13 +7,13 @@ Analyzes RMS variance and other metrics to identify detection gaps
 import os
 import numpy as np
 import librosa
-from problem1_voice_detection import extract_audio_features, analyze_voice_patterns
+from problem1_voice_detection import load_audio_file, extract_signal_features, analyze_voice_patterns
 
 def analyze_audio_file(filepath):
     """Analyze audio file and return detailed metrics"""
     try:
-        y, sr = librosa.load(filepath, sr=None)
-        features = extract_audio_features(y, sr)
+        y, sr = load_audio_file(filepath)
+        features = extract_signal_features(y, sr)
         result = analyze_voice_patterns(features)
         
         # Add detailed RMS analysis
@@ -0,0 +1,230 @@
+"""
+MP3 header-only inspection
+Reads MPEG audio frame headers and the ID3v2, Xing/Info, VBRI and LAME
+tags straight from the bytes, without decoding: where frames start and
+how long they are (to cut live streams on frame boundaries), and the
+clip's duration, bitrate, sample rate and encoder (to reject or route a
+request before the expensive decode). Inspection touches a few KB at most
+and takes microseconds.
+"""
+
+import struct
+
+# Bitrates (kbps) by MPEG version family, Layer III only
+BITRATES_MPEG1 = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+BITRATES_MPEG2 = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+
+# Sample rates by version id (3: MPEG-1, 2: MPEG-2, 0: MPEG-2.5)
+SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+def parse_frame_header(data, offset=0):
+    """
+    The Layer III frame header at data[offset:offset + 4] as a dict, or None
+
+    Keys: version (1, 2 or 2.5), bitrate (kbps), sample_rate, channels,
+    samples (per frame), length (bytes, padding included).
+    """
+    if offset + 4 > len(data):
+        return None
+    header = int.from_bytes(data[offset:offset + 4], 'big')
+    if header >> 21 != 0x7ff:
+        return None
+    version_id = (header >> 19) & 3
+    layer = (header >> 17) & 3
+    bitrate_index = (header >> 12) & 15
+    rate_index = (header >> 10) & 3
+    if version_id == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    mpeg1 = version_id == 3
+    sample_rate = SAMPLE_RATES[version_id][rate_index]
+    bitrate = (BITRATES_MPEG1 if mpeg1 else BITRATES_MPEG2)[bitrate_index]
+    return {
+        'version': {3: 1, 2: 2, 0: 2.5}[version_id],
+        'bitrate': bitrate,
+        'sample_rate': sample_rate,
+        'channels': 1 if (header >> 6) & 3 == 3 else 2,
+        'samples': 1152 if mpeg1 else 576,
+        'length': (144 if mpeg1 else 72) * bitrate * 1000 // sample_rate + ((header >> 9) & 1),
+    }
+
+def id3v2_size(data):
+    """Total size of a leading ID3v2 tag (header included), 0 without one, None if data is too short to tell"""
+    if len(data) < 10:
+        return None if b'ID3'.startswith(bytes(data[:3])) else 0
+    if data[:3] != b'ID3':
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7f)
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+def iter_frames(data, offset=0):
+    """
+    (offset, header) for every complete frame in data from offset on
+
+    Bytes that do not start a valid header are skipped (resync). A frame
+    cut off by the end of data is not yielded.
+    """
+    while offset + 4 <= len(data):
+        header = parse_frame_header(data, offset)
+        if header is None:
+            offset += 1
+            continue
+        if offset + header['length'] > len(data):
+            return
+        yield offset, header
+        offset += header['length']
+
+# Side-information size (bytes after the 4-byte header) by (MPEG-1, mono)
+SIDE_INFO_SIZE = {(True, False): 32, (True, True): 17, (False, False): 17, (False, True): 9}
+
+# Leading magic of containers that are never MP3 (WAV, FLAC, Ogg, AIFF, Matroska);
+# their sample data can contain byte runs that look like frame headers
+OTHER_CONTAINERS = (b'RIFF', b'fLaC', b'OggS', b'FORM', b'\x1aE\xdf\xa3')
+
+# ID3v2 text frames that name the encoder (v2.3/2.4 ids, then v2.2 ids)
+ID3_ENCODER_FRAMES = {'TSSE': 'encoderSettings', 'TENC': 'encodedBy', 'TSS': 'encoderSettings', 'TEN': 'encodedBy'}
+
+def find_first_frame(data, offset=0, limit=64 * 1024):
+    """
+    Offset and header of the first frame at or after offset, or (None, None)
+
+    A sync word only counts when the frame it announces is followed by
+    another valid header (or the end of data), which rules out sync
+    patterns inside leftover tag bytes. Searches at most limit bytes.
+    """
+    end = min(len(data) - 3, offset + limit)
+    while offset < end:
+        header = parse_frame_header(data, offset)
+        if header is not None:
+            following = offset + header['length']
+            if following + 4 > len(data) or parse_frame_header(data, following) is not None:
+                return offset, header
+        offset += 1
+    return None, None
+
+def read_id3v2_text(data):
+    """Encoder-related text frames of a leading ID3v2 tag as {field: text}"""
+    size = id3v2_size(data)
+    if not size:
+        return {}
+    major = data[3]
+    id_length, header_length = (3, 6) if major == 2 else (4, 10)
+    position, end = 10, min(size, len(data))
+    if major >= 3 and data[5] & 0x40:
+        # Extended header (a tag cut off inside it has no readable frames)
+        if len(data) < 14:
+            return {}
+        extended = struct.unpack('>I', data[10:14])[0]
+        position += (sum((b & 0x7f) << (7 * (3 - i)) for i, b in enumerate(data[10:14])) if major == 4 else extended + 4)
+
+    fields = {}
+    while position + header_length <= end:
+        frame_id = data[position:position + id_length].decode('latin-1')
+        if not frame_id.strip('\0'):
+            break
+        raw_size = data[position + id_length:position + header_length - (2 if major >= 3 else 0)]
+        if major == 4:
+            frame_size = sum((b & 0x7f) << (7 * (len(raw_size) - 1 - i)) for i, b in enumerate(raw_size))
+        else:
+            frame_size = int.from_bytes(raw_size, 'big')
+        body = data[position + header_length:position + header_length + frame_size]
+        if frame_id in ID3_ENCODER_FRAMES and body:
+            fields[ID3_ENCODER_FRAMES[frame_id]] = decode_id3_text(body)
+        position += header_length + frame_size
+    return fields
+
+def decode_id3_text(body):
+    encoding = {0: 'latin-1', 1: 'utf-16', 2: 'utf-16-be', 3: 'utf-8'}.get(body[0], 'latin-1')
+    return body[1:].decode(encoding, 'replace').strip('\0').strip()
+
+def read_vbr_header(data, offset, header):
+    """
+    Xing/Info (LAME) or VBRI header in the first frame, as a dict, or None
+
+    Keys: type, frames, bytes, and for LAME tags encoder, delay, padding.
+    A header cut off by the end of data counts as absent.
+    """
+    mpeg1 = header['version'] == 1
+    xing = offset + 4 + SIDE_INFO_SIZE[(mpeg1, header['channels'] == 1)]
+    tag = data[xing:xing + 4]
+    if tag in (b'Xing', b'Info'):
+        if xing + 8 > len(data):
+            return None
+        flags = struct.unpack('>I', data[xing + 4:xing + 8])[0]
+        position = xing + 8
+        result = {'type': tag.decode('ascii'), 'frames': None, 'bytes': None}
+        for flag, key in ((1, 'frames'), (2, 'bytes')):
+            if flags & flag:
+                if position + 4 > len(data):
+                    return None
+                result[key] = struct.unpack('>I', data[position:position + 4])[0]
+                position += 4
+        position += (100 if flags & 4 else 0) + (4 if flags & 8 else 0)
+        encoder = data[position:position + 9]
+        if encoder[:4] in (b'LAME', b'Lavf', b'Lavc', b'L3.9', b'GOGO'):
+            result['encoder'] = encoder.decode('latin-1').strip('\0 ').strip()
+            delay_padding = data[position + 21:position + 24]
+            if len(delay_padding) == 3:
+                result['delay'] = (delay_padding[0] << 4) | (delay_padding[1] >> 4)
+                result['padding'] = ((delay_padding[1] & 0x0f) << 8) | delay_padding[2]
+        return result
+
+    vbri = offset + 4 + 32
+    if data[vbri:vbri + 4] == b'VBRI' and vbri + 18 <= len(data):
+        total_bytes, frames = struct.unpack('>II', data[vbri + 10:vbri + 18])
+        return {'type': 'VBRI', 'frames': frames, 'bytes': total_bytes}
+    return None
+
+def inspect_mp3(data):
+    """
+    Duration, bitrate and encoder of an MP3 from its headers, or None if it is not one
+
+    Returns a dict: duration (seconds), bitrate (kbps, average for VBR),
+    sample_rate, channels, version, vbr, frames (exact from a Xing/VBRI
+    header, else estimated), durationSource ('xing', 'vbri' or 'cbr'),
+    encoder (LAME tag or ID3 encoder field, None when absent) and the
+    ID3 encoder fields. Without a VBR header the duration assumes constant
+    bitrate, the usual estimate for CBR files.
+    """
+    if data[:4] in OTHER_CONTAINERS:
+        return None
+    audio_start = id3v2_size(data) or 0
+    offset, header = find_first_frame(data, audio_start)
+    if header is None:
+        return None
+
+    audio_end = len(data) - (128 if data[-128:-125] == b'TAG' else 0)
+    spf, sample_rate = header['samples'], header['sample_rate']
+    vbr_header = read_vbr_header(data, offset, header)
+    id3_fields = read_id3v2_text(data)
+
+    if vbr_header and vbr_header['frames']:
+        frames = vbr_header['frames']
+        samples = frames * spf - vbr_header.get('delay', 0) - vbr_header.get('padding', 0)
+        duration = max(samples, 0) / sample_rate
+        audio_bytes = vbr_header['bytes'] or (audio_end - offset)
+        bitrate = audio_bytes * 8 / (frames * spf / sample_rate) / 1000
+        source = 'vbri' if vbr_header['type'] == 'VBRI' else 'xing'
+    else:
+        audio_bytes = audio_end - offset
+        bitrate = header['bitrate']
+        duration = audio_bytes * 8 / (bitrate * 1000)
+        frames = int(round(duration * sample_rate / spf))
+        source = 'cbr'
+
+    encoder = (vbr_header or {}).get('encoder') or id3_fields.get('encoderSettings') or id3_fields.get('encodedBy')
+    return {
+        'duration': duration,
+        'bitrate': round(bitrate, 1),
+        'sample_rate': sample_rate,
+        'channels': header['channels'],
+        'version': header['version'],
+        'vbr': bool(vbr_header) and vbr_header['type'] in ('Xing', 'VBRI'),
+        'frames': frames,
+        'durationSource': source,
+        'encoder': encoder,
+        'id3': id3_fields,
+    }
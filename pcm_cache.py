@@ -0,0 +1,125 @@
+"""
+On-disk cache of decoded PCM for offline experiments
+Analysis scripts, training and calibration runs decode the same corpus
+over and over; most of their wall-clock time goes to MP3 decoding and
+resampling. PCMCache keeps each decoded, resampled mono float32 signal as
+a .npy file and hands it back memory-mapped, so a repeated run opens its
+audio without decoding it again (and only pages in what it reads).
+
+Entries are keyed by a SHA-256 of the source bytes plus everything that
+changes the samples: target rate, decode backend, resampler, container
+format and declared PCM rate. Writes are atomic (temp file + rename), so
+concurrent processes sharing a directory never see partial files.
+
+The directory is capped at max_bytes. Its size is tracked in memory (one
+directory walk at construction, plus the bytes of each write); only when
+a write takes it over the cap is the directory walked, deleting the least
+recently used entries (by mtime, refreshed on every hit) down to
+EVICT_FRACTION of the cap, so a full cache does not walk on every miss.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+from audio_decode import DEFAULT_RES_TYPE, decode_audio
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+EVICT_FRACTION = 0.9
+
+class PCMCache:
+    """Memory-mapped .npy cache of decoded signals, LRU-evicted to a size cap"""
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._bytes = self.size()
+
+    @staticmethod
+    def key_for(audio_data, sr, backend='auto', res_type=DEFAULT_RES_TYPE, audio_format='mp3', sample_rate=None):
+        """Cache key: SHA-256 of the source bytes and the decode settings"""
+        digest = hashlib.sha256(audio_data)
+        digest.update(json.dumps([sr, backend, res_type, audio_format, sample_rate]).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.npy')
+
+    def load(self, audio_data, sr, backend='auto', res_type=DEFAULT_RES_TYPE, audio_format='mp3', sample_rate=None):
+        """
+        Decoded signal of audio bytes at sr, as decode_audio returns it
+
+        Returns (y, sr) with y a read-only memory map of the cached samples;
+        decodes and stores them on a miss.
+        """
+        path = self._path(self.key_for(audio_data, sr, backend, res_type, audio_format, sample_rate))
+        try:
+            y = np.load(path, mmap_mode='r')
+            os.utime(path)
+            self.hits += 1
+            return y, sr
+        except (OSError, ValueError):
+            pass
+
+        self.misses += 1
+        y, _ = decode_audio(audio_data, sr, backend=backend, res_type=res_type,
+                            audio_format=audio_format, sample_rate=sample_rate)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, np.asarray(y, dtype=np.float32))
+            os.replace(tmp_path, path)
+            self._bytes += os.path.getsize(path)
+        except OSError:
+            # Best-effort: the decoded signal is still returned
+            return y, sr
+        if self._bytes > self.max_bytes:
+            self.evict(keep=path, target=int(self.max_bytes * EVICT_FRACTION))
+        return np.load(path, mmap_mode='r'), sr
+
+    def entries(self):
+        """[(last use, bytes, path)] of every cached signal, least recently used first"""
+        found = []
+        for folder, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if not name.endswith('.npy'):
+                    continue
+                path = os.path.join(folder, name)
+                try:
+                    info = os.stat(path)
+                except OSError:
+                    continue
+                found.append((info.st_mtime, info.st_size, path))
+        return sorted(found)
+
+    def size(self):
+        """Bytes held by the cache"""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep=None, target=None):
+        """Delete least recently used entries until the cache fits target (max_bytes) bytes; returns the bytes freed"""
+        target = self.max_bytes if target is None else target
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for _, size, path in entries:
+            if total - freed <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            freed += size
+        # Also picks up what other processes sharing the directory wrote
+        self._bytes = total - freed
+        return freed
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'bytes': self.size(), 'maxBytes': self.max_bytes}
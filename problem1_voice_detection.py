@@ -4,15 +4,31 @@ Problem Statement 1: Detects AI-generated vs Human voices across 5 languages
 (Tamil, English, Hindi, Malayalam, Telugu)
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from functools import wraps
-import base64
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import binascii
+import hashlib
 import io
+import json
+import multiprocessing
 import os
+import threading
+import time
 import librosa
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler
+import soundfile as sf
+from feature_cache import FeatureCache
+from pcm_cache import PCMCache
+from feature_vector import FeatureVector, feature_schema
+from running_stats import RunningStats
+from decision_rules import load_rules
+from voice_model import load_model
+from audio_decode import (DEFAULT_RES_TYPE, DecodeError, StreamDecoder, decode_audio, inspect_audio, iter_decode, iter_windows,
+                          probe_duration, resolve_backend)
+from voice_activity import (DEFAULT_MIN_SILENCE, DEFAULT_TOP_DB, covers_everything, iter_speech, speech_regions,
+                            stream_speech_regions, trim_to_speech)
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -22,9 +38,224 @@ app = Flask(__name__)
 API_KEY = os.getenv('API_KEY', 'sk_test_123456789')
 SUPPORTED_LANGUAGES = ['Tamil', 'English', 'Hindi', 'Malayalam', 'Telugu']
 
-# Initialize model and scaler (in production, load pre-trained models)
-model = None
-scaler = None
+# Analysis parameters (librosa defaults, shared by every spectral feature)
+SAMPLE_RATE = 22050
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MFCC = 20
+
+# Block sizes for the bounded-memory stages (STFT, pitch tracking; decode
+# block size lives in audio_decode)
+STFT_BLOCK_FRAMES = 1024
+PITCH_BLOCK_FRAMES = 2048
+
+# Audio decoding: AUDIO_DECODE_BACKEND is 'auto' (fastest installed backend)
+# or one of audio_decode.BACKENDS; RESAMPLE_TYPE is any librosa res_type
+# (soxr_vhq/hq/mq/lq/qq resample in-stream while decoding)
+AUDIO_DECODE_BACKEND = os.getenv('AUDIO_DECODE_BACKEND', 'auto')
+RESAMPLE_TYPE = os.getenv('RESAMPLE_TYPE', DEFAULT_RES_TYPE)
+try:
+    DECODE_BACKEND = resolve_backend(AUDIO_DECODE_BACKEND)
+except DecodeError:
+    DECODE_BACKEND = AUDIO_DECODE_BACKEND
+
+# Voice activity detection: with VAD_ENABLED, stretches quieter than
+# VAD_TOP_DB below the loudest frame and longer than VAD_MIN_SILENCE seconds
+# are dropped before feature extraction (see voice_activity)
+VAD_ENABLED = os.getenv('VAD_ENABLED', '0').lower() in ('1', 'true', 'yes')
+VAD_TOP_DB = float(os.getenv('VAD_TOP_DB', str(DEFAULT_TOP_DB)))
+VAD_MIN_SILENCE = float(os.getenv('VAD_MIN_SILENCE', str(DEFAULT_MIN_SILENCE)))
+
+# Everything that changes feature values; cached features are only reused
+# under the same configuration (see feature_config_hash)
+EXTRACTOR_CONFIG = {
+    'sample_rate': SAMPLE_RATE,
+    'n_fft': N_FFT,
+    'hop_length': HOP_LENGTH,
+    'n_mfcc': N_MFCC,
+    'decode_backend': DECODE_BACKEND,
+    'res_type': RESAMPLE_TYPE,
+    'vad': {'top_db': VAD_TOP_DB, 'min_silence': VAD_MIN_SILENCE} if VAD_ENABLED else None,
+}
+
+# Detection mode: 'cascade' computes the cheapest features first and stops as
+# soon as the outcome is decided; 'full' always computes every rule input.
+# Both give the same classification.
+DETECTION_MODE = os.getenv('DETECTION_MODE', 'cascade')
+
+# Streaming extraction: clips whose header reports at least
+# STREAMING_MIN_SECONDS are decoded and analyzed block by block in bounded
+# memory instead of being loaded whole (same features, see stream_features)
+STREAMING_MIN_SECONDS = float(os.getenv('STREAMING_MIN_SECONDS', '120'))
+
+# Segmented analysis (analysisMode "segmented"): the call is scored in
+# SEGMENT_SECONDS windows starting every SEGMENT_HOP_SECONDS, fanned out over
+# the process pool; SEGMENT_AI_MIN_SEGMENTS AI windows make the call AI_GENERATED
+ANALYSIS_MODES = ['standard', 'segmented']
+SEGMENT_SECONDS = float(os.getenv('SEGMENT_SECONDS', '20'))
+SEGMENT_HOP_SECONDS = float(os.getenv('SEGMENT_HOP_SECONDS', '10'))
+SEGMENT_AI_MIN_SEGMENTS = int(os.getenv('SEGMENT_AI_MIN_SEGMENTS', '1'))
+
+# Header pre-inspection (mp3_inspect, microseconds, before any decoding):
+# clips longer than MAX_AUDIO_SECONDS are rejected with 413, and requests
+# that do not name an analysisMode are routed to segmented analysis from
+# AUTO_SEGMENT_SECONDS on (0 disables either check)
+MAX_AUDIO_SECONDS = float(os.getenv('MAX_AUDIO_SECONDS', '3600'))
+AUTO_SEGMENT_SECONDS = float(os.getenv('AUTO_SEGMENT_SECONDS', '600'))
+
+# Accepted upload formats. wav and pcm_s16le (raw mono 16-bit little-endian,
+# with a declared sampleRate in PCM_SAMPLE_RATE_RANGE) skip the decoder;
+# flac is decoded by libsndfile. Features are always computed at
+# SAMPLE_RATE, where the thresholds were calibrated: input already at that
+# rate is analyzed as-is, other rates are resampled (the spectral, ZCR and
+# energy statistics shift with the rate, so native-rate analysis is only
+# valid there).
+AUDIO_FORMATS = ['mp3', 'wav', 'flac', 'pcm_s16le']
+PCM_SAMPLE_RATE_RANGE = (8000, 192000)
+
+# Largest accepted audio upload (decoded bytes). Raw and multipart uploads are
+# read from the request stream and cut off as soon as they exceed it.
+MAX_AUDIO_BYTES = int(os.getenv('MAX_AUDIO_BYTES', str(25 * 1024 * 1024)))
+
+# Batch scoring: at most BATCH_MAX_SIZE items of at most MAX_AUDIO_BYTES each,
+# in a JSON body of at most BATCH_MAX_BYTES - a payload budget per request
+# (bodies are read and parsed whole), not BATCH_MAX_SIZE maximum-size clips.
+# The default still fits one base64-encoded clip of MAX_AUDIO_BYTES.
+BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', '32'))
+BATCH_MAX_BYTES = int(os.getenv('BATCH_MAX_BYTES', str(48 * 1024 * 1024)))
+
+# Live detection (/api/voice-detection/live): a provisional result every
+# LIVE_UPDATE_SECONDS of audio, at most LIVE_MAX_STREAMS concurrent streams
+# per process (each holds a server thread), each cut off after LIVE_MAX_SECONDS
+LIVE_FORMATS = ['mp3', 'pcm_s16le']
+LIVE_UPDATE_SECONDS = float(os.getenv('LIVE_UPDATE_SECONDS', '2'))
+LIVE_MAX_STREAMS = int(os.getenv('LIVE_MAX_STREAMS', '128'))
+LIVE_MAX_SECONDS = float(os.getenv('LIVE_MAX_SECONDS', '3600'))
+LIVE_READ_BYTES = 4096
+
+# Process-pool execution (VOICE_POOL_WORKERS=0 keeps all work in the request
+# process). With a pool, request threads only wait on a future, for at most
+# VOICE_REQUEST_TIMEOUT seconds, before answering 504.
+POOL_WORKERS = int(os.getenv('VOICE_POOL_WORKERS', '0'))
+REQUEST_TIMEOUT = float(os.getenv('VOICE_REQUEST_TIMEOUT', '60'))
+
+# Feature cache (FEATURE_CACHE_SIZE=0 disables the memory tier,
+# FEATURE_CACHE_DIR enables the shared on-disk tier)
+FEATURE_CACHE_SIZE = int(os.getenv('FEATURE_CACHE_SIZE', '256'))
+FEATURE_CACHE_DIR = os.getenv('FEATURE_CACHE_DIR')
+
+# Decoded-PCM cache of the offline loaders (load_audio_file, used by the
+# analysis and training scripts, never by requests): decoded signals are kept
+# as memory-mapped .npy files in PCM_CACHE_DIR ('' disables), least recently
+# used ones evicted beyond PCM_CACHE_MAX_MB
+PCM_CACHE_DIR = os.getenv('PCM_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'voice-detection-pcm'))
+PCM_CACHE_MAX_MB = float(os.getenv('PCM_CACHE_MAX_MB', '2048'))
+
+# Decision source: 'thresholds' (the declarative rules in DECISION_RULES_PATH,
+# applied by analyze_voice_patterns and the cascade) or 'model' (a forest trained by train_voice_model.py,
+# loaded from VOICE_MODEL_PATH once per process at import - before the fork
+# under gunicorn --preload - with its arrays memory-mapped, see voice_model).
+# Clips with a model P(AI) of MODEL_AI_THRESHOLD or more are AI_GENERATED.
+DECISION_MODES = ['thresholds', 'model']
+DECISION_MODE = os.getenv('DECISION_MODE', 'thresholds')
+DECISION_RULES_PATH = os.getenv('DECISION_RULES_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'voice_rules.json'))
+VOICE_MODEL_PATH = os.getenv('VOICE_MODEL_PATH', 'voice_model.joblib')
+MODEL_AI_THRESHOLD = float(os.getenv('MODEL_AI_THRESHOLD', '0.5'))
+
+if DECISION_MODE not in DECISION_MODES:
+    raise ValueError(f"Unknown DECISION_MODE: {DECISION_MODE} (choose from {', '.join(DECISION_MODES)})")
+voice_rules = load_rules(DECISION_RULES_PATH)
+voice_model = load_model(VOICE_MODEL_PATH) if DECISION_MODE == 'model' else None
+
+def feature_config_hash():
+    """Short, stable hash of EXTRACTOR_CONFIG"""
+    encoded = json.dumps(EXTRACTOR_CONFIG, sort_keys=True).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()[:12]
+
+def cache_namespace():
+    """Feature-cache namespace: the feature configuration, plus the rules or model that make the decisions"""
+    if voice_model is None:
+        return f"{feature_config_hash()}-{voice_rules.digest}"
+    return f"{feature_config_hash()}-{voice_model.model_id}-{MODEL_AI_THRESHOLD:g}"
+
+feature_cache = FeatureCache(
+    max_entries=FEATURE_CACHE_SIZE,
+    cache_dir=FEATURE_CACHE_DIR,
+    namespace=cache_namespace()
+)
+
+class DetectionTimeout(Exception):
+    """Feature extraction did not finish within VOICE_REQUEST_TIMEOUT"""
+
+def warm_up_worker():
+    """
+    Pool initializer: run the full pipeline once on a short synthetic clip
+    
+    Triggers numba JIT compilation and librosa's lazy imports in each pool
+    process, so the first real request does not pay for them.
+    """
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    tone = (0.5 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+    buffer = io.BytesIO()
+    sf.write(buffer, tone, SAMPLE_RATE, format='WAV')
+    extract_audio_features(buffer.getvalue())
+
+# Feature-extraction process pool, created lazily so each gunicorn worker owns its own
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+def get_process_pool():
+    """Return the shared feature-extraction pool, or None when disabled"""
+    global _process_pool
+    if POOL_WORKERS <= 0:
+        return None
+    with _process_pool_lock:
+        if _process_pool is None:
+            # spawn: forking a threaded server process is not safe
+            _process_pool = ProcessPoolExecutor(
+                max_workers=POOL_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=warm_up_worker
+            )
+    return _process_pool
+
+def reset_process_pool():
+    """Drop a broken pool (e.g. a worker was OOM-killed); the next request builds a new one"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
+
+def submit_to_pool(fn, *args):
+    """Submit fn(*args) to the pool, rebuilding it once if it is broken"""
+    try:
+        return get_process_pool().submit(fn, *args)
+    except BrokenProcessPool:
+        reset_process_pool()
+        return get_process_pool().submit(fn, *args)
+
+def run_in_pool(fn, *args, timeout=None):
+    """
+    Run fn(*args) on the process pool and wait at most timeout seconds
+    
+    Falls back to a direct call when the pool is disabled. Raises
+    DetectionTimeout when the budget is exceeded; a task that already
+    started keeps running in its worker, but the request is released.
+    """
+    if get_process_pool() is None:
+        return fn(*args)
+    
+    timeout = REQUEST_TIMEOUT if timeout is None else timeout
+    future = submit_to_pool(fn, *args)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise DetectionTimeout(f"Processing exceeded {timeout:g}s budget")
+    except BrokenProcessPool:
+        reset_process_pool()
+        raise
 
 def require_api_key(f):
     """Decorator to validate API key"""
@@ -39,7 +270,486 @@ def require_api_key(f):
         return f(*args, **kwargs)
     return decorated_function
 
-def extract_audio_features(audio_data):
+# ===== FEATURE REGISTRY =====
+# Every feature (and every shared intermediate such as the spectrogram) is a
+# node that declares the nodes it depends on. A FeatureContext computes a
+# node the first time it is asked for, so a request only pays for the
+# features its decision logic actually reads, and intermediates like the
+# STFT are still computed once per clip.
+
+FEATURE_NODES = {}      # node name -> (required node names, compute function)
+FEATURE_PROVIDERS = {}  # output feature name -> node that produces it
+
+def feature_node(name, requires=(), provides=()):
+    """
+    Register a node in the feature registry
+    
+    The decorated function is called as fn(context, *required_values).
+    Nodes that list output feature names in ``provides`` must return a
+    dict containing those keys.
+    """
+    def register(fn):
+        FEATURE_NODES[name] = (tuple(requires), fn)
+        for feature_name in provides:
+            FEATURE_PROVIDERS[feature_name] = name
+        return fn
+    return register
+
+class FeatureContext:
+    """Lazily evaluated feature graph for one decoded clip"""
+    
+    def __init__(self, y, sr):
+        self.sr = sr
+        # The whole pipeline runs in float32 (no-op for decoded audio)
+        self._values = {'signal': np.asarray(y, dtype=np.float32)}
+    
+    def get(self, name):
+        """Value of a node, computing it (and its dependencies) on first use"""
+        if name not in self._values:
+            requires, compute = FEATURE_NODES[name]
+            self._values[name] = compute(self, *[self.get(dep) for dep in requires])
+        return self._values[name]
+    
+    def features(self, names=None):
+        """FeatureVector of the requested output names (all features when None)"""
+        names = ALL_FEATURES if names is None else names
+        unknown = [name for name in names if name not in FEATURE_PROVIDERS]
+        if unknown:
+            raise ValueError(f"Unknown features: {', '.join(unknown)}")
+        return FeatureVector(feature_schema(names), [self.get(FEATURE_PROVIDERS[name])[name] for name in names])
+
+# --- Shared spectral analysis: one STFT per clip ---
+# These are exactly the intermediates librosa builds internally when each
+# feature is called with y=, so passing them back in with S= gives the same
+# values (up to float32 rounding, rtol 1e-5) with a single FFT pass.
+
+@feature_node('magnitude', requires=('signal',))
+def _magnitude_node(ctx, y):
+    """
+    |STFT| written block by block into one preallocated float32 array
+    
+    Same frames and values as np.abs(librosa.stft(y)) (centered,
+    zero-padded), but the full complex matrix never exists in memory.
+    """
+    padded = np.pad(y, N_FFT // 2, mode='constant')
+    n_frames = 1 + len(y) // HOP_LENGTH
+    S = np.empty((1 + N_FFT // 2, n_frames), dtype=np.float32)
+    for start in range(0, n_frames, STFT_BLOCK_FRAMES):
+        stop = min(start + STFT_BLOCK_FRAMES, n_frames)
+        block = padded[start * HOP_LENGTH:(stop - 1) * HOP_LENGTH + N_FFT]
+        np.abs(librosa.stft(block, n_fft=N_FFT, hop_length=HOP_LENGTH, center=False), out=S[:, start:stop])
+    return S
+
+@feature_node('power', requires=('magnitude',))
+def _power_node(ctx, S):
+    return S ** 2
+
+@feature_node('mel_db', requires=('power',))
+def _mel_db_node(ctx, power):
+    return librosa.power_to_db(librosa.feature.melspectrogram(S=power, sr=ctx.sr))
+
+def framewise(feature_fn, S, **kwargs):
+    """
+    Apply a per-frame librosa spectral feature to blocks of frames
+    
+    Centroid, bandwidth, rolloff and contrast only look at one frame at a
+    time, so the concatenated block results are identical while every
+    temporary stays block-sized instead of spectrogram-sized.
+    """
+    blocks = [feature_fn(S=S[:, start:start + STFT_BLOCK_FRAMES], **kwargs)
+              for start in range(0, S.shape[1], STFT_BLOCK_FRAMES)]
+    return np.concatenate(blocks, axis=-1)
+
+def strongest_frame_pitches(pitches, magnitudes):
+    """Per frame, the pitch of the strongest piptrack bin (one argmax along the frequency axis)"""
+    strongest = magnitudes.argmax(axis=0)
+    return pitches[strongest, np.arange(pitches.shape[1])]
+
+def pitch_statistics(pitches, magnitudes):
+    """
+    Pitch consistency statistics from librosa.piptrack output
+    
+    For every frame takes the pitch of the strongest bin, keeps the
+    voiced (pitch > 0) frames and summarizes them. Fully array-based:
+    one argmax along the frequency axis and a boolean mask instead of a
+    Python loop over frames.
+    """
+    return summarize_pitches(strongest_frame_pitches(pitches, magnitudes))
+
+def summarize_pitches(frame_pitches):
+    """Mean/std/var/range over the voiced (pitch > 0) frames"""
+    pitch_values = frame_pitches[frame_pitches > 0]
+    
+    if pitch_values.size == 0:
+        return {'pitch_mean': 0, 'pitch_std': 0, 'pitch_var': 0, 'pitch_range': 0}
+    
+    return {
+        'pitch_mean': np.mean(pitch_values),
+        'pitch_std': np.std(pitch_values),
+        'pitch_var': np.var(pitch_values),
+        'pitch_range': np.max(pitch_values) - np.min(pitch_values)
+    }
+
+# --- Output features (registration order is the features dict order) ---
+
+# 1. Spectral features
+@feature_node('spectral_centroid', requires=('magnitude',),
+              provides=('spectral_centroid_mean', 'spectral_centroid_std', 'spectral_centroid_var'))
+def _spectral_centroid_node(ctx, S):
+    spectral_centroids = framewise(librosa.feature.spectral_centroid, S, sr=ctx.sr)[0]
+    return {
+        'spectral_centroid_mean': np.mean(spectral_centroids),
+        'spectral_centroid_std': np.std(spectral_centroids),
+        'spectral_centroid_var': np.var(spectral_centroids)
+    }
+
+@feature_node('spectral_bandwidth', requires=('magnitude',),
+              provides=('spectral_bandwidth_mean', 'spectral_bandwidth_std'))
+def _spectral_bandwidth_node(ctx, S):
+    spectral_bandwidth = framewise(librosa.feature.spectral_bandwidth, S, sr=ctx.sr)[0]
+    return {
+        'spectral_bandwidth_mean': np.mean(spectral_bandwidth),
+        'spectral_bandwidth_std': np.std(spectral_bandwidth)
+    }
+
+@feature_node('spectral_rolloff', requires=('magnitude',),
+              provides=('spectral_rolloff_mean', 'spectral_rolloff_std'))
+def _spectral_rolloff_node(ctx, S):
+    spectral_rolloff = framewise(librosa.feature.spectral_rolloff, S, sr=ctx.sr)[0]
+    return {
+        'spectral_rolloff_mean': np.mean(spectral_rolloff),
+        'spectral_rolloff_std': np.std(spectral_rolloff)
+    }
+
+# 2. MFCCs (key for voice analysis)
+@feature_node('mfcc', requires=('mel_db',),
+              provides=[stat.format(i) for i in range(N_MFCC) for stat in ('mfcc_{}_mean', 'mfcc_{}_std')])
+def _mfcc_node(ctx, mel_db):
+    mfccs = librosa.feature.mfcc(S=mel_db, n_mfcc=N_MFCC)
+    features = {}
+    for i in range(N_MFCC):
+        features['mfcc_{}_mean'.format(i)] = np.mean(mfccs[i])
+        features['mfcc_{}_std'.format(i)] = np.std(mfccs[i])
+    return features
+
+# 3. Chroma features
+@feature_node('chroma', requires=('power',), provides=('chroma_mean', 'chroma_std'))
+def _chroma_node(ctx, power):
+    chroma = librosa.feature.chroma_stft(S=power, sr=ctx.sr)
+    return {'chroma_mean': np.mean(chroma), 'chroma_std': np.std(chroma)}
+
+# 4. Zero crossing rate (indicates voice naturalness) - time domain, no FFT
+@feature_node('zcr', requires=('signal',), provides=('zcr_mean', 'zcr_std', 'zcr_var'))
+def _zcr_node(ctx, y):
+    zcr = librosa.feature.zero_crossing_rate(y, frame_length=N_FFT, hop_length=HOP_LENGTH)[0]
+    return {'zcr_mean': np.mean(zcr), 'zcr_std': np.std(zcr), 'zcr_var': np.var(zcr)}
+
+# 5. Pitch consistency (AI voices tend to have more consistent pitch)
+@feature_node('pitch', requires=('magnitude',),
+              provides=('pitch_mean', 'pitch_std', 'pitch_var', 'pitch_range'))
+def _pitch_node(ctx, S):
+    # piptrack thresholds each frame against its own maximum, so tracking
+    # blocks of frames gives identical pitches with bounded temporaries
+    frame_pitches = np.empty(S.shape[1], dtype=np.float32)
+    for start in range(0, S.shape[1], PITCH_BLOCK_FRAMES):
+        pitches, magnitudes = librosa.piptrack(S=S[:, start:start + PITCH_BLOCK_FRAMES], sr=ctx.sr)
+        frame_pitches[start:start + pitches.shape[1]] = strongest_frame_pitches(pitches, magnitudes)
+    return summarize_pitches(frame_pitches)
+
+# 6. Temporal features
+@feature_node('duration', requires=('signal',), provides=('duration',))
+def _duration_node(ctx, y):
+    return {'duration': len(y) / ctx.sr}
+
+# 7. Spectral contrast (AI voices may have different patterns)
+@feature_node('spectral_contrast', requires=('magnitude',),
+              provides=('spectral_contrast_mean', 'spectral_contrast_std'))
+def _spectral_contrast_node(ctx, S):
+    spectral_contrast = framewise(librosa.feature.spectral_contrast, S, sr=ctx.sr)
+    return {
+        'spectral_contrast_mean': np.mean(spectral_contrast),
+        'spectral_contrast_std': np.std(spectral_contrast)
+    }
+
+# 8. RMS Energy (volume consistency - AI may be more consistent)
+# Time domain on purpose: librosa's spectrogram-based RMS uses windowed
+# frame energy, which would shift the rms_var thresholds.
+@feature_node('rms', requires=('signal',), provides=('rms_mean', 'rms_std', 'rms_var'))
+def _rms_node(ctx, y):
+    rms = librosa.feature.rms(y=y, frame_length=N_FFT, hop_length=HOP_LENGTH)[0]
+    return {'rms_mean': np.mean(rms), 'rms_std': np.std(rms), 'rms_var': np.var(rms)}
+
+ALL_FEATURES = list(FEATURE_PROVIDERS)
+
+# ===== STREAMING EXTRACTION =====
+# The same features, computed from a stream of decoded blocks in bounded
+# memory. The signal is cut into the padded sample chunks behind
+# consecutive blocks of STFT_BLOCK_FRAMES frames (so frames straddling a
+# block boundary are complete), every per-frame feature is computed on the
+# chunk exactly as the one-shot path computes it, and the frame values are
+# folded into RunningStats accumulators.
+#
+# Two inputs depend on the whole clip: the 80 dB floor of the mel
+# spectrogram (relative to its global maximum, used by the MFCCs) and
+# chroma's tuning estimate. When those features are requested a reference
+# pre-pass (STFT, mel, and piptrack for tuning) computes them first. The
+# tuning estimate needs the median over all voiced piptrack peaks, so that
+# pass keeps those peaks (a few KB per second of audio); everything else
+# is constant-size.
+
+# Per-node statistics kept by the streaming pass; output names are node_stat
+STREAM_SUMMARIES = {
+    'spectral_centroid': ('mean', 'std', 'var'),
+    'spectral_bandwidth': ('mean', 'std'),
+    'spectral_rolloff': ('mean', 'std'),
+    'chroma': ('mean', 'std'),
+    'zcr': ('mean', 'std', 'var'),
+    'pitch': ('mean', 'std', 'var', 'range'),
+    'spectral_contrast': ('mean', 'std'),
+    'rms': ('mean', 'std', 'var'),
+}
+SPECTRAL_NODES = {'spectral_centroid', 'spectral_bandwidth', 'spectral_rolloff', 'mfcc',
+                  'chroma', 'pitch', 'spectral_contrast'}
+
+def iter_frame_chunks(blocks, edge_padding=False, block_frames=STFT_BLOCK_FRAMES):
+    """
+    Regroup a sample stream into the chunks behind blocks of STFT frames
+    
+    Yields (chunk, edge_chunk) per block of up to block_frames frames;
+    run with center=False, librosa produces exactly those frames of the
+    centered analysis of the whole signal. chunk is zero-padded at the
+    signal ends (STFT, RMS), edge_chunk repeats the end samples (ZCR) and
+    is only built with edge_padding. Only one chunk of samples is kept.
+    """
+    half = N_FFT // 2
+    buffer = np.empty(0, dtype=np.float32)
+    offset = 0          # sample index of buffer[0]
+    received = 0
+    next_frame = 0
+    
+    def chunk(first, last, final):
+        lo, hi = first * HOP_LENGTH - half, (last - 1) * HOP_LENGTH + half
+        samples = buffer[max(lo, 0) - offset:min(hi, received) - offset]
+        padding = (max(0, -lo), max(0, hi - received) if final else 0)
+        if not any(padding):
+            return samples, samples if edge_padding else None
+        return (np.pad(samples, padding, mode='constant'),
+                np.pad(samples, padding, mode='edge') if edge_padding else None)
+    
+    for block in blocks:
+        buffer = np.concatenate([buffer, block])
+        received += len(block)
+        while (next_frame + block_frames - 1) * HOP_LENGTH + half <= received:
+            yield chunk(next_frame, next_frame + block_frames, False)
+            next_frame += block_frames
+            drop = next_frame * HOP_LENGTH - half - offset
+            if drop > 0:
+                buffer = buffer[drop:]
+                offset += drop
+    
+    if received == 0:
+        raise ValueError("Audio contains no samples")
+    n_frames = 1 + received // HOP_LENGTH
+    while next_frame < n_frames:
+        last = min(next_frame + block_frames, n_frames)
+        yield chunk(next_frame, last, True)
+        next_frame = last
+
+def chunk_magnitude(chunk):
+    """|STFT| of one frame chunk (the frames _magnitude_node computes for it)"""
+    return np.abs(librosa.stft(chunk, n_fft=N_FFT, hop_length=HOP_LENGTH, center=False))
+
+def stream_spectral_references(blocks, sr, mel=True, tuning=True):
+    """
+    Reference pre-pass: (global mel_db maximum, chroma tuning estimate)
+    
+    Mirrors power_to_db's log_spec.max() and estimate_tuning on the power
+    spectrogram; None for the value not requested.
+    """
+    mel_max_db = -np.inf if mel else None
+    peak_pitches, peak_magnitudes = [], []
+    for chunk, _ in iter_frame_chunks(blocks):
+        power = chunk_magnitude(chunk) ** 2
+        if mel:
+            mel_db = librosa.power_to_db(librosa.feature.melspectrogram(S=power, sr=sr), top_db=None)
+            mel_max_db = max(mel_max_db, float(mel_db.max()))
+        if tuning:
+            pitch, magnitude = librosa.piptrack(S=power, sr=sr, n_fft=N_FFT)
+            voiced = pitch > 0
+            peak_pitches.append(pitch[voiced])
+            peak_magnitudes.append(magnitude[voiced])
+    
+    chroma_tuning = None
+    if tuning:
+        # estimate_tuning, on the voiced peaks of every block
+        pitch, magnitude = np.concatenate(peak_pitches), np.concatenate(peak_magnitudes)
+        threshold = np.median(magnitude) if len(magnitude) else 0.0
+        chroma_tuning = librosa.pitch_tuning(pitch[magnitude >= threshold], bins_per_octave=12)
+    return mel_max_db, chroma_tuning
+
+class StreamingAccumulator:
+    """
+    Frame-level features of one stream, folded into RunningStats per node
+    
+    Without a mel_max_db from the reference pre-pass (live streams, where
+    the future is unknown), the mel floor follows the loudest frame so far.
+    """
+    
+    def __init__(self, sr, nodes, mel_max_db=None, tuning=None):
+        self.sr = sr
+        self.nodes = set(nodes)
+        self.running_mel_max = mel_max_db is None
+        self.mel_max_db = -np.inf if mel_max_db is None else mel_max_db
+        self.tuning = tuning
+        self.stats = {node: RunningStats() for node in self.nodes if node in STREAM_SUMMARIES}
+        if 'mfcc' in self.nodes:
+            self.stats['mfcc'] = RunningStats((N_MFCC,))
+    
+    def update(self, chunk, edge_chunk):
+        """Add the frames of one chunk from iter_frame_chunks"""
+        sr, stats = self.sr, self.stats
+        if self.nodes & SPECTRAL_NODES:
+            S = chunk_magnitude(chunk)
+            if 'spectral_centroid' in self.nodes:
+                stats['spectral_centroid'].update(librosa.feature.spectral_centroid(S=S, sr=sr)[0])
+            if 'spectral_bandwidth' in self.nodes:
+                stats['spectral_bandwidth'].update(librosa.feature.spectral_bandwidth(S=S, sr=sr)[0])
+            if 'spectral_rolloff' in self.nodes:
+                stats['spectral_rolloff'].update(librosa.feature.spectral_rolloff(S=S, sr=sr)[0])
+            if 'spectral_contrast' in self.nodes:
+                stats['spectral_contrast'].update(librosa.feature.spectral_contrast(S=S, sr=sr).ravel())
+            if 'pitch' in self.nodes:
+                frame_pitches = strongest_frame_pitches(*librosa.piptrack(S=S, sr=sr))
+                stats['pitch'].update(frame_pitches[frame_pitches > 0])
+            if 'mfcc' in self.nodes or 'chroma' in self.nodes:
+                power = S ** 2
+                if 'mfcc' in self.nodes:
+                    mel_db = librosa.power_to_db(librosa.feature.melspectrogram(S=power, sr=sr), top_db=None)
+                    if self.running_mel_max:
+                        self.mel_max_db = max(self.mel_max_db, float(mel_db.max()))
+                    np.maximum(mel_db, self.mel_max_db - 80.0, out=mel_db)
+                    stats['mfcc'].update(librosa.feature.mfcc(S=mel_db, n_mfcc=N_MFCC))
+                if 'chroma' in self.nodes:
+                    stats['chroma'].update(librosa.feature.chroma_stft(S=power, sr=sr, tuning=self.tuning).ravel())
+        if 'zcr' in self.nodes:
+            stats['zcr'].update(librosa.feature.zero_crossing_rate(
+                edge_chunk, frame_length=N_FFT, hop_length=HOP_LENGTH, center=False)[0])
+        if 'rms' in self.nodes:
+            stats['rms'].update(librosa.feature.rms(y=chunk, frame_length=N_FFT, hop_length=HOP_LENGTH, center=False)[0])
+    
+    def features(self, n_samples):
+        """FeatureVector (one-shot names and order) of every accumulated node"""
+        features = {}
+        for node in FEATURE_NODES:
+            if node not in self.nodes:
+                continue
+            if node == 'duration':
+                features['duration'] = n_samples / self.sr
+            elif node == 'mfcc':
+                for i in range(N_MFCC):
+                    features['mfcc_{}_mean'.format(i)] = float(self.stats['mfcc'].mean[i])
+                    features['mfcc_{}_std'.format(i)] = float(self.stats['mfcc'].std[i])
+            elif node == 'pitch' and self.stats['pitch'].count == 0:
+                features.update({'pitch_mean': 0, 'pitch_std': 0, 'pitch_var': 0, 'pitch_range': 0})
+            else:
+                for stat in STREAM_SUMMARIES[node]:
+                    features[f"{node}_{stat}"] = float(getattr(self.stats[node], stat))
+        return FeatureVector.from_mapping(features)
+
+def stream_features(open_blocks, sr, feature_names=None):
+    """
+    Streaming counterpart of extract_signal_features
+    
+    open_blocks() must return a fresh iterator of mono float32 blocks at
+    sr each time it is called (the reference pre-pass, when MFCCs or
+    chroma are requested, reads the stream once more). Returns (FeatureVector,
+    number of samples); peak memory is independent of the length.
+    """
+    names = ALL_FEATURES if feature_names is None else feature_names
+    unknown = [name for name in names if name not in FEATURE_PROVIDERS]
+    if unknown:
+        raise ValueError(f"Unknown features: {', '.join(unknown)}")
+    nodes = {FEATURE_PROVIDERS[name] for name in names}
+    
+    mel_max_db = tuning = None
+    if 'mfcc' in nodes or 'chroma' in nodes:
+        mel_max_db, tuning = stream_spectral_references(open_blocks(), sr, mel='mfcc' in nodes, tuning='chroma' in nodes)
+    
+    accumulator = StreamingAccumulator(sr, nodes, mel_max_db, tuning)
+    n_samples = 0
+    
+    def counted(blocks):
+        nonlocal n_samples
+        for block in blocks:
+            n_samples += len(block)
+            yield block
+    
+    for chunk, edge_chunk in iter_frame_chunks(counted(open_blocks()), edge_padding='zcr' in nodes):
+        accumulator.update(chunk, edge_chunk)
+    return accumulator.features(n_samples).select(names), n_samples
+
+class StreamingFeatureContext:
+    """
+    FeatureContext stand-in backed by a re-readable block stream
+    
+    Each features() call runs one streaming pass for the features not yet
+    computed, so cascade_voice_patterns works on it unchanged (each tier
+    that runs is one more pass, with the STFT only in the tiers that need it).
+    """
+    
+    def __init__(self, open_blocks, sr):
+        self.open_blocks = open_blocks
+        self.sr = sr
+        self.n_samples = None
+        self._features = {}
+    
+    def features(self, names=None):
+        names = ALL_FEATURES if names is None else names
+        missing = [name for name in names if name not in self._features]
+        if missing:
+            computed, self.n_samples = stream_features(self.open_blocks, self.sr, missing)
+            self._features.update(computed)
+        return FeatureVector(feature_schema(names), [self._features[name] for name in names])
+
+def decode_base64_audio(audio_base64):
+    """
+    Decode a base64 string to audio bytes
+    
+    binascii accepts the ASCII str directly, skipping the full-size
+    bytes copy base64.b64decode makes first; the decoded bytes are the
+    only new buffer (io.BytesIO shares it rather than copying).
+    """
+    return binascii.a2b_base64(audio_base64)
+
+def load_audio(audio_data, audio_format='mp3', sample_rate=None):
+    """
+    Decode audio bytes to a mono float32 signal at SAMPLE_RATE
+    
+    Uses the configured decode backend and resampler (see audio_decode);
+    sample_rate is the declared rate of pcm_s16le input. With the
+    defaults, samples are identical to librosa.load.
+    """
+    return decode_audio(audio_data, SAMPLE_RATE, backend=DECODE_BACKEND, res_type=RESAMPLE_TYPE,
+                        audio_format=audio_format, sample_rate=sample_rate)
+
+def load_speech(audio_data, audio_format='mp3', sample_rate=None):
+    """
+    Decode audio and, with VAD_ENABLED, drop its non-speech stretches
+    
+    Returns (y, sr, audio_duration) where audio_duration reports the
+    seconds received and the seconds left for analysis.
+    """
+    y, sr = load_audio(audio_data, audio_format, sample_rate)
+    received = len(y) / sr
+    if VAD_ENABLED:
+        y = trim_to_speech(y, sr, frame_length=HOP_LENGTH, top_db=VAD_TOP_DB, min_silence=VAD_MIN_SILENCE)
+    return y, sr, {"received": round(received, 3), "analyzed": round(len(y) / sr, 3)}
+
+def extract_signal_features(y, sr, feature_names=None):
+    """FeatureVector of an already decoded signal (all features when feature_names is None)"""
+    return FeatureContext(y, sr).features(feature_names)
+
+def extract_audio_features(audio_data, feature_names=None, audio_format='mp3', sample_rate=None):
     """
     Extract comprehensive audio features for AI vs Human detection
     
@@ -50,359 +760,751 @@ def extract_audio_features(audio_data):
     - Zero crossing rate
     - Pitch consistency metrics
     - Temporal features
+    
+    With feature_names=None every registered feature is computed (what the
+    analysis scripts use); pass a list such as ANALYSIS_FEATURES to compute
+    only those features and the intermediates they depend on.
+    audio_format and sample_rate are as for load_audio.
+    
+    Returns a FeatureVector: reads like the former features dict, with the
+    float32 values in .values for batch scoring and storage.
     """
     try:
-        # Load audio from bytes
-        y, sr = librosa.load(io.BytesIO(audio_data), sr=22050)
-        
-        # Extract features
-        features = {}
-        
-        # 1. Spectral features
-        spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-        features['spectral_centroid_mean'] = np.mean(spectral_centroids)
-        features['spectral_centroid_std'] = np.std(spectral_centroids)
-        features['spectral_centroid_var'] = np.var(spectral_centroids)
-        
-        spectral_bandwidth = librosa.feature.spectral_bandwidth(y=y, sr=sr)[0]
-        features['spectral_bandwidth_mean'] = np.mean(spectral_bandwidth)
-        features['spectral_bandwidth_std'] = np.std(spectral_bandwidth)
+        # Load audio from bytes (speech only with VAD_ENABLED)
+        y, sr, _ = load_speech(audio_data, audio_format, sample_rate)
         
-        spectral_rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr)[0]
-        features['spectral_rolloff_mean'] = np.mean(spectral_rolloff)
-        features['spectral_rolloff_std'] = np.std(spectral_rolloff)
+        return extract_signal_features(y, sr, feature_names)
         
-        # 2. MFCCs (key for voice analysis)
-        mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=20)
-        for i in range(20):
-            features['mfcc_{}_mean'.format(i)] = np.mean(mfccs[i])
-            features['mfcc_{}_std'.format(i)] = np.std(mfccs[i])
-        
-        # 3. Chroma features
-        chroma = librosa.feature.chroma_stft(y=y, sr=sr)
-        features['chroma_mean'] = np.mean(chroma)
-        features['chroma_std'] = np.std(chroma)
-        
-        # 4. Zero crossing rate (indicates voice naturalness)
-        zcr = librosa.feature.zero_crossing_rate(y)[0]
-        features['zcr_mean'] = np.mean(zcr)
-        features['zcr_std'] = np.std(zcr)
-        features['zcr_var'] = np.var(zcr)
-        
-        # 5. Pitch consistency (AI voices tend to have more consistent pitch)
-        pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-        pitch_values = []
-        for t in range(pitches.shape[1]):
-            index = magnitudes[:, t].argmax()
-            pitch = pitches[index, t]
-            if pitch > 0:
-                pitch_values.append(pitch)
-        
-        if len(pitch_values) > 0:
-            features['pitch_mean'] = np.mean(pitch_values)
-            features['pitch_std'] = np.std(pitch_values)
-            features['pitch_var'] = np.var(pitch_values)
-            features['pitch_range'] = np.max(pitch_values) - np.min(pitch_values)
+    except Exception as e:
+        raise Exception(f"Error extracting features: {str(e)}")
+
+_pcm_cache = None
+
+def get_pcm_cache():
+    """The offline loaders' PCMCache (None when PCM_CACHE_DIR is empty)"""
+    global _pcm_cache
+    if _pcm_cache is None and PCM_CACHE_DIR:
+        _pcm_cache = PCMCache(PCM_CACHE_DIR, int(PCM_CACHE_MAX_MB * 1024 * 1024))
+    return _pcm_cache
+
+def load_audio_file(path, audio_format=None, sample_rate=None):
+    """
+    Decode an audio file like load_audio, through the decoded-PCM cache
+    
+    The format defaults to the file extension. A cached signal comes back
+    as a read-only memory map without any decoding (see pcm_cache).
+    """
+    audio_format = audio_format or os.path.splitext(path)[1].lstrip('.').lower()
+    with open(path, 'rb') as f:
+        audio_data = f.read()
+    cache = get_pcm_cache()
+    if cache is None:
+        return load_audio(audio_data, audio_format, sample_rate)
+    return cache.load(audio_data, SAMPLE_RATE, DECODE_BACKEND, RESAMPLE_TYPE, audio_format, sample_rate)
+
+def extract_file_features(path, feature_names=None, audio_format=None, sample_rate=None):
+    """extract_audio_features of an audio file, decoded through load_audio_file"""
+    y, sr = load_audio_file(path, audio_format, sample_rate)
+    if VAD_ENABLED:
+        y = trim_to_speech(y, sr, frame_length=HOP_LENGTH, top_db=VAD_TOP_DB, min_silence=VAD_MIN_SILENCE)
+    return extract_signal_features(y, sr, feature_names)
+
+# The default feature set of trained models and feature stores; threshold
+# decisions compute only the decision-rule inputs (see decision_features)
+ANALYSIS_FEATURES = [
+    'rms_var', 'pitch_std', 'spectral_centroid_std', 'zcr_std',
+    'spectral_rolloff_std', 'spectral_bandwidth_std'
+] + ['mfcc_{}_std'.format(i) for i in range(N_MFCC)]
+
+# Cascade tiers, cheapest first: energy needs no FFT, pitch is the first
+# tier that needs the STFT. Rule features in no tier are computed in the last.
+CASCADE_TIERS = [
+    ('energy', ['rms_var', 'zcr_std']),
+    ('pitch', ['pitch_std']),
+    ('spectral', ['spectral_centroid_std']),
+]
+
+def analyze_voice_patterns(features, language=None):
+    """
+    Classify one clip from its features with the threshold decision rules
+    
+    The rules (DECISION_RULES_PATH, see decision_rules) encode the two AI
+    signatures:
+    - classic:  consistent volume and low pitch variation (e.g. ElevenLabs)
+    - advanced: human-like volume and pitch variation, but controlled
+                spectral patterns and smooth voice transitions (e.g. Viraj)
+    Anything else is HUMAN. Missing features take the rule set's defaults;
+    a language with its own calibrated thresholds in the rules file uses
+    those. For many clips at once use voice_rules.evaluate on a
+    FeatureMatrix. Returns (classification, confidence, explanation).
+    """
+    return voice_rules.for_language(language).decide(features)
+
+def cascade_voice_patterns(ctx, language=None):
+    """
+    Tiered early-exit version of analyze_voice_patterns
+    
+    Computes the CASCADE_TIERS features cheapest first and stops as soon
+    as no feature still to compute can change which rule decides:
+    - 'energy':   RMS and ZCR (time domain, no FFT) rule out both
+                  signatures for most natural speech
+    - 'pitch':    pitch tracking settles the classic signature
+    - 'spectral': spectral centroid, only for advanced-signature candidates
+    
+    The decision is identical to analyze_voice_patterns on the full
+    feature set. Returns (classification, confidence, explanation, tier,
+    features computed as a dict).
+    """
+    return voice_rules.for_language(language).cascade(ctx, CASCADE_TIERS)
+
+def analyze_audio(audio_data, mode=None, audio_format='mp3', sample_rate=None, language=None):
+    """
+    Decode, extract features and classify one clip
+    
+    This is the unit of work run on the process pool. mode is 'cascade' or
+    'full' (DETECTION_MODE when None); audio_format and sample_rate as for
+    load_audio; language selects per-language decision thresholds. Clips of STREAMING_MIN_SECONDS or
+    more are analyzed with streaming extraction. Returns a result dict
+    with features, classification, confidence, explanation, decisionTier
+    and audioDuration.
+    """
+    try:
+        duration = probe_duration(audio_data, audio_format, sample_rate)
+        if duration is not None and duration >= STREAMING_MIN_SECONDS:
+            ctx, received = open_stream_context(audio_data, audio_format, sample_rate)
+            result = classify_context(ctx, mode, language)
+            audio_duration = {
+                "received": round((received or ctx.n_samples) / ctx.sr, 3),
+                "analyzed": round(ctx.n_samples / ctx.sr, 3)
+            }
         else:
-            features['pitch_mean'] = 0
-            features['pitch_std'] = 0
-            features['pitch_var'] = 0
-            features['pitch_range'] = 0
-        
-        # 6. Temporal features
-        features['duration'] = len(y) / sr
-        
-        # 7. Spectral contrast (AI voices may have different patterns)
-        spectral_contrast = librosa.feature.spectral_contrast(y=y, sr=sr)
-        features['spectral_contrast_mean'] = np.mean(spectral_contrast)
-        features['spectral_contrast_std'] = np.std(spectral_contrast)
-        
-        # 8. RMS Energy (volume consistency - AI may be more consistent)
-        rms = librosa.feature.rms(y=y)[0]
-        features['rms_mean'] = np.mean(rms)
-        features['rms_std'] = np.std(rms)
-        features['rms_var'] = np.var(rms)
-        
-        return features
-        
+            y, sr, audio_duration = load_speech(audio_data, audio_format, sample_rate)
+            result = analyze_signal(y, sr, mode, language)
     except Exception as e:
         raise Exception(f"Error extracting features: {str(e)}")
+    
+    result["audioDuration"] = audio_duration
+    return result
 
-def analyze_voice_patterns(features):
-    """
-    ADVANCED ENSEMBLE DETECTION - Multi-method approach
-    
-    Enhanced detection for:
-    - Traditional TTS (older systems with robotic characteristics)
-    - Modern TTS (ElevenLabs, Google WaveNet - more human-like)
-    - Advanced AI TTS (Viraj, newer neural systems - extremely human-like)
-    - Deepfakes and voice synthesis systems
-    
-    Combines:
-    1. Pattern-based heuristics (method 1)
-    2. Statistical distribution analysis (method 2)
-    3. Advanced feature combination analysis (method 3)
-    
-    Uses ensemble voting to improve accuracy on advanced AI systems
-    """
-    ai_indicators = []
-    ai_scores = []
-    human_indicators = []
-    human_scores = []
-    
-    # Extract all features
-    rms_var = features.get('rms_var', 0.01)
-    pitch_std = features.get('pitch_std', 100)
-    spec_std = features.get('spectral_centroid_std', 1000)
-    zcr_std = features.get('zcr_std', 0.1)
-    rolloff_std = features.get('spectral_rolloff_std', 1000)
-    bw_std = features.get('spectral_bandwidth_std', 1000)
-    
-    mfcc_stds = [features.get('mfcc_{}_std'.format(i), 0) for i in range(20)]
-    avg_mfcc_std = np.mean(mfcc_stds)
-    
-    # ===== METHOD 1: PATTERN-BASED HEURISTICS =====
-    # Traditional threshold-based detection
-    
-    # 1a. VOLUME CONSISTENCY
-    if rms_var < 0.0005:
-        ai_indicators.append("Extremely consistent volume")
-        ai_scores.append(0.35)
-    elif rms_var < 0.002:
-        ai_indicators.append("Noticeably consistent volume")
-        ai_scores.append(0.22)
-    elif rms_var < 0.004:
-        ai_indicators.append("Slightly lower volume variation")
-        ai_scores.append(0.15)
-    else:
-        human_indicators.append("Natural volume variation")
-        human_scores.append(0.10)
-    
-    # 1b. PITCH CONSISTENCY
-    if pitch_std < 30:
-        ai_indicators.append("Extremely consistent pitch")
-        ai_scores.append(0.28)
-    elif pitch_std < 50:
-        ai_indicators.append("Unnatural pitch consistency")
-        ai_scores.append(0.18)
-    elif pitch_std < 400:
-        ai_indicators.append("Pitch variation below typical human range")
-        ai_scores.append(0.12)
-    elif pitch_std > 300:
-        human_indicators.append("High natural pitch variation")
-        human_scores.append(0.12)
-    
-    # 1c. SPECTRAL CHARACTERISTICS
-    if spec_std < 100:
-        ai_indicators.append("Uniform spectral patterns")
-        ai_scores.append(0.22)
-    elif spec_std < 200:
-        ai_indicators.append("Limited spectral variation")
-        ai_scores.append(0.14)
-    elif spec_std < 1300:
-        ai_indicators.append("Spectral consistency below typical human range")
-        ai_scores.append(0.10)
-    elif spec_std > 1300:
-        human_indicators.append("Rich spectral variation")
-        human_scores.append(0.12)
-    
-    # 1d. VOICE DYNAMICS (ZCR)
-    if zcr_std < 0.005:
-        ai_indicators.append("Mechanical voice transitions")
-        ai_scores.append(0.18)
-    elif zcr_std < 0.095:
-        ai_indicators.append("Smoother voice transitions than typical human")
-        ai_scores.append(0.14)
-    elif zcr_std > 0.095:
-        human_indicators.append("Natural voice dynamics")
-        human_scores.append(0.10)
-    
-    # 1e. MFCC ANALYSIS (Speech Patterns)
-    if avg_mfcc_std < 8:
-        ai_indicators.append("Robotic speech patterns")
-        ai_scores.append(0.24)
-    elif avg_mfcc_std < 22:
-        ai_indicators.append("Speech patterns below typical human range")
-        ai_scores.append(0.13)
-    elif avg_mfcc_std > 22:
-        human_indicators.append("Natural speech patterns")
-        human_scores.append(0.12)
-    
-    # 1f. SPECTRAL ROLLOFF
-    if rolloff_std < 300:
-        ai_indicators.append("Synthetic frequency distribution")
-        ai_scores.append(0.16)
-    elif rolloff_std < 2300:
-        ai_indicators.append("Frequency distribution less variable")
-        ai_scores.append(0.11)
-    elif rolloff_std > 2300:
-        human_indicators.append("Natural frequency distribution")
-        human_scores.append(0.12)
-    
-    # 1g. BANDWIDTH
-    if bw_std < 100:
-        ai_indicators.append("Unnaturally consistent bandwidth")
-        ai_scores.append(0.14)
-    elif bw_std < 630:
-        ai_indicators.append("Bandwidth consistency below human range")
-        ai_scores.append(0.10)
+def open_stream_context(audio_data, audio_format='mp3', sample_rate=None):
+    """
+    StreamingFeatureContext over the decoded (speech-only with VAD_ENABLED) audio
+    
+    Returns (context, samples received, or None when the context sees
+    them all anyway). VAD runs as its own cheap pass first: its thresholds
+    depend on the loudest frame of the whole recording.
+    """
+    sr = SAMPLE_RATE
+    
+    def open_blocks():
+        return iter_decode(audio_data, sr, backend=DECODE_BACKEND, res_type=RESAMPLE_TYPE,
+                           audio_format=audio_format, sample_rate=sample_rate)
+    
+    if VAD_ENABLED:
+        regions, received = stream_speech_regions(
+            open_blocks(), sr, frame_length=HOP_LENGTH, top_db=VAD_TOP_DB, min_silence=VAD_MIN_SILENCE
+        )
+        if not covers_everything(regions, received):
+            return StreamingFeatureContext(lambda: iter_speech(open_blocks(), regions), sr), received
+    return StreamingFeatureContext(open_blocks, sr), None
+
+def analyze_signal(y, sr, mode=None, language=None):
+    """Extract features from a decoded signal and classify it (see analyze_audio)"""
+    return classify_context(FeatureContext(y, sr), mode, language)
+
+def decision_features():
+    """The features a decision reads: the model's inputs, or every input of the rules of any language"""
+    if voice_model is not None:
+        return voice_model.feature_names
+    return voice_rules.all_feature_names
+
+def decide(features, language=None):
+    """Classification, confidence and explanation from a features mapping, per DECISION_MODE"""
+    if voice_model is None:
+        return analyze_voice_patterns(features, language)
+    probability = float(voice_model.predict_proba(voice_model.vector(features))[0])
+    if probability >= MODEL_AI_THRESHOLD:
+        return "AI_GENERATED", probability, f"Trained model: {probability:.0%} probability of AI generation"
+    return "HUMAN", 1.0 - probability, f"Trained model: {1.0 - probability:.0%} probability of a human voice"
+
+def classify_context(ctx, mode=None, language=None):
+    """
+    Classify from a (streaming) feature context
+    
+    With the trained model (DECISION_MODE 'model') every model input is
+    computed; with the thresholds, the cascade or every rule input.
+    """
+    if voice_model is not None:
+        features = ctx.features(voice_model.feature_names)
+        classification, confidence, explanation = decide(features)
+        tier = 'model'
+    elif (mode or DETECTION_MODE) == 'cascade':
+        classification, confidence, explanation, tier, features = cascade_voice_patterns(ctx, language)
+        features = FeatureVector.from_mapping(features)
     else:
-        human_indicators.append("Natural bandwidth variation")
-        human_scores.append(0.10)
-    
-    # ===== METHOD 2 & 3: ENSEMBLE PATTERN DETECTION =====
-    # Detect advanced AI by looking at suspicious combinations
-    
-    # Advanced AI signature: human-like RMS + pitch, but controlled spectral + ZCR
-    human_rms = rms_var > 0.003
-    human_pitch = pitch_std > 600
-    controlled_spectral = spec_std < 1280
-    smooth_zcr = zcr_std < 0.100
-    
-    if human_rms and human_pitch and controlled_spectral and smooth_zcr:
-        # ADVANCED AI DETECTION (like Viraj)
-        ai_indicators.append("Advanced AI signature detected")
-        ai_scores.append(0.40)  # High confidence for advanced AI pattern
-    
-    # Low-pitch AI signature: low pitch (male voice or AI) + smooth ZCR + human-like RMS
-    # This catches low-pitched TTS systems like sample voice 1
-    low_pitch = pitch_std < 400
-    high_rms_variance = rms_var > 0.003
-    
-    if low_pitch and smooth_zcr and high_rms_variance:
-        # LOW-PITCH AI DETECTION (like Sample Voice 1 - could be male voice or AI with variation)
-        # This requires additional indicators to confirm it's AI, not just a low-pitched human
-        ai_indicators.append("Low-pitch with smooth dynamics pattern")
-        ai_scores.append(0.18)  # Moderate confidence, needs other indicators
-    
-    # Classic AI signature: controlled RMS and pitch
-    controlled_rms = rms_var < 0.001
-    controlled_pitch = pitch_std < 400
-    
-    if controlled_rms and controlled_pitch:
-        # CLASSIC AI (like ElevenLabs)
-        ai_indicators.append("Classic AI pattern detected")
-        ai_scores.append(0.35)
-    
-    # ===== SCORING LOGIC =====
-    ai_confidence = min(sum(ai_scores), 0.95)
-    human_confidence = min(sum(human_scores), 0.85)
-    
-    # CRITICAL FIX: Don't classify as AI unless we have strong synthesis indicators
-    # Many human voices naturally have lower pitch/spectral variation
-    # We need to look for the COMBINATION that's impossible for humans
-    
-    # Check for "AI-only" combination: low RMS (<0.001) AND low pitch (<400) 
-    # This is the only truly reliable classic AI signature
-    classic_ai_combo = (rms_var < 0.0015) and (pitch_std < 350)
-    
-    # Advanced AI combo: high RMS (>0.003) + high pitch (>600) BUT controlled spectral + smooth ZCR
-    advanced_ai_combo = (rms_var > 0.003) and (pitch_std > 600) and (spec_std < 1280) and (smooth_zcr)
-    
-    # If neither combination is present, it's likely human even with some lower metrics
-    if not classic_ai_combo and not advanced_ai_combo:
-        # Default to HUMAN for natural speech variation
-        classification = "HUMAN"
-        confidence = 0.85
-        explanation = "Natural human voice detected with normal speech variations"
+        features = ctx.features(decision_features())
+        classification, confidence, explanation = analyze_voice_patterns(features, language)
+        tier = 'full'
+    
+    return {
+        "features": features,
+        "classification": classification,
+        "confidence": confidence,
+        "explanation": explanation,
+        "decisionTier": tier
+    }
+
+def analyze_segment(y, sr, start, mode=None, language=None):
+    """
+    Score one window of a segmented analysis (the pool task)
+    
+    Returns the timeline entry: start/end seconds, classification,
+    confidence and decisionTier. With VAD_ENABLED, windows without speech
+    are reported as NO_SPEECH and the rest are trimmed to speech first.
+    """
+    segment = {"start": round(start / sr, 3), "end": round((start + len(y)) / sr, 3)}
+    if VAD_ENABLED:
+        if len(speech_regions(y, sr, frame_length=HOP_LENGTH, top_db=VAD_TOP_DB, min_silence=VAD_MIN_SILENCE)) == 0:
+            return dict(segment, classification="NO_SPEECH", confidence=0.0, decisionTier=None)
+        y = trim_to_speech(y, sr, frame_length=HOP_LENGTH, top_db=VAD_TOP_DB, min_silence=VAD_MIN_SILENCE)
+    result = analyze_signal(y, sr, mode, language)
+    return dict(
+        segment,
+        classification=result['classification'],
+        confidence=float(result['confidence']),
+        decisionTier=result['decisionTier']
+    )
+
+def aggregate_segments(segments):
+    """
+    Call-level verdict from a segment timeline
+    
+    AI_GENERATED when at least SEGMENT_AI_MIN_SEGMENTS windows are AI (a
+    cloned voice may only cover part of the call), with the strongest AI
+    window's confidence; otherwise HUMAN with the mean human confidence.
+    Returns (classification, confidence, explanation).
+    """
+    scored = [segment for segment in segments if segment['classification'] != 'NO_SPEECH']
+    ai_segments = [segment for segment in scored if segment['classification'] == 'AI_GENERATED']
+    if not scored:
+        return "HUMAN", 0.5, "No speech detected in any segment"
+    
+    if len(ai_segments) >= SEGMENT_AI_MIN_SEGMENTS:
+        confidence = max(segment['confidence'] for segment in ai_segments)
+        explanation = (f"AI-generated voice in {len(ai_segments)} of {len(scored)} segments, "
+                       f"first at {ai_segments[0]['start']:g}s")
+        return "AI_GENERATED", confidence, explanation
+    
+    confidence = float(np.mean([segment['confidence'] for segment in scored]))
+    return "HUMAN", confidence, f"Human voice characteristics across all {len(scored)} segments"
+
+def analyze_segmented(audio_data, mode=None, audio_format='mp3', sample_rate=None, language=None):
+    """
+    Segmented analysis of a long recording
+    
+    Decodes in blocks, cuts overlapping SEGMENT_SECONDS windows and scores
+    them on the process pool (in order in this process without one). At
+    most two windows per pool worker are in flight, so memory is bounded
+    by the window size, not the call length; with a pool the whole call
+    shares one VOICE_REQUEST_TIMEOUT budget. Returns a result dict with
+    segments (the timeline), the aggregate classification, confidence and
+    explanation, and audioDuration.
+    """
+    sr = SAMPLE_RATE
+    windows = iter_windows(
+        iter_decode(audio_data, sr, backend=DECODE_BACKEND, res_type=RESAMPLE_TYPE,
+                    audio_format=audio_format, sample_rate=sample_rate),
+        int(SEGMENT_SECONDS * sr), int(SEGMENT_HOP_SECONDS * sr)
+    )
+    segments = []
+    received = 0
+    
+    if get_process_pool() is None:
+        for start, y in windows:
+            received = start + len(y)
+            segments.append(analyze_segment(y, sr, start, mode, language))
     else:
-        # We have a strong AI signature
-        if classic_ai_combo:
-            classification = "AI_GENERATED"
-            confidence = 0.90
-            explanation = "AI voice synthesis detected (classic pattern: consistent volume and low pitch)"
-        elif advanced_ai_combo:
-            classification = "AI_GENERATED"
-            confidence = 0.85
-            explanation = "Advanced AI voice synthesis detected (controlled spectral patterns)"
-        else:
-            classification = "HUMAN"
-            confidence = 0.85
-            explanation = "Natural human voice"
+        deadline = time.monotonic() + REQUEST_TIMEOUT
+        in_flight = []
+        max_in_flight = 2 * POOL_WORKERS
+        
+        def collect(future):
+            try:
+                return future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                for pending in in_flight:
+                    pending.cancel()
+                raise DetectionTimeout(f"Processing exceeded {REQUEST_TIMEOUT:g}s budget")
+            except BrokenProcessPool:
+                reset_process_pool()
+                raise
+        
+        for start, y in windows:
+            received = start + len(y)
+            in_flight.append(submit_to_pool(analyze_segment, y, sr, start, mode, language))
+            del y
+            if len(in_flight) >= max_in_flight:
+                segments.append(collect(in_flight.pop(0)))
+        while in_flight:
+            segments.append(collect(in_flight.pop(0)))
+    
+    if not segments:
+        raise Exception("Audio contains no samples")
+    
+    classification, confidence, explanation = aggregate_segments(segments)
+    # Seconds covered by at least one scored window (windows overlap)
+    analyzed = 0.0
+    covered_until = 0.0
+    for segment in segments:
+        if segment['classification'] != 'NO_SPEECH':
+            analyzed += max(0.0, segment['end'] - max(segment['start'], covered_until))
+            covered_until = max(covered_until, segment['end'])
+    return {
+        "features": {},
+        "classification": classification,
+        "confidence": confidence,
+        "explanation": explanation,
+        "decisionTier": "segmented",
+        "segments": segments,
+        "audioDuration": {"received": round(received / sr, 3), "analyzed": round(analyzed, 3)}
+    }
+
+def classify_audio_bytes(audio_data, analysis_mode='standard', audio_format='mp3', sample_rate=None, language=None):
+    """
+    Classify decoded audio bytes, answering repeated clips from the feature cache
     
-    # Ensure confidence is between 0 and 1
-    confidence = max(0.45, min(1.0, confidence))
+    Runs analyze_audio on the process pool when one is configured;
+    analysis_mode 'segmented' runs analyze_segmented instead (the pool
+    then scores its windows). Returns the (cached) result dict.
+    """
+    cache_key = audio_cache_key(audio_data, audio_format, sample_rate, language)
+    if analysis_mode == 'segmented':
+        cache_key += f"-segmented-{SEGMENT_SECONDS:g}-{SEGMENT_HOP_SECONDS:g}-{SEGMENT_AI_MIN_SEGMENTS}"
+    cached = feature_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    if analysis_mode == 'segmented':
+        result = analyze_segmented(audio_data, DETECTION_MODE, audio_format, sample_rate, language)
+    else:
+        result = run_in_pool(analyze_audio, audio_data, DETECTION_MODE, audio_format, sample_rate, language)
+    return feature_cache.put(cache_key, result)
+
+def audio_cache_key(audio_data, audio_format='mp3', sample_rate=None, language=None):
+    """
+    Feature-cache key of an upload
     
-    return classification, confidence, explanation
+    Raw PCM bytes only mean something with their rate, and a language with
+    its own decision thresholds can classify the same clip differently.
+    """
+    cache_key = FeatureCache.key_for(audio_data)
+    if audio_format == 'pcm_s16le':
+        cache_key += f"-pcm{sample_rate}"
+    if voice_model is None and language in voice_rules.language_rules:
+        cache_key += f"-{language}"
+    return cache_key
 
 def detect_voice_type(audio_base64, language):
     """
     Main detection function - detects AI-generated vs Human voices
+    
+    Results are cached by a hash of the decoded audio, so a repeated clip
+    skips decoding and feature extraction.
     """
     try:
-        # Decode base64 audio
-        audio_data = base64.b64decode(audio_base64)
-        
-        # Extract features
-        features = extract_audio_features(audio_data)
-        
-        # Analyze patterns for AI vs Human
-        classification, confidence, explanation = analyze_voice_patterns(features)
-        
-        return classification, confidence, explanation
+        result = classify_audio_bytes(decode_base64_audio(audio_base64), language=language)
+        return result['classification'], result['confidence'], result['explanation']
         
+    except DetectionTimeout:
+        raise
     except Exception as e:
         raise Exception(f"Detection failed: {str(e)}")
 
+def detection_response(language, result, audio_info=None):
+    """
+    Success payload for one classified clip (with its segment timeline in segmented mode)
+    
+    audio_info (from inspect_upload) adds the header facts as audioInfo.
+    """
+    response = {
+        "status": "success",
+        "language": language,
+        "classification": result['classification'],
+        "confidenceScore": round(result['confidence'], 2),
+        "explanation": result['explanation'],
+        "decisionTier": result.get('decisionTier'),
+        "audioDuration": result.get('audioDuration')
+    }
+    if 'segments' in result:
+        response["segments"] = [
+            {
+                "start": segment['start'],
+                "end": segment['end'],
+                "classification": segment['classification'],
+                "confidenceScore": round(segment['confidence'], 2),
+                "decisionTier": segment['decisionTier']
+            }
+            for segment in result['segments']
+        ]
+    if audio_info is not None:
+        response["audioInfo"] = audio_info_signals(audio_info)
+    return response
+
+def audio_info_signals(info):
+    """Client-facing audioInfo block from an inspect_audio result"""
+    return {
+        "estimatedDuration": round(info['duration'], 3),
+        "durationSource": info['durationSource'],
+        "bitrateKbps": info['bitrate'],
+        "sampleRate": info['sample_rate'],
+        "channels": info['channels'],
+        "vbr": info['vbr'],
+        "encoder": info['encoder']
+    }
+
+def validate_detection_metadata(language, audio_format, analysis_mode=None, sample_rate=None):
+    """
+    Validate language, audio format, analysis mode (None: not given) and sample rate
+    
+    sample_rate is required (and only used) for pcm_s16le. Returns an
+    error message or None.
+    """
+    # Validate language
+    if not language or language not in SUPPORTED_LANGUAGES:
+        return f"Invalid language. Supported: {', '.join(SUPPORTED_LANGUAGES)}"
+    
+    # Validate audio format
+    if not isinstance(audio_format, str) or audio_format.lower() not in AUDIO_FORMATS:
+        return f"Invalid audioFormat. Supported: {', '.join(AUDIO_FORMATS)}"
+    
+    low, high = PCM_SAMPLE_RATE_RANGE
+    if audio_format.lower() == 'pcm_s16le' and not (isinstance(sample_rate, int) and low <= sample_rate <= high):
+        return f"pcm_s16le audio needs a sampleRate between {low} and {high}"
+    
+    if analysis_mode is not None and analysis_mode not in ANALYSIS_MODES:
+        return f"Invalid analysisMode. Supported: {', '.join(ANALYSIS_MODES)}"
+    
+    return None
+
+def validate_detection_payload(data):
+    """
+    Validate one JSON detection request (or batch item)
+    
+    Returns an error message, or None when the payload is usable
+    """
+    if not isinstance(data, dict) or not data:
+        return "Invalid JSON payload"
+    
+    error = validate_detection_metadata(
+        data.get('language'), data.get('audioFormat'), data.get('analysisMode'), data.get('sampleRate')
+    )
+    if error:
+        return error
+    
+    # Validate audio data
+    if not data.get('audioBase64'):
+        return "audioBase64 field is required"
+    
+    return None
+
+class AudioTooLarge(Exception):
+    """Uploaded audio exceeds MAX_AUDIO_BYTES"""
+
+class AudioTooLong(AudioTooLarge):
+    """Audio header reports more than MAX_AUDIO_SECONDS"""
+
+def inspect_upload(audio_data, analysis_mode=None, audio_format='mp3', sample_rate=None):
+    """
+    Header-only pre-inspection of an upload, before anything is decoded
+    
+    Raises AudioTooLong past MAX_AUDIO_SECONDS. Resolves analysis_mode
+    when the client did not name one: segmented from AUTO_SEGMENT_SECONDS
+    on, standard otherwise. Returns (analysis mode, inspect_audio result
+    or None when the headers are unreadable, in which case decoding decides).
+    """
+    try:
+        info = inspect_audio(audio_data, audio_format, sample_rate)
+    except Exception:
+        # A header parser failure is no reason to reject the upload
+        info = None
+    duration = info['duration'] if info else None
+    if duration is not None and MAX_AUDIO_SECONDS and duration > MAX_AUDIO_SECONDS:
+        raise AudioTooLong(f"Audio is {duration:.0f}s long (maximum {MAX_AUDIO_SECONDS:g}s)")
+    if analysis_mode is None:
+        long_clip = duration is not None and AUTO_SEGMENT_SECONDS and duration >= AUTO_SEGMENT_SECONDS
+        analysis_mode = 'segmented' if long_clip else 'standard'
+    return analysis_mode, info
+
+def read_limited(stream, limit):
+    """
+    Read a binary stream, raising AudioTooLarge as soon as more than limit bytes arrive
+    
+    Asks for everything that is still allowed in each read, so the common
+    case is a single read whose bytes are returned without another copy.
+    """
+    chunks = []
+    total = 0
+    while True:
+        chunk = stream.read(limit + 1 - total)
+        if not chunk:
+            return b''.join(chunks)
+        chunks.append(chunk)
+        total += len(chunk)
+        if total > limit:
+            raise AudioTooLarge(f"Audio exceeds maximum size of {limit} bytes")
+
+def read_binary_upload():
+    """
+    Metadata and audio bytes from a raw or multipart upload
+    
+    - application/octet-stream: body is the audio file, metadata in the
+      x-language, x-audio-format, x-analysis-mode and x-sample-rate headers
+    - multipart/form-data: file field "audio" (or "file"), metadata in the
+      language, audioFormat, analysisMode and sampleRate form fields
+    
+    Returns (metadata dict, audio bytes).
+    """
+    if request.content_length is not None and request.content_length > MAX_AUDIO_BYTES + 64 * 1024:
+        raise AudioTooLarge(f"Audio exceeds maximum size of {MAX_AUDIO_BYTES} bytes")
+    
+    if request.mimetype == 'multipart/form-data':
+        metadata = {
+            'language': request.form.get('language'),
+            'audioFormat': request.form.get('audioFormat'),
+            'analysisMode': request.form.get('analysisMode'),
+            'sampleRate': parse_sample_rate(request.form.get('sampleRate'))
+        }
+        upload = request.files.get('audio') or request.files.get('file')
+        audio_data = read_limited(upload.stream, MAX_AUDIO_BYTES) if upload else b''
+    else:
+        metadata = {
+            'language': request.headers.get('x-language'),
+            'audioFormat': request.headers.get('x-audio-format'),
+            'analysisMode': request.headers.get('x-analysis-mode'),
+            'sampleRate': parse_sample_rate(request.headers.get('x-sample-rate'))
+        }
+        audio_data = read_limited(request.stream, MAX_AUDIO_BYTES)
+    
+    return metadata, audio_data
+
+def parse_sample_rate(value):
+    """Integer sample rate from a header or form field, None when missing or not a number"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
 @app.route('/api/voice-detection', methods=['POST'])
 @require_api_key
 def voice_detection():
     """
     Main API endpoint for voice detection
+    
+    Accepts the JSON contract ({language, audioFormat, audioBase64}) as
+    well as raw application/octet-stream and multipart/form-data uploads,
+    which skip the base64 overhead (see read_binary_upload). audioFormat
+    is one of AUDIO_FORMATS; pcm_s16le also needs sampleRate. An optional
+    analysisMode of "segmented" adds a per-window timeline for long calls;
+    without one, inspect_upload picks it from the audio headers, which also
+    reject overlong clips before they are decoded.
     """
     try:
         # Validate content type
-        if request.content_type != 'application/json':
+        if request.mimetype == 'application/json':
+            if request.content_length is not None and request.content_length > MAX_AUDIO_BYTES * 4 // 3 + 64 * 1024:
+                raise AudioTooLarge(f"Audio exceeds maximum size of {MAX_AUDIO_BYTES} bytes")
+            
+            # Get request data (cache=False: the raw body is released once parsed)
+            data = request.get_json(cache=False)
+            
+            # Validate required fields
+            error = validate_detection_payload(data)
+            audio_data = None
+        elif request.mimetype in ('application/octet-stream', 'multipart/form-data'):
+            data, audio_data = read_binary_upload()
+            error = validate_detection_metadata(data['language'], data['audioFormat'], data['analysisMode'], data['sampleRate'])
+            if not error and not audio_data:
+                error = "Audio body is required"
+        else:
             return jsonify({
                 "status": "error",
-                "message": "Content-Type must be application/json"
+                "message": "Content-Type must be application/json, application/octet-stream or multipart/form-data"
             }), 400
         
-        # Get request data
-        data = request.get_json()
-        
-        # Validate required fields
-        if not data:
+        if error:
             return jsonify({
                 "status": "error",
-                "message": "Invalid JSON payload"
+                "message": error
             }), 400
         
-        language = data.get('language')
-        audio_format = data.get('audioFormat')
-        audio_base64 = data.get('audioBase64')
+        # Perform detection
+        try:
+            if audio_data is None:
+                # pop: the base64 string is freed as soon as it is decoded
+                audio_data = decode_base64_audio(data.pop('audioBase64'))
+            audio_format, sample_rate = data['audioFormat'].lower(), data.get('sampleRate')
+            analysis_mode, audio_info = inspect_upload(audio_data, data.get('analysisMode'), audio_format, sample_rate)
+            result = classify_audio_bytes(audio_data, analysis_mode, audio_format, sample_rate, data['language'])
+        except (DetectionTimeout, AudioTooLarge):
+            raise
+        except Exception as e:
+            raise Exception(f"Detection failed: {str(e)}")
+        
+        # Return success response with AI/Human detection only
+        return jsonify(detection_response(data['language'], result, audio_info)), 200
         
-        # Validate language
-        if not language or language not in SUPPORTED_LANGUAGES:
+    except AudioTooLarge as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 413
+    except DetectionTimeout as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 504
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Processing error: {str(e)}"
+        }), 500
+
+def analyze_batch(audio_items):
+    """
+    Run analyze_audio for several decoded clips
+    
+    audio_items are (audio bytes, audio format, sample rate, language)
+    tuples. Fans out over the process pool when VOICE_POOL_WORKERS > 0, otherwise
+    runs in order in the calling process. Returns one (result, error)
+    tuple per clip so a bad clip never fails the rest of the batch. With a
+    pool the whole batch shares one VOICE_REQUEST_TIMEOUT budget; clips
+    still unfinished when it runs out are reported as timed out.
+    """
+    if get_process_pool() is None:
+        results = []
+        for audio_data, audio_format, sample_rate, language in audio_items:
+            try:
+                results.append((analyze_audio(audio_data, DETECTION_MODE, audio_format, sample_rate, language), None))
+            except Exception as e:
+                results.append((None, str(e)))
+        return results
+    
+    deadline = time.monotonic() + REQUEST_TIMEOUT
+    futures = [
+        submit_to_pool(analyze_audio, audio_data, DETECTION_MODE, audio_format, sample_rate, language)
+        for audio_data, audio_format, sample_rate, language in audio_items
+    ]
+    results = []
+    for future in futures:
+        try:
+            results.append((future.result(timeout=max(0.0, deadline - time.monotonic())), None))
+        except FutureTimeoutError:
+            future.cancel()
+            results.append((None, f"Processing exceeded {REQUEST_TIMEOUT:g}s budget"))
+        except BrokenProcessPool as e:
+            reset_process_pool()
+            results.append((None, str(e) or "Worker process died"))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
+
+@app.route('/api/voice-detection/batch', methods=['POST'])
+@require_api_key
+def voice_detection_batch():
+    """
+    Batch endpoint: score many clips in one request
+    
+    Accepts a JSON array of {id, language, audioFormat, audioBase64} items
+    (plus sampleRate for pcm_s16le, or {"items": [...]}) and returns one result per item in the same
+    order. Invalid, oversized or undecodable items get a per-item error.
+    """
+    try:
+        if request.mimetype != 'application/json':
             return jsonify({
                 "status": "error",
-                "message": f"Invalid language. Supported: {', '.join(SUPPORTED_LANGUAGES)}"
+                "message": "Content-Type must be application/json"
             }), 400
         
-        # Validate audio format
-        if not audio_format or audio_format.lower() != 'mp3':
+        # Checked up front when Content-Length is sent, while reading otherwise (chunked uploads)
+        try:
+            if request.content_length is not None and request.content_length > BATCH_MAX_BYTES:
+                raise AudioTooLarge()
+            data = json.loads(read_limited(request.stream, BATCH_MAX_BYTES))
+        except AudioTooLarge:
+            return jsonify({
+                "status": "error",
+                "message": f"Batch exceeds maximum size of {BATCH_MAX_BYTES} bytes"
+            }), 413
+        except ValueError:
             return jsonify({
                 "status": "error",
-                "message": "Only MP3 format is supported"
+                "message": "Request body must be valid JSON"
             }), 400
+        items = data.get('items') if isinstance(data, dict) else data
         
-        # Validate audio data
-        if not audio_base64:
+        if not isinstance(items, list) or not items:
             return jsonify({
                 "status": "error",
-                "message": "audioBase64 field is required"
+                "message": "Request body must be a non-empty array of items"
             }), 400
         
-        # Perform detection
-        classification, confidence, explanation = detect_voice_type(audio_base64, language)
+        if len(items) > BATCH_MAX_SIZE:
+            return jsonify({
+                "status": "error",
+                "message": f"Batch too large: {len(items)} items (maximum {BATCH_MAX_SIZE})"
+            }), 413
         
-        # Return success response with AI/Human detection only
+        results = [None] * len(items)
+        pending = []
+        
+        # 1. Validate and decode every item; cached clips are answered directly
+        for index, item in enumerate(items):
+            item_id = item.get('id', index) if isinstance(item, dict) else index
+            error = validate_detection_payload(item)
+            if not error and item.get('analysisMode') not in (None, 'standard'):
+                error = "Segmented analysis is only available on /api/voice-detection"
+            if not error:
+                try:
+                    audio_data = decode_base64_audio(item.pop('audioBase64'))
+                except Exception as e:
+                    error = f"Invalid audioBase64: {str(e)}"
+            if not error and len(audio_data) > MAX_AUDIO_BYTES:
+                error = f"Audio exceeds maximum size of {MAX_AUDIO_BYTES} bytes"
+            if not error:
+                audio_format, sample_rate = item['audioFormat'].lower(), item.get('sampleRate')
+                try:
+                    _, audio_info = inspect_upload(audio_data, 'standard', audio_format, sample_rate)
+                except AudioTooLong as e:
+                    error = str(e)
+            if error:
+                results[index] = {"id": item_id, "status": "error", "message": error}
+                continue
+            
+            cache_key = audio_cache_key(audio_data, audio_format, sample_rate, item['language'])
+            cached = feature_cache.get(cache_key)
+            if cached is not None:
+                results[index] = dict(id=item_id, **detection_response(item['language'], cached, audio_info))
+                continue
+            pending.append((index, item_id, item['language'], cache_key, audio_info,
+                            (audio_data, audio_format, sample_rate, item['language'])))
+        
+        # 2. Extract features and score all remaining clips together
+        analyzed = analyze_batch([audio_item for *_, audio_item in pending])
+        
+        for (index, item_id, language, cache_key, audio_info, _), (result, error) in zip(pending, analyzed):
+            if error:
+                results[index] = {"id": item_id, "status": "error", "message": f"Processing error: {error}"}
+                continue
+            result = feature_cache.put(cache_key, result)
+            results[index] = dict(id=item_id, **detection_response(language, result, audio_info))
+        
+        succeeded = sum(1 for result in results if result['status'] == 'success')
         return jsonify({
             "status": "success",
-            "language": language,
-            "classification": classification,
-            "confidenceScore": round(confidence, 2),
-            "explanation": explanation
+            "total": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "results": results
         }), 200
         
     except Exception as e:
@@ -411,13 +1513,163 @@ def voice_detection():
             "message": f"Processing error: {str(e)}"
         }), 500
 
+class LiveSession:
+    """
+    Incremental detection state for one live stream
+    
+    Holds a StreamDecoder, the frame-chunk buffer of iter_frame_chunks and
+    one StreamingAccumulator over the features the decision reads - a
+    fixed amount of memory however long the call runs.
+    """
+    
+    def __init__(self, language, audio_format, sample_rate=None, update_seconds=None):
+        self.language = language
+        self.decoder = StreamDecoder(audio_format, SAMPLE_RATE, sample_rate=sample_rate, res_type=RESAMPLE_TYPE)
+        self.accumulator = StreamingAccumulator(SAMPLE_RATE, {FEATURE_PROVIDERS[name] for name in decision_features()})
+        self.update_frames = max(1, int(round((update_seconds or LIVE_UPDATE_SECONDS) * SAMPLE_RATE / HOP_LENGTH)))
+        self.received = 0
+        self.analyzed_frames = 0
+    
+    def blocks(self, raw_chunks):
+        """Decoded blocks from the raw byte chunks, stopping at LIVE_MAX_SECONDS"""
+        for data in raw_chunks:
+            y = self.decoder.feed(data)
+            self.received += len(y)
+            if len(y):
+                yield y
+            if self.received >= LIVE_MAX_SECONDS * SAMPLE_RATE:
+                break
+        y = self.decoder.finish()
+        self.received += len(y)
+        if len(y):
+            yield y
+    
+    def updates(self, raw_chunks):
+        """Provisional result dicts as audio arrives, then the final one (an error when no audio arrived)"""
+        frame_chunks = iter_frame_chunks(self.blocks(raw_chunks), edge_padding=True, block_frames=self.update_frames)
+        try:
+            for chunk, edge_chunk in frame_chunks:
+                self.accumulator.update(chunk, edge_chunk)
+                self.analyzed_frames += 1 + (len(chunk) - N_FFT) // HOP_LENGTH
+                yield self.result(final=False)
+        except ValueError:
+            # iter_frame_chunks rejects a stream without samples; anything else is a real error
+            if self.received:
+                raise
+        yield self.result(final=True)
+    
+    def result(self, final):
+        if not self.analyzed_frames:
+            # No features yet: never classify from empty statistics
+            return {"status": "error", "final": final, "message": "No audio received"}
+        features = self.accumulator.features(self.received)
+        classification, confidence, explanation = decide(features.select(decision_features()), self.language)
+        return {
+            "status": "success" if final else "provisional",
+            "final": final,
+            "language": self.language,
+            "classification": classification,
+            "confidenceScore": round(confidence, 2),
+            "explanation": explanation,
+            "analyzedSeconds": round(min(self.analyzed_frames * HOP_LENGTH, self.received) / SAMPLE_RATE, 2)
+        }
+
+_live_stream_count = 0
+_live_stream_lock = threading.Lock()
+
+def acquire_live_stream():
+    """Reserve one of LIVE_MAX_STREAMS live slots; False when all are taken"""
+    global _live_stream_count
+    with _live_stream_lock:
+        if _live_stream_count >= LIVE_MAX_STREAMS:
+            return False
+        _live_stream_count += 1
+        return True
+
+def release_live_stream():
+    global _live_stream_count
+    with _live_stream_lock:
+        _live_stream_count -= 1
+
+def iter_request_chunks(stream):
+    """The request body in small reads, as it arrives"""
+    while True:
+        data = stream.read(LIVE_READ_BYTES)
+        if not data:
+            return
+        yield data
+
+@app.route('/api/voice-detection/live', methods=['POST'])
+@require_api_key
+def voice_detection_live():
+    """
+    Live endpoint: classify a call while it is still in progress
+    
+    The body is a (chunked) upload of mp3 or pcm_s16le audio; metadata in
+    the x-language, x-audio-format, x-sample-rate (PCM only) and optional
+    x-update-interval (seconds) headers. The response is newline-delimited
+    JSON: a "provisional" result every update interval of audio, then the
+    final one when the upload ends ("No audio received" error line if it
+    carried none). Decisions (see decide) use the features accumulated so far.
+    """
+    language = request.headers.get('x-language')
+    audio_format = (request.headers.get('x-audio-format') or '').lower()
+    error = None
+    if not language or language not in SUPPORTED_LANGUAGES:
+        error = f"Invalid language. Supported: {', '.join(SUPPORTED_LANGUAGES)}"
+    elif audio_format not in LIVE_FORMATS:
+        error = f"Invalid audio format. Supported for live streams: {', '.join(LIVE_FORMATS)}"
+    try:
+        sample_rate = int(request.headers.get('x-sample-rate', 0))
+        update_seconds = float(request.headers.get('x-update-interval', LIVE_UPDATE_SECONDS))
+    except ValueError:
+        error = error or "x-sample-rate and x-update-interval must be numbers"
+    else:
+        low, high = PCM_SAMPLE_RATE_RANGE
+        if not error and audio_format == 'pcm_s16le' and not low <= sample_rate <= high:
+            error = f"pcm_s16le streams need an x-sample-rate header between {low} and {high}"
+        elif not error and not 0.5 <= update_seconds <= 60:
+            error = "x-update-interval must be between 0.5 and 60 seconds"
+    if error:
+        return jsonify({
+            "status": "error",
+            "message": error
+        }), 400
+    
+    session = LiveSession(language, audio_format, sample_rate or None, update_seconds)
+    if not acquire_live_stream():
+        return jsonify({
+            "status": "error",
+            "message": "Too many live streams, try again later"
+        }), 503
+    
+    def generate():
+        try:
+            for update in session.updates(iter_request_chunks(request.stream)):
+                yield json.dumps(update) + '\n'
+        except Exception as e:
+            yield json.dumps({"status": "error", "message": f"Processing error: {str(e)}"}) + '\n'
+    
+    try:
+        response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        # Runs however the stream ends, including client disconnects
+        response.call_on_close(release_live_stream)
+    except BaseException:
+        release_live_stream()
+        raise
+    return response
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
         "status": "healthy",
         "service": "AI Voice Detection API",
-        "supported_languages": SUPPORTED_LANGUAGES
+        "supported_languages": SUPPORTED_LANGUAGES,
+        "featureCache": feature_cache.stats(),
+        "decisionMode": DECISION_MODE,
+        "modelId": voice_model.model_id if voice_model is not None else None,
+        "rulesId": voice_rules.digest if voice_model is None else None
     }), 200
 
 if __name__ == '__main__':
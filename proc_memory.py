@@ -0,0 +1,20 @@
+"""
+Process memory readings from Linux /proc
+read_status_mb reads VmRSS (current) or VmHWM (peak) from
+/proc/self/status; reset_peak_rss resets the peak to the current RSS via
+/proc/self/clear_refs, so the next VmHWM reading belongs to the code run
+in between. Both raise on systems without these files.
+"""
+
+def read_status_mb(field):
+    """VmRSS / VmHWM of this process in MB"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError(f"{field} not available")
+
+def reset_peak_rss():
+    """Reset VmHWM to the current RSS so the next peak belongs to the code measured"""
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
@@ -0,0 +1,55 @@
+"""
+Running statistics for streamed frame-level features
+Mean, variance, min and max of values that arrive in batches, merged with
+the parallel form of Welford's algorithm (Chan et al.): each batch is
+summarized with NumPy, then folded into the running totals in O(1), so
+memory does not depend on how many values have been seen.
+"""
+
+import numpy as np
+
+class RunningStats:
+    """
+    Streaming mean/std/var/min/max, one accumulator per element of shape
+
+    update() takes batches whose last axis is the stream axis, e.g. a
+    (N_MFCC, n_frames) block for shape (N_MFCC,). Statistics match
+    np.mean/np.std/np.var (ddof=0) over the concatenated batches, computed
+    in float64.
+    """
+
+    def __init__(self, shape=()):
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+        self.min = np.full(shape, np.inf)
+        self.max = np.full(shape, -np.inf)
+
+    def update(self, values):
+        """Fold a batch of values (stream along the last axis) into the totals"""
+        values = np.asarray(values, dtype=np.float64)
+        n = values.shape[-1]
+        if n == 0:
+            return
+        batch_mean = values.mean(axis=-1)
+        batch_m2 = np.square(values - batch_mean[..., None]).sum(axis=-1)
+
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean = self.mean + delta * (n / total)
+        self.m2 = self.m2 + batch_m2 + delta ** 2 * (self.count * n / total)
+        self.count = total
+        self.min = np.minimum(self.min, values.min(axis=-1))
+        self.max = np.maximum(self.max, values.max(axis=-1))
+
+    @property
+    def var(self):
+        return self.m2 / self.count if self.count else np.full_like(self.m2, np.nan)
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+    @property
+    def range(self):
+        return self.max - self.min
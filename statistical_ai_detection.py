@@ -5,7 +5,7 @@ Statistical AI detection analysis
 
 import os
 import numpy as np
-from problem1_voice_detection import extract_audio_features, analyze_voice_patterns
+from problem1_voice_detection import extract_file_features, analyze_voice_patterns
 
 def statistical_analysis(audio_file):
     """Statistical analysis for AI detection"""
@@ -15,10 +15,7 @@ def statistical_analysis(audio_file):
         return
     
     try:
-        with open(audio_file, 'rb') as f:
-            audio_data = f.read()
-        
-        features = extract_audio_features(audio_data)
+        features = extract_file_features(audio_file)
         result = analyze_voice_patterns(features)
         
         # Statistical measures
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Tests for the pluggable audio decode layer
+"""
+
+import io
+import librosa
+import numpy as np
+import audio_decode
+from test_feature_extraction import make_test_clip
+
+def test_soundfile_matches_librosa_load():
+    """In-stream resampling gives librosa.load's samples for every soxr quality"""
+    audio_data = make_test_clip(sr=44100, seed=3)
+    native, native_sr = librosa.load(io.BytesIO(audio_data), sr=None)
+    for res_type in audio_decode.SOXR_STREAM_QUALITY:
+        y, sr = audio_decode.decode_audio(audio_data, 22050, backend='soundfile', res_type=res_type)
+        expected = librosa.resample(native, orig_sr=native_sr, target_sr=22050, res_type=res_type)
+        assert sr == 22050 and y.dtype == np.float32
+        assert np.array_equal(y, expected), res_type
+
+    # Non-streaming resamplers run after decoding
+    y, _ = audio_decode.decode_audio(audio_data, 22050, backend='soundfile', res_type='polyphase')
+    assert len(y) == len(librosa.resample(native, orig_sr=native_sr, target_sr=22050, res_type='polyphase'))
+
+def test_backend_resolution():
+    assert audio_decode.resolve_backend('auto', 'wav') == 'soundfile'
+    assert audio_decode.available_backends('wav')[0] == 'soundfile'
+    try:
+        audio_decode.resolve_backend('gstreamer')
+        assert False, "unknown backend accepted"
+    except ValueError:
+        pass
+
+if __name__ == '__main__':
+    test_soundfile_matches_librosa_load()
+    test_backend_resolution()
+    print("✓ PASSED")
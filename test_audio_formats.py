@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for WAV, raw PCM and FLAC uploads (the no-decoder fast path)
+"""
+
+import base64
+import io
+import numpy as np
+import soundfile as sf
+import problem1_voice_detection as voice_api
+from audio_decode import decode_audio, iter_decode, wav_layout
+from test_feature_extraction import make_test_clip
+
+SR = voice_api.SAMPLE_RATE
+HEADERS = {"x-api-key": voice_api.API_KEY}
+
+def encode(y, sr, **kwargs):
+    buffer = io.BytesIO()
+    sf.write(buffer, y, sr, **kwargs)
+    return buffer.getvalue()
+
+def test_fast_path_matches_libsndfile():
+    """Reading WAV samples straight from the bytes gives libsndfile's exact samples"""
+    rng = np.random.default_rng(0)
+    y = (0.2 * rng.standard_normal((30000, 2))).astype(np.float32)
+    for rate in (8000, 16000, SR, 44100):
+        for subtype, channels in (('PCM_16', 1), ('PCM_16', 2), ('PCM_32', 1), ('FLOAT', 2), ('DOUBLE', 1)):
+            wav = encode(y[:, :channels], rate, format='WAV', subtype=subtype)
+            assert wav_layout(wav) is not None
+            reference, _ = decode_audio(wav, SR, backend='soundfile')
+            fast, _ = decode_audio(wav, SR, audio_format='wav')
+            streamed = np.concatenate(list(iter_decode(wav, SR, audio_format='wav')))
+            assert np.array_equal(fast, reference) and np.array_equal(streamed, reference)
+
+    # 24-bit (and compressed) WAV falls back to libsndfile
+    wav24 = encode(y[:, :1], SR, format='WAV', subtype='PCM_24')
+    assert wav_layout(wav24) is None
+    assert np.array_equal(decode_audio(wav24, SR, audio_format='wav')[0], decode_audio(wav24, SR)[0])
+
+def test_zero_copy_and_raw_pcm():
+    """Mono float32 WAV at the analysis rate is a view on the upload; raw PCM matches its WAV"""
+    y = (0.3 * np.sin(np.arange(SR) / 9)).astype(np.float32)
+    wav = encode(y, SR, format='WAV', subtype='FLOAT')
+    decoded, _ = decode_audio(wav, SR, audio_format='wav')
+    assert np.shares_memory(decoded, np.frombuffer(wav, dtype=np.uint8))
+    assert np.array_equal(decoded, y)
+
+    pcm = (y * 32767).astype('<i2').tobytes()
+    wav16 = encode(np.frombuffer(pcm, '<i2'), 16000, format='WAV', subtype='PCM_16')
+    assert np.array_equal(decode_audio(pcm, SR, audio_format='pcm_s16le', sample_rate=16000)[0],
+                          decode_audio(wav16, SR)[0])
+
+def post(json=None, **kwargs):
+    return voice_api.app.test_client().post('/api/voice-detection', headers=dict(HEADERS, **kwargs.pop('headers', {})),
+                                            json=json, **kwargs)
+
+def test_endpoint_formats_agree():
+    """The same samples as WAV, FLAC and raw PCM get the same decision"""
+    y, _ = sf.read(io.BytesIO(make_test_clip(duration=4.0, sr=16000, seed=21)), dtype='float32')
+    pcm = (np.clip(y, -1, 32767 / 32768) * 32768).astype('<i2').tobytes()
+    samples = np.frombuffer(pcm, '<i2')
+    uploads = {
+        'wav': encode(samples, 16000, format='WAV', subtype='PCM_16'),
+        'flac': encode(samples, 16000, format='FLAC'),
+    }
+    bodies = [
+        post({"language": "English", "audioFormat": audio_format,
+              "audioBase64": base64.b64encode(data).decode('utf-8')}).get_json()
+        for audio_format, data in uploads.items()
+    ]
+    raw = post(data=pcm, headers={"Content-Type": "application/octet-stream", "x-language": "English",
+                                  "x-audio-format": "pcm_s16le", "x-sample-rate": "16000"})
+    bodies.append(raw.get_json())
+
+    assert raw.status_code == 200
+    assert len({body['classification'] for body in bodies}) == 1
+    assert len({body['confidenceScore'] for body in bodies}) == 1
+    assert bodies[-1]['audioInfo']['sampleRate'] == 16000 and bodies[-1]['audioInfo']['durationSource'] == 'length'
+
+def test_format_validation_and_cache_key():
+    payload = {"language": "English", "audioFormat": "pcm_s16le", "audioBase64": "AAAA"}
+    assert post(payload).status_code == 400
+    assert post(dict(payload, sampleRate=4000)).status_code == 400
+    assert post(dict(payload, audioFormat="ogg")).status_code == 400
+
+    # The same PCM bytes at two rates are two different clips
+    assert voice_api.audio_cache_key(b'\0\0', 'pcm_s16le', 8000) != voice_api.audio_cache_key(b'\0\0', 'pcm_s16le', 16000)
+
+if __name__ == '__main__':
+    test_fast_path_matches_libsndfile()
+    test_zero_copy_and_raw_pcm()
+    test_endpoint_formats_agree()
+    test_format_validation_and_cache_key()
+    print("✓ PASSED")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Tests for the batch voice-detection endpoint (Flask test client, no server needed)
+"""
+
+import base64
+import io
+import json
+import struct
+import problem1_voice_detection as voice_api
+from test_feature_extraction import make_test_clip
+
+HEADERS = {"x-api-key": voice_api.API_KEY}
+
+def make_item(item_id, seed=0, **overrides):
+    item = {
+        "id": item_id,
+        "language": "English",
+        "audioFormat": "mp3",
+        "audioBase64": base64.b64encode(make_test_clip(duration=2.0, seed=seed)).decode('utf-8')
+    }
+    item.update(overrides)
+    return item
+
+def post_batch(payload):
+    client = voice_api.app.test_client()
+    return client.post('/api/voice-detection/batch', json=payload, headers=HEADERS)
+
+def test_batch_mixed_results():
+    """Valid items are scored; bad items get per-item errors"""
+    items = [
+        make_item("a", seed=1),
+        make_item("b", language="Klingon"),
+        make_item("c", audioBase64=base64.b64encode(b"not audio").decode('utf-8')),
+        make_item("d", seed=2),
+    ]
+    response = post_batch(items)
+    result = response.get_json()
+    print(result)
+
+    assert response.status_code == 200
+    assert result['total'] == 4 and result['succeeded'] == 2 and result['failed'] == 2
+    assert [r['id'] for r in result['results']] == ["a", "b", "c", "d"]
+    assert result['results'][0]['classification'] in ("HUMAN", "AI_GENERATED")
+    assert result['results'][1]['status'] == "error"
+    assert result['results'][2]['message'].startswith("Processing error")
+
+def test_batch_matches_single_endpoint():
+    """A batch item gets the same answer as the single-clip endpoint"""
+    item = make_item("x", seed=3)
+    single = voice_api.app.test_client().post('/api/voice-detection', json=item, headers=HEADERS).get_json()
+    batch = post_batch({"items": [item]}).get_json()['results'][0]
+
+    assert batch['classification'] == single['classification']
+    assert batch['confidenceScore'] == single['confidenceScore']
+
+def test_header_parser_failure_falls_back_to_decoding():
+    """An exception out of the header inspection leaves the clip to the decoder, on both endpoints"""
+    def broken_inspect(*args):
+        raise struct.error("unpack requires a buffer of 4 bytes")
+    item = make_item("a", seed=4)
+    original = voice_api.inspect_audio
+    voice_api.inspect_audio = broken_inspect
+    try:
+        single = voice_api.app.test_client().post('/api/voice-detection', json=dict(item), headers=HEADERS)
+        batch = post_batch([dict(item), make_item("b", seed=5)])
+    finally:
+        voice_api.inspect_audio = original
+    assert single.status_code == 200 and 'audioInfo' not in single.get_json()
+    result = batch.get_json()
+    assert batch.status_code == 200 and result['succeeded'] == 2
+    assert result['results'][0]['classification'] == single.get_json()['classification']
+
+def test_batch_size_limit():
+    """Batches over BATCH_MAX_SIZE are rejected up front"""
+    original = voice_api.BATCH_MAX_SIZE
+    voice_api.BATCH_MAX_SIZE = 1
+    try:
+        response = post_batch([make_item("a"), make_item("b")])
+    finally:
+        voice_api.BATCH_MAX_SIZE = original
+    assert response.status_code == 413
+
+def test_batch_byte_limits():
+    """Oversized items get a per-item error; bodies over BATCH_MAX_BYTES are refused before parsing"""
+    items = [make_item("small", seed=1), make_item("large", seed=2)]
+    limit = len(base64.b64decode(items[0]['audioBase64']))
+    items[1]['audioBase64'] = base64.b64encode(make_test_clip(duration=4.0, seed=2)).decode('utf-8')
+    original = voice_api.MAX_AUDIO_BYTES, voice_api.BATCH_MAX_BYTES
+    voice_api.MAX_AUDIO_BYTES = limit
+    try:
+        result = post_batch(items).get_json()
+        voice_api.BATCH_MAX_BYTES = 1024
+        too_large = post_batch(items)
+    finally:
+        voice_api.MAX_AUDIO_BYTES, voice_api.BATCH_MAX_BYTES = original
+    assert result['succeeded'] == 1 and result['results'][1]['message'].startswith("Audio exceeds maximum size")
+    assert too_large.status_code == 413
+
+def test_batch_without_content_length():
+    """Chunked bodies (no Content-Length) are cut off at BATCH_MAX_BYTES while being read"""
+    body = json.dumps([make_item("a")]).encode('utf-8')
+    def post_chunked():
+        return voice_api.app.test_client().post(
+            '/api/voice-detection/batch', input_stream=io.BytesIO(body), content_type='application/json',
+            headers=dict(HEADERS, **{"Transfer-Encoding": "chunked"}), environ_overrides={'wsgi.input_terminated': True})
+    assert post_chunked().get_json()['succeeded'] == 1
+    original = voice_api.BATCH_MAX_BYTES
+    voice_api.BATCH_MAX_BYTES = len(body) - 1
+    try:
+        assert post_chunked().status_code == 413
+    finally:
+        voice_api.BATCH_MAX_BYTES = original
+
+def test_batch_accepts_json_charset():
+    response = voice_api.app.test_client().post('/api/voice-detection/batch', data=json.dumps([make_item("a")]),
+                                                headers=dict(HEADERS, **{"Content-Type": "application/json; charset=utf-8"}))
+    assert response.status_code == 200 and response.get_json()['succeeded'] == 1
+
+def test_batch_requires_api_key():
+    response = voice_api.app.test_client().post('/api/voice-detection/batch', json=[make_item("a")])
+    assert response.status_code == 401
+
+if __name__ == '__main__':
+    test_batch_mixed_results()
+    test_batch_matches_single_endpoint()
+    test_header_parser_failure_falls_back_to_decoding()
+    test_batch_size_limit()
+    test_batch_byte_limits()
+    test_batch_without_content_length()
+    test_batch_accepts_json_charset()
+    test_batch_requires_api_key()
+    print("✓ PASSED")
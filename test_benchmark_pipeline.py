@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Tests for the pipeline benchmark suite (benchmark_pipeline.py) on tiny clips
+"""
+
+import json
+import os
+import tempfile
+import benchmark_pipeline
+import problem1_voice_detection as voice_api
+
+def test_clips_are_deterministic():
+    assert benchmark_pipeline.encode_clip(0.5, 16000) == benchmark_pipeline.encode_clip(0.5, 16000)
+    assert benchmark_pipeline.encode_clip(0.5, 16000) != benchmark_pipeline.encode_clip(0.5, 8000)
+
+def test_results_and_comparison():
+    """Every case runs and is saved; a slower run than the stored one exits 1"""
+    with tempfile.TemporaryDirectory() as tmp:
+        first = os.path.join(tmp, 'first.json')
+        arguments = ['--durations', '0.5', '--rates', '16000', '44100', '--min-time', '0', '--min-rounds', '2', '--max-rounds', '2']
+        assert benchmark_pipeline.main(arguments + ['--output', first]) == 0
+        with open(first) as f:
+            results = json.load(f)
+
+        names = {benchmark['name'] for benchmark in results['benchmarks']}
+        nodes = set(voice_api.FEATURE_PROVIDERS.values())
+        assert names == {'extract_audio_features', 'analyze_voice_patterns', 'api'} | {f'feature:{node}' for node in nodes}
+        assert len(results['benchmarks']) == 2 * len(names)
+        assert {benchmark['group'] for benchmark in results['benchmarks']} == {'0.5s@16000', '0.5s@44100'}
+        for benchmark in results['benchmarks']:
+            stats = benchmark['stats']
+            assert stats['rounds'] == 2 and stats['min'] <= stats['median'] <= stats['max']
+        assert results['featureConfig'] == voice_api.feature_config_hash()
+        assert voice_api.feature_cache.max_entries == voice_api.FEATURE_CACHE_SIZE
+
+        rows, regressions = benchmark_pipeline.compare(results, results)
+        assert len(rows) == len(results['benchmarks']) and not regressions
+
+        # A previous run twice as fast on the API path
+        for benchmark in results['benchmarks']:
+            if benchmark['name'] == 'api':
+                benchmark['stats']['median'] /= 2
+        with open(first, 'w') as f:
+            json.dump(results, f)
+        second = os.path.join(tmp, 'second.json')
+        assert benchmark_pipeline.main(['--durations', '0.5', '--rates', '16000', '--only', 'api', '--min-time', '0',
+                                        '--max-rounds', '3', '--output', second, '--compare', first]) == 1
+
+if __name__ == '__main__':
+    test_clips_are_deterministic()
+    test_results_and_comparison()
+    print("✓ PASSED")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for raw (application/octet-stream) and multipart audio uploads
+"""
+
+import base64
+import io
+import problem1_voice_detection as voice_api
+from test_feature_extraction import make_test_clip
+
+HEADERS = {"x-api-key": voice_api.API_KEY}
+
+def client():
+    return voice_api.app.test_client()
+
+def test_raw_upload_matches_json():
+    """Raw and multipart uploads classify exactly like the JSON contract"""
+    audio_data = make_test_clip(seed=21)
+    json_result = client().post('/api/voice-detection', headers=HEADERS, json={
+        "language": "English",
+        "audioFormat": "mp3",
+        "audioBase64": base64.b64encode(audio_data).decode('utf-8')
+    }).get_json()
+
+    raw = client().post('/api/voice-detection', data=audio_data, headers=dict(HEADERS, **{
+        "Content-Type": "application/octet-stream",
+        "x-language": "English",
+        "x-audio-format": "mp3"
+    }))
+    multipart = client().post('/api/voice-detection', headers=HEADERS, content_type='multipart/form-data', data={
+        "language": "English",
+        "audioFormat": "mp3",
+        "audio": (io.BytesIO(audio_data), "clip.mp3")
+    })
+
+    print(raw.get_json(), multipart.get_json())
+    assert raw.status_code == 200 and multipart.status_code == 200
+    assert raw.get_json()['classification'] == json_result['classification']
+    assert multipart.get_json()['classification'] == json_result['classification']
+
+def test_raw_upload_validation():
+    """Missing metadata or body is a 400, as for JSON"""
+    missing_language = client().post('/api/voice-detection', data=b'abc', headers=dict(HEADERS, **{
+        "Content-Type": "application/octet-stream",
+        "x-audio-format": "mp3"
+    }))
+    empty_body = client().post('/api/voice-detection', data=b'', headers=dict(HEADERS, **{
+        "Content-Type": "application/octet-stream",
+        "x-language": "English",
+        "x-audio-format": "mp3"
+    }))
+    unsupported = client().post('/api/voice-detection', data=b'abc', headers=dict(HEADERS, **{
+        "Content-Type": "text/plain"
+    }))
+    assert missing_language.status_code == 400
+    assert empty_body.status_code == 400
+    assert unsupported.status_code == 400
+
+def test_upload_size_limit():
+    """Uploads over MAX_AUDIO_BYTES are rejected with 413"""
+    original = voice_api.MAX_AUDIO_BYTES
+    voice_api.MAX_AUDIO_BYTES = 1024
+    try:
+        response = client().post('/api/voice-detection', data=b'\0' * 2048, headers=dict(HEADERS, **{
+            "Content-Type": "application/octet-stream",
+            "x-language": "English",
+            "x-audio-format": "mp3"
+        }))
+    finally:
+        voice_api.MAX_AUDIO_BYTES = original
+    assert response.status_code == 413
+
+def test_read_limited_stops_at_limit():
+    assert voice_api.read_limited(io.BytesIO(b'x' * 10), 10) == b'x' * 10
+    try:
+        voice_api.read_limited(io.BytesIO(b'x' * 11), 10)
+        assert False, "limit not enforced"
+    except voice_api.AudioTooLarge:
+        pass
+
+if __name__ == '__main__':
+    test_raw_upload_matches_json()
+    test_raw_upload_validation()
+    test_upload_size_limit()
+    test_read_limited_stops_at_limit()
+    print("✓ PASSED")
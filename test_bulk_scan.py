@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for the bulk-scan CLI: directory and manifest input, pool, resume and output formats
+"""
+
+import csv
+import json
+import os
+import tempfile
+import time
+import numpy as np
+import soundfile as sf
+import bulk_scan
+from test_feature_extraction import make_test_clip
+
+def make_archive(root):
+    """A few WAV clips in nested folders, one undecodable MP3 and a non-audio file"""
+    os.makedirs(os.path.join(root, 'day2'))
+    paths = []
+    for i, folder in enumerate(['', '', 'day2']):
+        path = os.path.join(root, folder, f'clip{i}.wav')
+        with open(path, 'wb') as f:
+            f.write(make_test_clip(duration=2.0, seed=i))
+        paths.append(path)
+    with open(os.path.join(root, 'broken.mp3'), 'wb') as f:
+        f.write(b'not audio' * 50)
+    paths.append(os.path.join(root, 'broken.mp3'))
+    with open(os.path.join(root, 'notes.txt'), 'w') as f:
+        f.write('ignored')
+    return sorted(paths)
+
+def read_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+def test_directory_scan_and_resume():
+    """Every audio file gets one row; a torn, interrupted output resumes without duplicates"""
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = os.path.join(tmp, 'archive')
+        paths = make_archive(archive)
+        output = os.path.join(tmp, 'results.jsonl')
+
+        summary = bulk_scan.scan(archive, output, jobs=2, progress_every=0)
+        rows = read_jsonl(output)
+        assert sorted(row['path'] for row in rows) == paths
+        assert summary['files'] == 4 and summary['errors'] == 1
+        assert summary['audioSeconds'] > 5.9 and summary['filesPerSecond'] > 0
+        failed = [row for row in rows if row['status'] == 'error']
+        assert [row['path'] for row in failed] == [os.path.join(archive, 'broken.mp3')]
+        assert all(row['classification'] in ('HUMAN', 'AI_GENERATED') for row in rows if row['status'] == 'ok')
+
+        # Interrupted after two rows, in the middle of the third
+        with open(output) as f:
+            lines = f.readlines()
+        with open(output, 'w') as f:
+            f.writelines(lines[:2])
+            f.write(lines[2][:20])
+        summary = bulk_scan.scan(archive, output, jobs=1, progress_every=0)
+        assert summary['skipped'] == 2 and summary['files'] == 2
+        assert sorted(row['path'] for row in read_jsonl(output)) == paths
+
+        # Nothing left to do; --retry-errors scans only the failed file again
+        assert bulk_scan.scan(archive, output, progress_every=0)['files'] == 0
+        assert bulk_scan.scan(archive, output, retry_errors=True, progress_every=0)['files'] == 1
+
+def make_test_clip_file(tmp):
+    path = os.path.join(tmp, 'clip.wav')
+    with open(path, 'wb') as f:
+        f.write(make_test_clip(duration=3.0, sr=16000, seed=8))
+    return path
+
+def crash_on_bad_file(entry, mode=None):
+    """scan_file stand-in whose worker dies on paths containing 'crash'"""
+    if 'crash' in entry[0]:
+        os._exit(1)
+    time.sleep(0.2)   # still in flight when the other worker dies
+    return dict(path=entry[0], status='ok')
+
+def test_worker_crash_fails_only_the_crashing_file():
+    """Files in flight when a worker dies are rerun, not reported as failed"""
+    entries = [(f'clip{i}.wav', None, None) for i in range(12)]
+    entries.insert(5, ('crash.wav', None, None))
+    original = bulk_scan.scan_file
+    bulk_scan.scan_file = crash_on_bad_file
+    try:
+        rows = list(bulk_scan.iter_results(entries, 2, None))
+    finally:
+        bulk_scan.scan_file = original
+    assert sorted(row['path'] for row in rows) == sorted(entry[0] for entry in entries)
+    assert [row['path'] for row in rows if row['status'] == 'error'] == ['crash.wav']
+    assert next(row for row in rows if row['status'] == 'error')['error'] == "Worker process died"
+
+def test_manifest_and_csv_output():
+    """A CSV manifest can carry raw PCM with its rate; CSV output has the fixed columns"""
+    with tempfile.TemporaryDirectory() as tmp:
+        y, _ = sf.read(make_test_clip_file(tmp), dtype='float32')
+        with open(os.path.join(tmp, 'call.pcm'), 'wb') as f:
+            f.write((np.clip(y, -1, 32767 / 32768) * 32768).astype('<i2').tobytes())
+        with open(os.path.join(tmp, 'manifest.csv'), 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['path', 'audioFormat', 'sampleRate'])
+            writer.writerow(['clip.wav', '', ''])
+            writer.writerow(['call.pcm', 'pcm_s16le', '16000'])
+
+        output = os.path.join(tmp, 'results.csv')
+        bulk_scan.main([os.path.join(tmp, 'manifest.csv'), '-o', output, '--jobs', '1', '--progress', '0'])
+        with open(output, newline='') as f:
+            reader = csv.DictReader(f)
+            rows = list(reader)
+        assert reader.fieldnames == bulk_scan.RESULT_FIELDS
+        assert [row['status'] for row in rows] == ['ok', 'ok']
+        assert rows[0]['classification'] == rows[1]['classification']
+        assert abs(float(rows[1]['audioSeconds']) - 3.0) < 0.01
+
+if __name__ == '__main__':
+    test_directory_scan_and_resume()
+    test_worker_crash_fails_only_the_crashing_file()
+    test_manifest_and_csv_output()
+    print("✓ PASSED")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for calibrate_thresholds.py: packed-mask search, threshold profiles and per-language rules
+"""
+
+import copy
+import json
+import os
+import tempfile
+import time
+import numpy as np
+import calibrate_thresholds
+import problem1_voice_detection as voice_api
+from decision_rules import RuleSet, load_rules
+from feature_store import open_store
+from feature_vector import FeatureMatrix
+
+RULES = voice_api.voice_rules
+
+def random_features(rng, n):
+    """Features spread across both sides of every shipped threshold"""
+    return np.stack([
+        rng.uniform(0, 0.006, n),
+        rng.uniform(0, 1000, n),
+        rng.uniform(800, 1800, n),
+        rng.uniform(0.05, 0.15, n),
+    ], axis=1).astype(np.float32)
+
+def retuned(pitch_limit):
+    """The shipped rules with the classic pitch_std threshold moved"""
+    spec = copy.deepcopy(RULES.spec)
+    spec['rules'][0]['conditions'][1][2] = pitch_limit
+    return RuleSet(spec)
+
+def labels_of(rules, values):
+    classifications, _, _ = rules.evaluate(FeatureMatrix(RULES.schema, values))
+    return (np.asarray(classifications) == 'AI_GENERATED').astype(np.int8)
+
+def test_packed_metrics_match_rule_evaluation():
+    """Precision/recall from the bitsets equal those of RuleSet.evaluate at the same thresholds"""
+    rng = np.random.default_rng(0)
+    values = random_features(rng, 5000)
+    labels = labels_of(retuned(500), values)
+    calibration = calibrate_thresholds.Calibration(RULES, values, labels, grid=6)
+    for _ in range(20):
+        indices = [int(rng.integers(len(candidates))) for candidates in calibration.candidates]
+        spec = dict(RULES.spec, rules=calibrate_thresholds.with_thresholds(RULES.spec, calibration.thresholds(indices)))
+        predicted = labels_of(RuleSet(spec), values) == 1
+        metrics = calibration.evaluate_indices(indices)
+        assert metrics['recall'] == round((predicted & (labels == 1)).sum() / (labels == 1).sum(), 4)
+        assert metrics['fpr'] == round((predicted & (labels == 0)).sum() / (labels == 0).sum(), 4)
+
+def test_recovers_shifted_threshold():
+    """Labels from a moved threshold: both searches find it again, the grid over ~1M combinations quickly"""
+    values = random_features(np.random.default_rng(1), 20000)
+    labels = labels_of(retuned(500), values)
+    for search in ('grid', 'coordinate'):
+        start = time.perf_counter()
+        thresholds, report = calibrate_thresholds.calibrate(RULES, values, labels, search, grid=9)
+        elapsed = time.perf_counter() - start
+        print(f"{search}: {report['candidatesEvaluated']} candidates in {elapsed:.2f} s, "
+              f"F1 {report['current']['f1']:.3f} -> {report['calibrated']['f1']:.3f}")
+        assert report['current']['f1'] < 0.9 and report['calibrated']['f1'] > 0.98
+        assert abs(thresholds[1] - 500) < 60
+        assert report['rocAuc'] > 0.9 and report['roc'][0] == {'fpr': 0.0, 'tpr': 0.0}
+    assert report['candidatesEvaluated'] < 1000
+    assert elapsed < 10
+
+def test_cli_profile_with_language_override():
+    """--per-language writes an override the service applies to that language's clips only"""
+    rng = np.random.default_rng(2)
+    english, tamil = random_features(rng, 3000), random_features(rng, 3000)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, 'store')
+        store = open_store(root, voice_api.feature_config_hash(), RULES.feature_names)
+        store.append(english, [f'en{i}' for i in range(3000)], labels_of(RULES, english), ['English'] * 3000)
+        store.append(tamil, [f'ta{i}' for i in range(3000)], labels_of(retuned(700), tamil), ['Tamil'] * 3000)
+        store.append(random_features(rng, 10), [f'hi{i}' for i in range(10)], labels_of(RULES, english[:10]), ['Hindi'] * 10)
+
+        profile_path = os.path.join(tmp, 'profile.json')
+        report_path = os.path.join(tmp, 'report.json')
+        calibrate_thresholds.main([root, '-o', profile_path, '--per-language', '--search', 'coordinate',
+                                   '--grid', '12', '--report', report_path])
+        with open(profile_path) as f:
+            profile = json.load(f)
+        assert set(profile['languages']) == {'English', 'Tamil'}
+        with open(report_path) as f:
+            assert set(json.load(f)['languages']) == {'English', 'Tamil'}
+
+        rules = load_rules(profile_path)
+        assert rules.digest != RULES.digest
+        assert rules.for_language('Tamil').thresholds[1] > 600
+        assert rules.for_language('Hindi') is rules
+
+        features = {'rms_var': 0.001, 'pitch_std': 560, 'spectral_centroid_std': 1000, 'zcr_std': 0.1}
+        original = voice_api.voice_rules
+        voice_api.voice_rules = rules
+        try:
+            assert voice_api.analyze_voice_patterns(features, 'Tamil')[0] == 'AI_GENERATED'
+            assert voice_api.analyze_voice_patterns(features, 'English')[0] == 'HUMAN'
+            assert voice_api.analyze_voice_patterns(features)[0] == voice_api.analyze_voice_patterns(features, 'Hindi')[0]
+        finally:
+            voice_api.voice_rules = original
+
+if __name__ == '__main__':
+    test_packed_metrics_match_rule_evaluation()
+    test_recovers_shifted_threshold()
+    test_cli_profile_with_language_override()
+    print("✓ PASSED")
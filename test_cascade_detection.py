@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests for cascaded early-exit detection
+The cascade must always agree with analyze_voice_patterns on the full feature set
+"""
+
+import numpy as np
+import problem1_voice_detection as voice_api
+from test_feature_extraction import make_test_clip
+
+class FixedFeatureContext:
+    """Stand-in for FeatureContext that serves fixed values and records requests"""
+
+    def __init__(self, values):
+        self.values = values
+        self.requested = []
+
+    def features(self, names):
+        self.requested.extend(names)
+        return {name: self.values[name] for name in names}
+
+def test_cascade_agrees_with_full_analysis():
+    """Randomized sweep around every decision threshold"""
+    rng = np.random.default_rng(0)
+    tiers = set()
+    for _ in range(5000):
+        values = {
+            'rms_var': rng.choice([0.0005, 0.0015, 0.002, 0.003, 0.01]) * rng.uniform(0.8, 1.2),
+            'zcr_std': rng.choice([0.05, 0.100, 0.2]) * rng.uniform(0.9, 1.1),
+            'pitch_std': rng.choice([100, 350, 600, 900]) * rng.uniform(0.9, 1.1),
+            'spectral_centroid_std': rng.choice([500, 1280, 2000]) * rng.uniform(0.9, 1.1),
+        }
+        ctx = FixedFeatureContext(values)
+        classification, confidence, explanation, tier, _ = voice_api.cascade_voice_patterns(ctx)
+        assert (classification, confidence, explanation) == voice_api.analyze_voice_patterns(values), values
+        tiers.add(tier)
+
+        # Early exit: later tiers are only computed when needed
+        if tier == 'energy':
+            assert ctx.requested == ['rms_var', 'zcr_std']
+    assert tiers == {'energy', 'pitch', 'spectral'}
+
+def test_analyze_audio_modes_agree():
+    """Cascade and full modes classify a real clip the same way"""
+    audio_data = make_test_clip(seed=5)
+    cascade = voice_api.analyze_audio(audio_data, 'cascade')
+    full = voice_api.analyze_audio(audio_data, 'full')
+
+    print(cascade['decisionTier'], cascade['classification'])
+    assert cascade['classification'] == full['classification']
+    assert cascade['confidence'] == full['confidence']
+    assert full['decisionTier'] == 'full'
+
+if __name__ == '__main__':
+    test_cascade_agrees_with_full_analysis()
+    test_analyze_audio_modes_agree()
+    print("✓ PASSED")
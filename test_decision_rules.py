@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the declarative decision rules (voice_rules.json, decision_rules)
+"""
+
+import copy
+import time
+import numpy as np
+import problem1_voice_detection as voice_api
+from decision_rules import RuleSet
+from feature_vector import FeatureMatrix, feature_schema
+from test_cascade_detection import FixedFeatureContext
+
+RULES = voice_api.voice_rules
+
+def reference_decision(features):
+    """The two hand-coded AI signatures the bundled rules express"""
+    rms_var, pitch_std = features['rms_var'], features['pitch_std']
+    if rms_var < 0.0015 and pitch_std < 350:
+        return 'AI_GENERATED', 0.90
+    if rms_var > 0.003 and pitch_std > 600 and features['spectral_centroid_std'] < 1280 and features['zcr_std'] < 0.100:
+        return 'AI_GENERATED', 0.85
+    return 'HUMAN', 0.85
+
+def random_features(rng, n):
+    scales = np.array([0.004, 1000, 2000, 0.2])
+    return (rng.random((n, 4)) * scales).astype(np.float32)
+
+def test_batch_matches_single_clip_decisions():
+    """One evaluate() over a matrix gives every row's analyze_voice_patterns answer"""
+    rng = np.random.default_rng(0)
+    values = random_features(rng, 5000)
+    values[rng.random(values.shape) < 0.01] = np.nan
+    matrix = FeatureMatrix(feature_schema(['rms_var', 'pitch_std', 'spectral_centroid_std', 'zcr_std']), values)
+
+    classifications, confidences, explanations = RULES.evaluate(matrix)
+    assert len(classifications) == len(confidences) == len(explanations) == 5000
+    assert set(explanations) == {0, 1, 2}
+    for row in range(0, 5000, 7):
+        features = matrix[row]
+        expected = voice_api.analyze_voice_patterns(features)
+        assert (classifications[row], confidences[row], RULES.explanations[explanations[row]]) == expected
+        if not np.isnan(features.values).any():
+            assert (expected[0], expected[1]) == reference_decision(features)
+
+def test_rules_are_data():
+    """Re-tuned thresholds and extra rules need only a new spec"""
+    spec = copy.deepcopy(RULES.spec)
+    spec['rules'][0]['conditions'][1][2] = 500
+    spec['rules'].append({
+        "name": "flat_mfcc", "label": "AI_GENERATED", "score": 0.6, "explanation": "Flat MFCCs",
+        "conditions": [["mfcc_1_std", "<=", 5.0]]
+    })
+    retuned = RuleSet(spec)
+    assert retuned.digest != RULES.digest
+
+    features = {'rms_var': 0.001, 'pitch_std': 420, 'spectral_centroid_std': 900, 'zcr_std': 0.2, 'mfcc_1_std': 30.0}
+    assert RULES.decide(features)[0] == 'HUMAN'
+    assert retuned.decide(features)[0] == 'AI_GENERATED'
+    assert retuned.decide(dict(features, rms_var=0.01, mfcc_1_std=5.0))[:2] == ('AI_GENERATED', 0.6)
+
+    # The cascade computes rule features outside its tiers in the last tier
+    ctx = FixedFeatureContext(dict(features, rms_var=0.002))
+    assert retuned.cascade(ctx, voice_api.CASCADE_TIERS)[3] == 'spectral'
+    assert 'mfcc_1_std' in ctx.requested
+
+    try:
+        RuleSet(dict(spec, rules=[dict(spec['rules'][0], conditions=[["rms_var", "==", 1]])]))
+        assert False, "unknown comparison accepted"
+    except ValueError:
+        pass
+
+def test_batch_speed():
+    """An archive-sized matrix scores in one pass, far below the per-clip cost"""
+    values = random_features(np.random.default_rng(1), 100000)
+    start = time.perf_counter()
+    RULES.evaluate(values)
+    batch = time.perf_counter() - start
+
+    rows = [dict(zip(RULES.feature_names, row)) for row in values[:500].tolist()]
+    start = time.perf_counter()
+    for features in rows:
+        voice_api.analyze_voice_patterns(features)
+    per_clip = (time.perf_counter() - start) / len(rows)
+    print(f"100000 clips: {batch * 1e3:.1f} ms batched, {per_clip * 1e5:.1f} s one at a time")
+    assert batch < per_clip * 100000 / 20
+
+if __name__ == '__main__':
+    test_batch_matches_single_clip_decisions()
+    test_rules_are_data()
+    test_batch_speed()
+    print("✓ PASSED")
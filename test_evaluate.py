@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the evaluation harness (evaluate.py): accuracy, stage timings and baseline regressions
+"""
+
+import copy
+import csv
+import json
+import os
+import tempfile
+import evaluate
+import problem1_voice_detection as voice_api
+from test_feature_extraction import make_test_clip
+
+def write_manifest(tmp):
+    """Three clips labelled with the service's own decisions, one flipped, one missing"""
+    clips = [(f'clip{seed}.wav', make_test_clip(duration=2.0, sr=44100 if seed else 22050, seed=seed)) for seed in range(3)]
+    path = os.path.join(tmp, 'manifest.csv')
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['path', 'label', 'language'])
+        for i, (name, data) in enumerate(clips):
+            with open(os.path.join(tmp, name), 'wb') as clip:
+                clip.write(data)
+            label = voice_api.analyze_voice_patterns(voice_api.extract_audio_features(data))[0]
+            if i == 2:
+                label = 'AI_GENERATED' if label == 'HUMAN' else 'HUMAN'
+            writer.writerow([name, label, 'English'])
+        writer.writerow(['missing.wav', 'HUMAN', 'English'])
+    return path, label
+
+def test_report():
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest, flipped_label = write_manifest(tmp)
+        report = evaluate.evaluate(manifest, jobs=1, mode='full')
+
+        assert report['clips'] == 4 and report['errors'] == 1
+        assert report['pipelines'] == {'standard': 3, 'streaming': 0, 'segmented': 0}
+        assert report['accuracy'] == 0.5
+        assert sum(sum(row.values()) for row in report['confusion'].values()) == 4
+        assert report['confusion']['HUMAN']['ERROR'] == 1
+        assert [clip['path'] for clip in report['misclassified']] == ['clip2.wav']
+        assert report['misclassified'][0]['label'] == flipped_label
+        assert [clip['path'] for clip in report['failed']] == ['missing.wav']
+
+        stages = report['stages']
+        assert list(stages)[:2] == ['decode', 'resample'] and list(stages)[-2:] == ['decision', 'total']
+        assert {'magnitude', 'pitch', 'rms'} <= set(stages) and 'mfcc' not in stages   # rule inputs only
+        assert stages['decode']['clips'] == 3 and stages['total']['clips'] == 4
+        for stats in stages.values():
+            assert 0 <= stats['p50Ms'] <= stats['p95Ms'] <= stats['p99Ms']
+        assert stages['magnitude']['peakMb'] is None or stages['magnitude']['peakMb'] >= 0
+
+def test_long_clips_take_the_service_paths():
+    """Clips past STREAMING_MIN_SECONDS / AUTO_SEGMENT_SECONDS run the streaming / segmented path, timed whole"""
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest, _ = write_manifest(tmp)
+        original = voice_api.STREAMING_MIN_SECONDS, voice_api.AUTO_SEGMENT_SECONDS
+        try:
+            voice_api.STREAMING_MIN_SECONDS = 1.0
+            streaming = evaluate.evaluate(manifest, jobs=1, mode='full')
+            voice_api.AUTO_SEGMENT_SECONDS = 1.0
+            segmented = evaluate.evaluate(manifest, jobs=1, mode='full')
+        finally:
+            voice_api.STREAMING_MIN_SECONDS, voice_api.AUTO_SEGMENT_SECONDS = original
+
+    assert streaming['pipelines'] == {'standard': 0, 'streaming': 3, 'segmented': 0}
+    assert list(streaming['stages']) == ['streaming', 'total'] and streaming['stages']['streaming']['clips'] == 3
+    assert streaming['accuracy'] == 0.5 and streaming['audioSeconds'] > 5.9   # same answers as the whole-clip path
+    assert segmented['pipelines'] == {'standard': 0, 'streaming': 0, 'segmented': 3}
+    assert list(segmented['stages']) == ['segmented', 'total']
+
+def test_baseline_regressions():
+    """Worse accuracy, more failures or slower/larger stages than the baseline fail the run"""
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest, _ = write_manifest(tmp)
+        baseline_path = os.path.join(tmp, 'baseline.json')
+        assert evaluate.main([manifest, '--jobs', '2', '--save-baseline', baseline_path]) == 0
+        with open(baseline_path) as f:
+            report = json.load(f)
+        assert report['jobs'] == 2 and report['clips'] == 4
+
+        assert evaluate.find_regressions(report, report) == []
+        baseline = copy.deepcopy(report)
+        baseline['accuracy'] = 0.75
+        baseline['perLabel']['HUMAN']['accuracy'] = 1.0
+        baseline['errors'] = 0
+        baseline['stages']['total']['p95Ms'] = (report['stages']['total']['p95Ms'] - evaluate.LATENCY_FLOOR_MS) / 2
+        regressions = evaluate.find_regressions(report, baseline)
+        assert len(regressions) == 4, regressions
+        assert regressions[-1].startswith('total p95')
+
+        # Twice as slow but below the noise floor
+        stage = dict(report['stages']['zcr'], p95Ms=evaluate.LATENCY_FLOOR_MS)
+        assert evaluate.find_regressions(dict(report, stages={'zcr': stage}),
+                                         dict(report, stages={'zcr': dict(stage, p95Ms=stage['p95Ms'] / 2)})) == []
+
+        # Within the tolerances: passes
+        assert evaluate.find_regressions(report, baseline, latency_tolerance=100, accuracy_tolerance=1.0)[0].startswith('1 failed')
+
+        with open(baseline_path, 'w') as f:
+            json.dump(baseline, f)
+        assert evaluate.main([manifest, '--jobs', '1', '--baseline', baseline_path]) == 1
+
+if __name__ == '__main__':
+    test_report()
+    test_long_clips_take_the_service_paths()
+    test_baseline_regressions()
+    print("✓ PASSED")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the content-addressed feature cache
+"""
+
+import base64
+import tempfile
+from feature_cache import FeatureCache
+from feature_vector import FeatureVector
+import problem1_voice_detection as voice_api
+from test_feature_extraction import make_test_clip
+
+FEATURES = {'rms_var': 0.002, 'pitch_std': 120.0}
+
+def make_result(classification='HUMAN', confidence=0.85, explanation='x'):
+    return {
+        "features": FEATURES,
+        "classification": classification,
+        "confidence": confidence,
+        "explanation": explanation
+    }
+
+def test_memory_tier_lru_eviction():
+    """Least recently used entries are evicted first"""
+    cache = FeatureCache(max_entries=2)
+    cache.put('a', make_result())
+    cache.put('b', make_result())
+    assert cache.get('a') is not None   # 'a' is now most recent
+    cache.put('c', make_result())
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    stats = cache.stats()
+    assert stats['memoryHits'] == 3 and stats['misses'] == 1 and stats['entries'] == 2
+
+def test_disk_tier_shared_between_instances():
+    """A second cache (another worker, or after a restart) reads the disk tier"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        key = FeatureCache.key_for(b'some audio bytes')
+        FeatureCache(cache_dir=cache_dir).put(key, make_result('AI_GENERATED', 0.9, 'classic'))
+
+        other = FeatureCache(cache_dir=cache_dir)
+        entry = other.get(key)
+        assert entry['classification'] == 'AI_GENERATED'
+        assert entry['features'] == FeatureVector.from_mapping(FEATURES)   # stored at float32
+        assert other.stats()['diskHits'] == 1
+
+        # A different extractor configuration must not see the entry
+        assert FeatureCache(cache_dir=cache_dir, namespace='other').get(key) is None
+
+def test_detect_voice_type_uses_cache():
+    """The second request for the same clip is a cache hit with the same answer"""
+    audio_base64 = base64.b64encode(make_test_clip(seed=7)).decode('utf-8')
+    before = voice_api.feature_cache.stats()
+
+    first = voice_api.detect_voice_type(audio_base64, 'English')
+    second = voice_api.detect_voice_type(audio_base64, 'English')
+    after = voice_api.feature_cache.stats()
+
+    assert first == second
+    assert after['misses'] == before['misses'] + 1
+    assert after['hits'] == before['hits'] + 1
+
+    health = voice_api.app.test_client().get('/health').get_json()
+    assert health['featureCache']['hits'] == after['hits']
+
+if __name__ == '__main__':
+    test_memory_tier_lru_eviction()
+    test_disk_tier_shared_between_instances()
+    test_detect_voice_type_uses_cache()
+    print("✓ PASSED")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Feature extraction consistency tests
+Checks the optimized extraction paths against plain per-feature librosa calls
+"""
+
+import io
+import numpy as np
+import librosa
+import soundfile as sf
+from problem1_voice_detection import (
+    extract_audio_features, pitch_statistics, FeatureContext, ANALYSIS_FEATURES, SAMPLE_RATE
+)
+
+def make_test_clip(duration=3.0, sr=SAMPLE_RATE, seed=0):
+    """Synthesize a deterministic voice-like WAV clip and return its bytes"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(sr * duration)) / sr
+    pitch = 140 + 40 * np.sin(2 * np.pi * 1.5 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sr
+    signal = sum(np.sin(k * phase) / k for k in range(1, 6))
+    signal *= 0.5 + 0.4 * np.sin(2 * np.pi * 3 * t)
+    signal += 0.02 * rng.standard_normal(len(t))
+    signal = (0.8 * signal / np.max(np.abs(signal))).astype(np.float32)
+
+    buffer = io.BytesIO()
+    sf.write(buffer, signal, sr, format='WAV', subtype='FLOAT')
+    return buffer.getvalue()
+
+def test_shared_stft_matches_per_feature_calls():
+    """Features derived from the shared STFT match librosa's y= calls"""
+    audio_data = make_test_clip()
+    features = extract_audio_features(audio_data)
+
+    y, sr = librosa.load(io.BytesIO(audio_data), sr=SAMPLE_RATE)
+    reference = {
+        'spectral_centroid_std': np.std(librosa.feature.spectral_centroid(y=y, sr=sr)[0]),
+        'spectral_bandwidth_std': np.std(librosa.feature.spectral_bandwidth(y=y, sr=sr)[0]),
+        'spectral_rolloff_std': np.std(librosa.feature.spectral_rolloff(y=y, sr=sr)[0]),
+        'mfcc_3_std': np.std(librosa.feature.mfcc(y=y, sr=sr, n_mfcc=20)[3]),
+        'chroma_mean': np.mean(librosa.feature.chroma_stft(y=y, sr=sr)),
+        'spectral_contrast_std': np.std(librosa.feature.spectral_contrast(y=y, sr=sr)),
+        'rms_var': np.var(librosa.feature.rms(y=y)[0]),
+        'zcr_std': np.std(librosa.feature.zero_crossing_rate(y)[0]),
+    }
+
+    for key, expected in reference.items():
+        print(f"  {key}: {features[key]} (reference {expected})")
+        assert np.isclose(features[key], expected, rtol=1e-5), key
+
+def test_vectorized_pitch_statistics():
+    """Vectorized pitch statistics equal the per-frame loop exactly"""
+    y, sr = librosa.load(io.BytesIO(make_test_clip(seed=1)), sr=SAMPLE_RATE)
+    pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
+
+    pitch_values = []
+    for t in range(pitches.shape[1]):
+        pitch = pitches[magnitudes[:, t].argmax(), t]
+        if pitch > 0:
+            pitch_values.append(pitch)
+
+    stats = pitch_statistics(pitches, magnitudes)
+    assert stats['pitch_mean'] == np.mean(pitch_values)
+    assert stats['pitch_std'] == np.std(pitch_values)
+    assert stats['pitch_var'] == np.var(pitch_values)
+    assert stats['pitch_range'] == np.max(pitch_values) - np.min(pitch_values)
+
+    silent = pitch_statistics(np.zeros((1025, 10)), np.zeros((1025, 10)))
+    assert silent == {'pitch_mean': 0, 'pitch_std': 0, 'pitch_var': 0, 'pitch_range': 0}
+
+def test_lazy_registry_computes_only_requested_features():
+    """Time-domain features never trigger the STFT; subsets match the full set"""
+    audio_data = make_test_clip(seed=2)
+    y, sr = librosa.load(io.BytesIO(audio_data), sr=SAMPLE_RATE)
+
+    ctx = FeatureContext(y, sr)
+    assert set(ctx.features(['rms_var', 'zcr_std'])) == {'rms_var', 'zcr_std'}
+    assert 'magnitude' not in ctx._values
+
+    full = extract_audio_features(audio_data)
+    subset = extract_audio_features(audio_data, ANALYSIS_FEATURES)
+    assert list(subset) == ANALYSIS_FEATURES
+    assert all(subset[name] == full[name] for name in ANALYSIS_FEATURES)
+
+    try:
+        ctx.features(['not_a_feature'])
+        assert False, "unknown feature accepted"
+    except ValueError:
+        pass
+
+if __name__ == '__main__':
+    test_shared_stft_matches_per_feature_calls()
+    test_vectorized_pitch_statistics()
+    test_lazy_registry_computes_only_requested_features()
+    print("✓ PASSED")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for the memory-mapped feature store and build_feature_store.py
+"""
+
+import csv
+import os
+import tempfile
+import time
+import numpy as np
+import build_feature_store
+import problem1_voice_detection as voice_api
+import train_voice_model
+from feature_store import StaleFeatureStore, open_store
+from feature_vector import FeatureMatrix, feature_schema
+from test_feature_extraction import make_test_clip
+from test_voice_model import tone_clip
+
+NAMES = [f'f{i}' for i in range(8)]
+
+def test_append_load_and_torn_tail():
+    """Appended rows come back memory-mapped; an uncommitted tail is ignored and overwritten"""
+    with tempfile.TemporaryDirectory() as root:
+        store = open_store(root, 'cfg1', NAMES)
+        first = np.arange(16, dtype=np.float32).reshape(2, 8)
+        store.append(first, ['a.mp3', 'ünï.mp3'], ['AI_GENERATED', None], ['English', None])
+        # A feature mapping per row, in any key order
+        store.append([dict(zip(reversed(NAMES), range(8, 0, -1)))], ['c.wav'], ['human'], ['Tamil'])
+
+        # A crash after writing some columns but before the commit
+        with open(os.path.join(root, 'cfg1', 'features.f32'), 'ab') as f:
+            f.write(b'\xff' * 40)
+
+        loaded = open_store(root, 'cfg1').load()
+        assert len(loaded) == 3 and loaded.matrix.schema is feature_schema(NAMES)
+        assert not loaded.matrix.values.flags.owndata
+        assert np.array_equal(loaded.matrix.values[:2], first)
+        assert np.array_equal(loaded.matrix.values[2], np.arange(1, 9, dtype=np.float32))
+        assert loaded.file_ids.tolist() == ['a.mp3', 'ünï.mp3', 'c.wav'] and loaded.file_ids[1] == 'ünï.mp3'
+        assert loaded.labels.tolist() == [1, -1, 0]
+        assert loaded.languages == ['English', 'Tamil'] and loaded.language_mask('Tamil').tolist() == [False, False, True]
+
+        store.append(np.ones((1, 8), dtype=np.float32), ['d.mp3'])
+        loaded = open_store(root, 'cfg1').load()
+        assert len(loaded) == 4 and np.array_equal(loaded.matrix.values[3], np.ones(8))
+        assert os.path.getsize(os.path.join(root, 'cfg1', 'features.f32')) == 4 * 8 * 4
+
+def test_stale_versions():
+    """Features of another extractor configuration are reported, never served as current"""
+    with tempfile.TemporaryDirectory() as root:
+        open_store(root, 'old', NAMES).append(np.zeros((5, 8), dtype=np.float32), [str(i) for i in range(5)])
+        try:
+            open_store(root, 'new')
+            assert False, "stale store served"
+        except StaleFeatureStore as e:
+            assert 'old (5 rows)' in str(e)
+
+        store = open_store(root, 'new', NAMES)
+        assert store.rows == 0 and store.stale_versions() == {'old': 5}
+        assert store.prune_stale() == ['old'] and store.stale_versions() == {}
+
+def test_million_rows_load_in_milliseconds():
+    with tempfile.TemporaryDirectory() as root:
+        store = open_store(root, 'cfg', NAMES)
+        values = np.random.default_rng(0).random((1_000_000, 8), dtype=np.float32)
+        store.append(FeatureMatrix(feature_schema(NAMES), values), [f'{i}' for i in range(1_000_000)],
+                     np.tile([1, 0], 500_000))
+
+        start = time.perf_counter()
+        loaded = open_store(root, 'cfg').load()
+        elapsed = time.perf_counter() - start
+        print(f"opened 1M rows in {elapsed * 1e3:.2f} ms")
+        assert elapsed < 0.1
+        assert np.array_equal(loaded.matrix.column('f3'), values[:, 3]) and loaded.labels.sum() == 500_000
+
+def test_build_resume_and_train_from_store():
+    """build_feature_store extracts a manifest once; training reads the store without audio"""
+    with tempfile.TemporaryDirectory() as tmp:
+        clips = [(f'human{seed}.wav', 'HUMAN', make_test_clip(duration=2.0, seed=seed)) for seed in range(3)]
+        clips += [(f'ai{i}.wav', 'AI_GENERATED', tone_clip(frequency, 2.0)) for i, frequency in enumerate((150, 200, 250))]
+        manifest = os.path.join(tmp, 'manifest.csv')
+        with open(manifest, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['path', 'label', 'language'])
+            for name, label, data in clips[:4]:
+                with open(os.path.join(tmp, name), 'wb') as clip:
+                    clip.write(data)
+                writer.writerow([name, label, 'English'])
+            writer.writerow(['missing.wav', 'HUMAN', 'Hindi'])
+
+        root = os.path.join(tmp, 'store')
+        store = build_feature_store.build(manifest, root, 'analysis', jobs=1)
+        assert store.rows == 4 and store.config_hash == voice_api.feature_config_hash()
+
+        # Two more clips: only they are extracted on the rerun
+        with open(manifest, 'a', newline='') as f:
+            writer = csv.writer(f)
+            for name, label, data in clips[4:]:
+                with open(os.path.join(tmp, name), 'wb') as clip:
+                    clip.write(data)
+                writer.writerow([name, label, 'Hindi'])
+        store = build_feature_store.build(manifest, root, 'analysis', jobs=2, chunk=1)
+        loaded = store.load()
+        assert loaded.file_ids.tolist() == [name for name, _, _ in clips]
+        assert loaded.labels.tolist() == [0, 0, 0, 1, 1, 1]
+        assert loaded.language_mask('Hindi').sum() == 2
+
+        expected = voice_api.extract_audio_features(clips[0][2], voice_api.ANALYSIS_FEATURES)
+        assert np.array_equal(loaded.matrix.values[0], expected.values)
+
+        output = os.path.join(tmp, 'model.joblib')
+        train_voice_model.main(['--store', root, '-o', output, '--trees', '10', '--jobs', '1'])
+        assert os.path.exists(output)
+
+if __name__ == '__main__':
+    test_append_load_and_torn_tail()
+    test_stale_versions()
+    test_million_rows_load_in_milliseconds()
+    test_build_resume_and_train_from_store()
+    print("✓ PASSED")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for the array-backed FeatureVector / FeatureMatrix types
+"""
+
+import pickle
+import tempfile
+import time
+import numpy as np
+from feature_cache import FeatureCache
+from feature_vector import FeatureMatrix, FeatureVector, feature_schema
+import problem1_voice_detection as voice_api
+from test_feature_extraction import make_test_clip
+
+def test_vector_reads_like_a_dict():
+    """Mapping access, select and to_dict over one float32 array"""
+    vector = FeatureVector.from_mapping({'rms_var': 0.002, 'pitch_std': 120.0, 'zcr_std': 0.05})
+    assert vector.values.dtype == np.float32 and vector.values.shape == (3,)
+    assert list(vector) == ['rms_var', 'pitch_std', 'zcr_std']
+    assert vector['pitch_std'] == 120.0 and isinstance(vector['pitch_std'], float)
+    assert vector.get('missing', 7) == 7 and 'rms_var' in vector
+    assert vector['rms_var'] == float(np.float32(0.002))
+
+    picked = vector.select(['zcr_std', 'rms_var'])
+    assert list(picked.to_dict()) == ['zcr_std', 'rms_var']
+    assert picked.schema is feature_schema(['zcr_std', 'rms_var'])
+
+    # Pickling (pool results) keeps the shared schema
+    assert pickle.loads(pickle.dumps(vector)).schema is vector.schema
+
+def test_extraction_and_stacking():
+    """Extraction returns vectors that stack into one matrix of row views"""
+    vectors = [voice_api.extract_audio_features(make_test_clip(duration=2.0, seed=seed), voice_api.ANALYSIS_FEATURES)
+               for seed in range(3)]
+    assert all(isinstance(vector, FeatureVector) for vector in vectors)
+    assert len({id(vector.schema) for vector in vectors}) == 1
+
+    matrix = FeatureMatrix.stack(vectors)
+    assert matrix.values.shape == (3, len(voice_api.ANALYSIS_FEATURES))
+    assert np.array_equal(matrix.column('pitch_std'), [vector['pitch_std'] for vector in vectors])
+    assert np.shares_memory(matrix[1].values, matrix.values)
+    assert matrix[2] == vectors[2]
+
+    # Decisions are the same from the vector and from its plain-dict copy
+    assert voice_api.analyze_voice_patterns(vectors[0]) == voice_api.analyze_voice_patterns(vectors[0].to_dict())
+
+    # Thousands of same-schema vectors stack without per-feature work
+    many = [FeatureVector(matrix.schema, row) for row in np.random.default_rng(0).random((5000, len(matrix.schema)))]
+    start = time.perf_counter()
+    stacked = FeatureMatrix.stack(many)
+    elapsed = time.perf_counter() - start
+    print(f"stacked 5000 vectors in {elapsed * 1e3:.1f} ms")
+    assert stacked.values.shape == (5000, len(matrix.schema)) and elapsed < 0.5
+
+def test_cache_round_trip():
+    """The cache holds vectors and restores them from its JSON disk tier"""
+    features = voice_api.extract_audio_features(make_test_clip(duration=2.0, seed=4), voice_api.ANALYSIS_FEATURES)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        result = {"features": features, "classification": "HUMAN", "confidence": 0.8, "explanation": "x"}
+        assert FeatureCache(cache_dir=cache_dir).put('k', result)['features'] is features
+        restored = FeatureCache(cache_dir=cache_dir).get('k')['features']
+    assert isinstance(restored, FeatureVector) and restored.schema is features.schema
+    assert np.array_equal(restored.values, features.values)
+
+if __name__ == '__main__':
+    test_vector_reads_like_a_dict()
+    test_extraction_and_stacking()
+    test_cache_round_trip()
+    print("✓ PASSED")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for the live (chunked upload, NDJSON response) detection endpoint
+"""
+
+import glob
+import io
+import json
+import numpy as np
+import soundfile as sf
+import problem1_voice_detection as voice_api
+from audio_decode import StreamDecoder, decode_audio
+from test_feature_extraction import make_test_clip
+
+HEADERS = {"x-api-key": voice_api.API_KEY, "x-language": "English", "Content-Type": "application/octet-stream"}
+
+def post_live(data, **headers):
+    response = voice_api.app.test_client().post('/api/voice-detection/live', data=data, headers=dict(HEADERS, **headers))
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    response.close()
+    return response, lines
+
+def test_stream_decoder_pcm_and_mp3():
+    """Chunked decoding reproduces the one-shot decode"""
+    y = (0.5 * np.sin(np.arange(16000 * 2) / 7)).astype(np.float32)
+    pcm = (y * 32767).astype('<i2').tobytes()
+    decoder = StreamDecoder('pcm_s16le', 16000, sample_rate=16000)
+    streamed = np.concatenate([decoder.feed(pcm[i:i + 333]) for i in range(0, len(pcm), 333)] + [decoder.finish()])
+    assert np.array_equal(streamed, np.frombuffer(pcm, '<i2') / np.float32(32768))
+
+    paths = sorted(glob.glob('*.mp3'))
+    assert 'sample voice 1.mp3' in paths and any(path.startswith('ElevenLabs') for path in paths)
+    for path in paths:
+        with open(path, 'rb') as f:
+            mp3 = f.read()
+        expected, _ = decode_audio(mp3, voice_api.SAMPLE_RATE)
+        for size in (417, 4096):
+            decoder = StreamDecoder('mp3', voice_api.SAMPLE_RATE)
+            streamed = np.concatenate([decoder.feed(mp3[i:i + size]) for i in range(0, len(mp3), size)] + [decoder.finish()])
+            assert np.array_equal(streamed, expected), (path, size, len(streamed), len(expected))
+
+def test_live_pcm_stream():
+    """Provisional updates every interval, then a final result like the one-shot analysis"""
+    y, sr = sf.read(io.BytesIO(make_test_clip(duration=8.0, sr=16000, seed=12)), dtype='float32')
+    pcm = (y * 32767).astype('<i2').tobytes()
+    response, lines = post_live(pcm, **{"x-audio-format": "pcm_s16le", "x-sample-rate": "16000", "x-update-interval": "2"})
+
+    assert response.status_code == 200 and response.mimetype == 'application/x-ndjson'
+    assert [line['status'] for line in lines[:-1]] == ['provisional'] * (len(lines) - 1)
+    assert len(lines) >= 5 and lines[-1]['final'] and lines[-1]['analyzedSeconds'] == 8.0
+
+    wav = io.BytesIO()
+    sf.write(wav, np.frombuffer(pcm, '<i2'), 16000, format='WAV', subtype='PCM_16')
+    assert lines[-1]['classification'] == voice_api.analyze_audio(wav.getvalue(), 'full')['classification']
+    assert voice_api._live_stream_count == 0
+
+def test_live_mp3_stream():
+    """An MP3 call, read in LIVE_READ_BYTES pieces, ends with the one-shot answer"""
+    with open('sample voice 1.mp3', 'rb') as f:
+        mp3 = f.read()
+    response, lines = post_live(mp3, **{"x-audio-format": "mp3"})
+    expected = voice_api.analyze_audio(mp3, 'full')
+    assert response.status_code == 200 and lines[-1]['final']
+    assert lines[-1]['classification'] == expected['classification']
+    assert lines[-1]['confidenceScore'] == round(expected['confidence'], 2)
+
+def test_live_validation_and_capacity():
+    assert post_live(b'', **{"x-audio-format": "pcm_s16le"})[0].status_code == 400
+    assert post_live(b'', **{"x-audio-format": "ogg"})[0].status_code == 400
+
+    original = voice_api.LIVE_MAX_STREAMS
+    voice_api.LIVE_MAX_STREAMS = 0
+    try:
+        assert post_live(b'\0\0', **{"x-audio-format": "pcm_s16le", "x-sample-rate": "8000"})[0].status_code == 503
+    finally:
+        voice_api.LIVE_MAX_STREAMS = original
+
+def test_live_stream_without_audio():
+    """A stream that ends before any audio is decoded gets an error line, not a classification"""
+    for data, headers in ((b'', {"x-audio-format": "pcm_s16le", "x-sample-rate": "8000"}),
+                          (b'\xff\xfb\x90\x00', {"x-audio-format": "mp3"})):
+        response, lines = post_live(data, **headers)
+        assert response.status_code == 200
+        assert lines == [{"status": "error", "final": True, "message": "No audio received"}]
+
+def test_failed_setup_holds_no_slot():
+    """A stream whose session cannot be built never holds a live slot"""
+    def broken_session(*args):
+        raise RuntimeError("decoder unavailable")
+    original = voice_api.LiveSession
+    voice_api.LiveSession = broken_session
+    try:
+        response = voice_api.app.test_client().post('/api/voice-detection/live', data=b'\0\0', headers=dict(
+            HEADERS, **{"x-audio-format": "pcm_s16le", "x-sample-rate": "8000"}))
+    finally:
+        voice_api.LiveSession = original
+    assert response.status_code == 500 and voice_api._live_stream_count == 0
+
+if __name__ == '__main__':
+    test_stream_decoder_pcm_and_mp3()
+    test_live_pcm_stream()
+    test_live_mp3_stream()
+    test_live_validation_and_capacity()
+    test_live_stream_without_audio()
+    test_failed_setup_holds_no_slot()
+    print("✓ PASSED")
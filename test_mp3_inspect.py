@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for header-only MP3 inspection and the routing/rejection it drives
+"""
+
+import base64
+import glob
+import time
+import problem1_voice_detection as voice_api
+from audio_decode import decode_audio
+from benchmark_memory import synthetic_mp3
+from mp3_inspect import inspect_mp3, read_id3v2_text
+from test_feature_extraction import make_test_clip
+
+HEADERS = {"x-api-key": voice_api.API_KEY}
+
+def id3v23_tag(frame_id, text):
+    """Minimal ID3v2.3 tag holding one latin-1 text frame"""
+    body = b'\0' + text.encode('latin-1')
+    frame = frame_id.encode('ascii') + len(body).to_bytes(4, 'big') + b'\0\0' + body
+    size = len(frame)
+    syncsafe = bytes((size >> shift) & 0x7f for shift in (21, 14, 7, 0))
+    return b'ID3\x03\x00\x00' + syncsafe + frame
+
+def test_bundled_clips_match_decoded_duration():
+    """CBR estimates (no Xing header) land within a frame or two of the decoded length"""
+    for path in sorted(glob.glob('*.mp3')):
+        with open(path, 'rb') as f:
+            data = f.read()
+        info = inspect_mp3(data)
+        y, sr = decode_audio(data, voice_api.SAMPLE_RATE)
+        print(path, info['duration'], len(y) / sr, info['encoder'])
+        assert info['durationSource'] == 'cbr' and not info['vbr']
+        assert abs(info['duration'] - len(y) / sr) < 0.05
+
+def test_xing_lame_header():
+    """LAME VBR files report the exact (gapless) duration and the encoder tag"""
+    info = inspect_mp3(synthetic_mp3(30.0))
+    assert info['durationSource'] == 'xing' and info['vbr']
+    assert info['encoder'].startswith('LAME')
+    assert abs(info['duration'] - 30.0) < 1e-3
+    assert info['sample_rate'] == 44100 and info['channels'] == 2
+
+def test_id3_encoder_and_non_mp3():
+    with open('Standard recording 1.mp3', 'rb') as f:
+        data = f.read()
+    tagged = inspect_mp3(id3v23_tag('TSSE', 'Lavf61.1.100') + data)
+    assert tagged['encoder'] == 'Lavf61.1.100'
+    assert tagged['duration'] == inspect_mp3(data)['duration']
+
+    assert inspect_mp3(make_test_clip(duration=2.0)) is None
+    assert inspect_mp3(b'\0' * 4096) is None
+
+def test_truncated_headers():
+    """Xing/VBRI/ID3 headers cut off by the end of the data are ignored, never raise"""
+    frame_start = b'\xff\xfb\x90\x00' + b'\0' * 32
+    for data in (frame_start + b'Xing\0\0', frame_start + b'Xing\0\0\0\x03\0\0', frame_start + b'VBRI\0\x01'):
+        info = inspect_mp3(data)
+        assert info['durationSource'] == 'cbr' and not info['vbr']
+
+    extended = b'ID3\x03\x00\x40\x00\x00\x01\x00\x00\x00'
+    assert read_id3v2_text(extended) == {}
+    assert inspect_mp3(extended + frame_start) is None
+
+def test_inspection_is_cheap():
+    """Header inspection stays in the microsecond range (no decoding)"""
+    data = synthetic_mp3(60.0)
+    start = time.perf_counter()
+    for _ in range(100):
+        inspect_mp3(data)
+    per_call = (time.perf_counter() - start) / 100
+    print(f"inspect_mp3: {per_call * 1e6:.1f} us")
+    assert per_call < 1e-3
+
+def post_mp3(data, **fields):
+    return voice_api.app.test_client().post('/api/voice-detection', headers=HEADERS, json=dict({
+        "language": "English",
+        "audioFormat": "mp3",
+        "audioBase64": base64.b64encode(data).decode('utf-8')
+    }, **fields))
+
+def test_rejection_and_auto_segmentation():
+    data = synthetic_mp3(30.0)
+    original = voice_api.MAX_AUDIO_SECONDS, voice_api.AUTO_SEGMENT_SECONDS
+    try:
+        voice_api.MAX_AUDIO_SECONDS = 20
+        assert post_mp3(data).status_code == 413
+
+        voice_api.MAX_AUDIO_SECONDS = 3600
+        voice_api.AUTO_SEGMENT_SECONDS = 25
+        body = post_mp3(data).get_json()
+        assert body['decisionTier'] == 'segmented' and body['segments']
+        assert body['audioInfo']['encoder'].startswith('LAME')
+
+        # An explicit analysisMode is never overridden
+        body = post_mp3(data, analysisMode='standard').get_json()
+        assert 'segments' not in body and body['audioInfo']['durationSource'] == 'xing'
+    finally:
+        voice_api.MAX_AUDIO_SECONDS, voice_api.AUTO_SEGMENT_SECONDS = original
+
+if __name__ == '__main__':
+    test_bundled_clips_match_decoded_duration()
+    test_xing_lame_header()
+    test_id3_encoder_and_non_mp3()
+    test_truncated_headers()
+    test_inspection_is_cheap()
+    test_rejection_and_auto_segmentation()
+    print("✓ PASSED")
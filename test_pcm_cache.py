@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the decoded-PCM disk cache and the offline file loader
+"""
+
+import os
+import tempfile
+import time
+import numpy as np
+import audio_decode
+import problem1_voice_detection as voice_api
+from pcm_cache import EVICT_FRACTION, PCMCache
+from test_feature_extraction import make_test_clip
+
+SAMPLE_MP3 = 'sample voice 1.mp3'
+
+def test_hit_returns_mapped_samples():
+    """A second load maps the stored samples; other decode settings are separate entries"""
+    audio_data = make_test_clip(sr=44100, seed=4)
+    expected, _ = audio_decode.decode_audio(audio_data, 22050, audio_format='wav')
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = PCMCache(tmp)
+        y, sr = cache.load(audio_data, 22050, audio_format='wav')
+        assert sr == 22050 and np.array_equal(y, expected)
+        y, _ = cache.load(audio_data, 22050, audio_format='wav')
+        assert isinstance(y, np.memmap) and not y.flags.writeable
+        assert np.array_equal(y, expected) and (cache.hits, cache.misses) == (1, 1)
+
+        y, _ = cache.load(audio_data, 22050, res_type='soxr_lq', audio_format='wav')
+        assert cache.misses == 2 and len(cache.entries()) == 2
+        assert not np.array_equal(y, expected)
+
+def test_lru_eviction_to_size_cap():
+    clips = [make_test_clip(duration=1.0, sr=22050, seed=seed) for seed in range(4)]
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = PCMCache(tmp, max_bytes=3 * (22050 * 4 + 128))
+        for audio_data in clips[:3]:
+            cache.load(audio_data, 22050, audio_format='wav')
+        assert len(cache.entries()) == 3
+        past = time.time() - 100
+        for offset, (_, _, path) in enumerate(cache.entries()):
+            os.utime(path, (past + offset, past + offset))
+
+        cache.load(clips[0], 22050, audio_format='wav')   # a hit makes clip 0 the most recent
+        cache.load(clips[3], 22050, audio_format='wav')    # over the cap: evicts down to EVICT_FRACTION
+        assert len(cache.entries()) == 2 and cache.size() <= cache.max_bytes * EVICT_FRACTION
+        cache.load(clips[1], 22050, audio_format='wav')
+        cache.load(clips[0], 22050, audio_format='wav')
+        assert (cache.hits, cache.misses) == (2, 5)
+
+def test_fill_walks_only_on_eviction():
+    """Misses under the cap never walk the directory; the tracked size matches it"""
+    clips = [make_test_clip(duration=0.5, sr=22050, seed=seed) for seed in range(6)]
+    with tempfile.TemporaryDirectory() as tmp:
+        PCMCache(tmp).load(clips[0], 22050, audio_format='wav')
+        cache = PCMCache(tmp, max_bytes=5 * (11025 * 4 + 128))
+        walks = []
+        entries = cache.entries
+        cache.entries = lambda: walks.append(1) or entries()
+        for audio_data in clips[1:5]:
+            cache.load(audio_data, 22050, audio_format='wav')
+        assert walks == [] and cache._bytes == cache.size()
+        walks.clear()
+        cache.load(clips[5], 22050, audio_format='wav')
+        assert len(walks) == 1 and cache._bytes == cache.size() <= cache.max_bytes * EVICT_FRACTION
+
+def test_file_features_match_uploads():
+    """extract_file_features gives extract_audio_features' values, decoding a file only once"""
+    audio_data = make_test_clip(duration=3.0, sr=44100, seed=5)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'clip.wav')
+        with open(path, 'wb') as f:
+            f.write(audio_data)
+        original = voice_api.PCM_CACHE_DIR, voice_api._pcm_cache
+        voice_api.PCM_CACHE_DIR, voice_api._pcm_cache = os.path.join(tmp, 'pcm'), None
+        try:
+            expected = voice_api.extract_audio_features(audio_data, voice_api.ANALYSIS_FEATURES)
+            for _ in range(2):
+                features = voice_api.extract_file_features(path, voice_api.ANALYSIS_FEATURES)
+                assert np.array_equal(features.values, expected.values)
+            assert voice_api.get_pcm_cache().hits == 1
+
+            if os.path.exists(SAMPLE_MP3):
+                start = time.perf_counter()
+                decoded, _ = voice_api.load_audio_file(SAMPLE_MP3)
+                decode_time = time.perf_counter() - start
+                start = time.perf_counter()
+                cached, _ = voice_api.load_audio_file(SAMPLE_MP3)
+                np.asarray(cached).sum()
+                cached_time = time.perf_counter() - start
+                print(f"{SAMPLE_MP3}: decoded in {decode_time * 1e3:.1f} ms, cached open {cached_time * 1e3:.2f} ms")
+                assert np.array_equal(decoded, cached) and cached_time < decode_time / 5
+        finally:
+            voice_api.PCM_CACHE_DIR, voice_api._pcm_cache = original
+
+if __name__ == '__main__':
+    test_hit_returns_mapped_samples()
+    test_lru_eviction_to_size_cap()
+    test_fill_walks_only_on_eviction()
+    test_file_features_match_uploads()
+    print("✓ PASSED")
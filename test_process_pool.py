@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for process-pool execution behind /api/voice-detection
+"""
+
+import base64
+import time
+import problem1_voice_detection as voice_api
+from test_feature_extraction import make_test_clip
+
+HEADERS = {"x-api-key": voice_api.API_KEY}
+
+def post_clip(seed):
+    payload = {
+        "language": "English",
+        "audioFormat": "mp3",
+        "audioBase64": base64.b64encode(make_test_clip(duration=2.0, seed=seed)).decode('utf-8')
+    }
+    return voice_api.app.test_client().post('/api/voice-detection', json=payload, headers=HEADERS)
+
+def run_with_pool(timeout, fn):
+    original = voice_api.POOL_WORKERS, voice_api.REQUEST_TIMEOUT
+    voice_api.POOL_WORKERS, voice_api.REQUEST_TIMEOUT = 1, timeout
+    try:
+        return fn()
+    finally:
+        voice_api.reset_process_pool()
+        voice_api.POOL_WORKERS, voice_api.REQUEST_TIMEOUT = original
+
+def test_pool_matches_in_process():
+    """Pool execution returns the same result as the in-process path"""
+    in_process = post_clip(seed=11).get_json()
+    voice_api.feature_cache._entries.clear()
+    pooled = run_with_pool(120, lambda: post_clip(seed=11))
+
+    print(pooled.get_json())
+    assert pooled.status_code == 200
+    assert pooled.get_json()['classification'] == in_process['classification']
+
+def test_timeout_returns_504():
+    """A request that exceeds its budget gets a clean 504"""
+    response = run_with_pool(0.001, lambda: post_clip(seed=12))
+
+    print(response.get_json())
+    assert response.status_code == 504
+    assert response.get_json()['status'] == "error"
+
+def test_timeout_message_names_applied_budget():
+    """An explicit timeout= is the one the DetectionTimeout reports"""
+    def sleep_past_budget():
+        try:
+            voice_api.run_in_pool(time.sleep, 1, timeout=0.05)
+        except voice_api.DetectionTimeout as e:
+            return str(e)
+    assert run_with_pool(120, sleep_past_budget) == "Processing exceeded 0.05s budget"
+
+if __name__ == '__main__':
+    test_pool_matches_in_process()
+    test_timeout_returns_504()
+    test_timeout_message_names_applied_budget()
+    print("✓ PASSED")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for segmented (per-window) analysis of long recordings
+"""
+
+import base64
+import io
+import numpy as np
+import soundfile as sf
+import problem1_voice_detection as voice_api
+from audio_decode import iter_windows
+from test_feature_extraction import make_test_clip
+from test_process_pool import run_with_pool
+
+SR = voice_api.SAMPLE_RATE
+HEADERS = {"x-api-key": voice_api.API_KEY}
+
+def call_with_synthetic_segment():
+    """60 s call: voice-like audio with a steady, machine-like tone from 20 s to 40 s"""
+    human, _ = sf.read(io.BytesIO(make_test_clip(duration=20.0, sr=SR, seed=1)), dtype='float32')
+    t = np.arange(20 * SR) / SR
+    tone = (0.3 * np.sin(2 * np.pi * 180 * t)).astype(np.float32)
+    buffer = io.BytesIO()
+    sf.write(buffer, np.concatenate([human, tone, human]), SR, format='WAV', subtype='FLOAT')
+    return buffer.getvalue()
+
+def test_iter_windows_overlap():
+    """Windows overlap by window - hop and the blocking of the input does not matter"""
+    y = np.arange(25, dtype=np.float32)
+    for block in (1, 4, 7, 25):
+        windows = list(iter_windows((y[i:i + block] for i in range(0, len(y), block)), 10, 5))
+        assert [start for start, _ in windows] == [0, 5, 10, 15]
+        for start, window in windows:
+            assert np.array_equal(window, y[start:start + 10])
+    assert len(list(iter_windows([y[:3]], 10, 5))[0][1]) == 3
+
+def test_segment_timeline_finds_partial_ai():
+    """Only the windows covering the tone are AI; the call verdict follows them"""
+    result = voice_api.analyze_segmented(call_with_synthetic_segment())
+    timeline = [(s['start'], s['classification']) for s in result['segments']]
+    print(timeline, result['explanation'])
+
+    assert timeline[0] == (0.0, 'HUMAN') and timeline[-1] == (40.0, 'HUMAN')
+    assert (20.0, 'AI_GENERATED') in timeline
+    assert result['classification'] == 'AI_GENERATED'
+    assert result['audioDuration'] == {"received": 60.0, "analyzed": 60.0}
+
+def test_segmented_endpoint_with_pool():
+    """Pooled segments give the same timeline, returned through the API"""
+    audio_data = call_with_synthetic_segment()
+    expected = voice_api.analyze_segmented(audio_data)
+
+    def post():
+        return voice_api.app.test_client().post('/api/voice-detection', headers=HEADERS, json={
+            "language": "English",
+            "audioFormat": "mp3",
+            "analysisMode": "segmented",
+            "audioBase64": base64.b64encode(audio_data).decode('utf-8')
+        })
+    response = run_with_pool(120, post)
+    body = response.get_json()
+
+    assert response.status_code == 200
+    assert body['classification'] == expected['classification']
+    assert [s['classification'] for s in body['segments']] == [s['classification'] for s in expected['segments']]
+
+def test_invalid_analysis_mode():
+    response = voice_api.app.test_client().post('/api/voice-detection', headers=HEADERS, json={
+        "language": "English",
+        "audioFormat": "mp3",
+        "analysisMode": "everything",
+        "audioBase64": "AAAA"
+    })
+    assert response.status_code == 400
+
+if __name__ == '__main__':
+    test_iter_windows_overlap()
+    test_segment_timeline_finds_partial_ai()
+    test_segmented_endpoint_with_pool()
+    test_invalid_analysis_mode()
+    print("✓ PASSED")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming (bounded-memory) feature extraction
+Streamed features must match the one-shot path within float tolerance
+"""
+
+import io
+import numpy as np
+import soundfile as sf
+import problem1_voice_detection as voice_api
+from running_stats import RunningStats
+from voice_activity import iter_speech, speech_regions, trim_to_speech
+from test_feature_extraction import make_test_clip
+
+SR = voice_api.SAMPLE_RATE
+
+def blocks_of(y, size):
+    return lambda: (y[i:i + size] for i in range(0, len(y), size))
+
+def assert_features_close(streamed, one_shot, rtol=1e-4):
+    assert list(streamed) == list(one_shot)
+    for name, value in one_shot.items():
+        assert np.isclose(streamed[name], value, rtol=rtol, atol=1e-6), (name, streamed[name], value)
+
+def test_running_stats_match_numpy():
+    rng = np.random.default_rng(0)
+    values = rng.normal(3.0, 2.0, size=(4, 1000))
+    stats = RunningStats((4,))
+    for start in range(0, 1000, 137):
+        stats.update(values[:, start:start + 137])
+    assert np.allclose(stats.mean, values.mean(axis=1))
+    assert np.allclose(stats.var, values.var(axis=1))
+    assert np.allclose(stats.range, values.max(axis=1) - values.min(axis=1))
+
+def test_stream_matches_one_shot():
+    """Every feature, any block size, including leading silence (global mel floor)"""
+    y, _ = sf.read(io.BytesIO(make_test_clip(duration=30.0, sr=SR, seed=8)), dtype='float32')
+    y = np.concatenate([np.zeros(3 * SR, np.float32), y])
+    one_shot = voice_api.extract_signal_features(y, SR)
+    for block_size in (1000, 65536, len(y)):
+        streamed, n_samples = voice_api.stream_features(blocks_of(y, block_size), SR)
+        assert n_samples == len(y)
+        assert_features_close(streamed, one_shot)
+
+def test_short_clip():
+    """Clips shorter than one FFT frame stream like the one-shot path"""
+    y = (0.1 * np.sin(np.arange(700) / 5)).astype(np.float32)
+    streamed, _ = voice_api.stream_features(blocks_of(y, 128), SR, voice_api.ANALYSIS_FEATURES)
+    assert_features_close(streamed, voice_api.extract_signal_features(y, SR, voice_api.ANALYSIS_FEATURES))
+
+def test_iter_speech_matches_trim():
+    y, _ = sf.read(io.BytesIO(make_test_clip(duration=3.0, sr=SR, seed=9)), dtype='float32')
+    y = np.concatenate([np.zeros(SR, np.float32), y, np.zeros(2 * SR, np.float32), y])
+    regions = speech_regions(y, SR)
+    streamed = np.concatenate(list(iter_speech(blocks_of(y, 4096)(), regions)))
+    assert np.array_equal(streamed, trim_to_speech(y, SR))
+
+def test_analyze_audio_streaming_path():
+    """Long clips (per the header) take the streaming path with the same decision"""
+    audio_data = make_test_clip(duration=10.0, seed=10)
+    original = voice_api.STREAMING_MIN_SECONDS
+    try:
+        voice_api.STREAMING_MIN_SECONDS = 1e9
+        one_shot = voice_api.analyze_audio(audio_data, 'full')
+        voice_api.STREAMING_MIN_SECONDS = 5
+        streamed = voice_api.analyze_audio(audio_data, 'full')
+    finally:
+        voice_api.STREAMING_MIN_SECONDS = original
+    assert streamed['classification'] == one_shot['classification']
+    assert streamed['audioDuration'] == one_shot['audioDuration']
+    assert_features_close(streamed['features'], one_shot['features'])
+
+if __name__ == '__main__':
+    test_running_stats_match_numpy()
+    test_stream_matches_one_shot()
+    test_short_clip()
+    test_iter_speech_matches_trim()
+    test_analyze_audio_streaming_path()
+    print("✓ PASSED")
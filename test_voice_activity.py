@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for the energy-based voice activity stage
+"""
+
+import io
+import numpy as np
+import soundfile as sf
+import problem1_voice_detection as voice_api
+from voice_activity import speech_regions, trim_to_speech
+from test_feature_extraction import make_test_clip
+
+SR = voice_api.SAMPLE_RATE
+
+def speech_signal(seed=0):
+    y, _ = sf.read(io.BytesIO(make_test_clip(sr=SR, seed=seed)), dtype='float32')
+    return y
+
+def with_silence(y, before, after, noise=1e-4):
+    rng = np.random.default_rng(1)
+    pad = lambda seconds: (noise * rng.standard_normal(int(seconds * SR))).astype(np.float32)
+    return np.concatenate([pad(before), y, pad(after)])
+
+def test_regions_find_speech():
+    speech = speech_signal()
+    y = with_silence(speech, 2.0, 3.0)
+    regions = speech_regions(y, SR)
+    assert len(regions) == 1
+    start, end = regions[0]
+    # Within a frame of the true boundaries
+    assert abs(start - 2.0 * SR) <= 512
+    assert abs(end - (2.0 * SR + len(speech))) <= 512
+
+def test_short_pauses_kept_long_ones_cut():
+    speech = speech_signal()
+    short_gap = np.concatenate([speech, np.zeros(int(0.2 * SR), np.float32), speech])
+    long_gap = np.concatenate([speech, np.zeros(int(2.0 * SR), np.float32), speech])
+    assert len(trim_to_speech(short_gap, SR)) == len(short_gap)
+    assert len(speech_regions(long_gap, SR)) == 2
+    assert len(trim_to_speech(long_gap, SR)) < len(long_gap) - 1.5 * SR
+
+def test_silent_clip_is_left_alone():
+    silence = np.zeros(SR, np.float32)
+    assert len(speech_regions(silence, SR)) == 0
+    assert trim_to_speech(silence, SR) is silence
+
+def test_padded_clip_classified_like_original():
+    """With VAD on, silence padding neither changes the decision nor gets analyzed"""
+    speech = speech_signal(seed=4)
+    padded = with_silence(speech, 5.0, 5.0)
+    buffers = []
+    for y in (speech, padded):
+        buffer = io.BytesIO()
+        sf.write(buffer, y, SR, format='WAV', subtype='FLOAT')
+        buffers.append(buffer.getvalue())
+
+    original = voice_api.VAD_ENABLED
+    voice_api.VAD_ENABLED = True
+    try:
+        plain, trimmed = (voice_api.analyze_audio(data, 'full') for data in buffers)
+    finally:
+        voice_api.VAD_ENABLED = original
+
+    print(plain['audioDuration'], trimmed['audioDuration'])
+    assert trimmed['audioDuration']['received'] > 12.9
+    assert trimmed['audioDuration']['analyzed'] < plain['audioDuration']['received'] + 0.3
+    assert trimmed['classification'] == plain['classification']
+    assert abs(trimmed['features']['pitch_std'] - plain['features']['pitch_std']) < 0.1 * plain['features']['pitch_std']
+
+if __name__ == '__main__':
+    test_regions_find_speech()
+    test_short_pauses_kept_long_ones_cut()
+    test_silent_clip_is_left_alone()
+    test_padded_clip_classified_like_original()
+    print("✓ PASSED")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for the trained classifier: export, memory-mapped loading, training CLI and DECISION_MODE=model
+"""
+
+import csv
+import io
+import os
+import tempfile
+import time
+import numpy as np
+import soundfile as sf
+from sklearn.ensemble import RandomForestClassifier
+import problem1_voice_detection as voice_api
+import train_voice_model
+from voice_model import export_forest, load_model, save_model
+from test_feature_extraction import make_test_clip
+
+SR = voice_api.SAMPLE_RATE
+
+def test_export_matches_sklearn():
+    """The flattened forest reproduces predict_proba exactly, NaNs included, from mapped arrays"""
+    rng = np.random.default_rng(0)
+    X = rng.standard_normal((1000, 8)).astype(np.float32)
+    y = (X[:, 0] + X[:, 3] * X[:, 5] > 0).astype(int)
+    X[rng.random(X.shape) < 0.02] = np.nan
+    forest = RandomForestClassifier(n_estimators=50, max_depth=8, random_state=0).fit(X, y)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.joblib')
+        save_model(export_forest(forest, [f'f{i}' for i in range(8)]), path)
+        model = load_model(path)
+        assert isinstance(model.threshold.base, np.memmap)
+
+        X_test = rng.standard_normal((500, 8)).astype(np.float32)
+        X_test[rng.random(X_test.shape) < 0.05] = np.nan
+        assert np.allclose(model.predict_proba(X_test), forest.predict_proba(X_test)[:, 1], rtol=0, atol=1e-12)
+
+        start = time.perf_counter()
+        for row in X_test[:100]:
+            model.predict_proba(row)
+        per_clip = (time.perf_counter() - start) / 100
+        print(f"single-clip inference: {per_clip * 1e6:.0f} us")
+        assert per_clip < 2e-3
+
+def tone_clip(frequency, seconds=3.0):
+    """Steady tone: the machine-like end of the training set"""
+    t = np.arange(int(seconds * SR)) / SR
+    buffer = io.BytesIO()
+    sf.write(buffer, (0.3 * np.sin(2 * np.pi * frequency * t)).astype(np.float32), SR, format='WAV', subtype='FLOAT')
+    return buffer.getvalue()
+
+def test_train_and_serve_with_model():
+    """train_voice_model builds a model from a manifest; the service decides with it"""
+    clips = [(f'human{seed}.wav', 'HUMAN', make_test_clip(duration=3.0, seed=seed)) for seed in range(4)]
+    clips += [(f'ai{i}.wav', 'AI_GENERATED', tone_clip(frequency)) for i, frequency in enumerate((150, 180, 210, 240))]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'manifest.csv'), 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['path', 'label'])
+            for name, label, data in clips:
+                with open(os.path.join(tmp, name), 'wb') as clip:
+                    clip.write(data)
+                writer.writerow([name, label])
+        output = os.path.join(tmp, 'voice_model.joblib')
+        train_voice_model.main([os.path.join(tmp, 'manifest.csv'), '-o', output, '--trees', '20', '--jobs', '1'])
+
+        original = voice_api.voice_model
+        voice_api.voice_model = load_model(output)
+        try:
+            human = voice_api.analyze_audio(make_test_clip(duration=3.0, seed=1), 'cascade', 'wav')
+            ai = voice_api.analyze_audio(tone_clip(180), 'cascade', 'wav')
+        finally:
+            voice_api.voice_model = original
+
+    assert human['decisionTier'] == ai['decisionTier'] == 'model'
+    assert human['classification'] == 'HUMAN' and ai['classification'] == 'AI_GENERATED'
+    assert list(ai['features']) == voice_api.ANALYSIS_FEATURES
+
+if __name__ == '__main__':
+    test_export_matches_sklearn()
+    test_train_and_serve_with_model()
+    print("✓ PASSED")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Offline training for the voice classifier (DECISION_MODE=model)
+Extracts the service's features from labelled clips, fits a
+RandomForestClassifier and saves it flattened for memory-mapped loading
+(see voice_model).
+
+The manifest is a CSV with a header row and the columns path and label
+(AI_GENERATED/HUMAN, ai/human or 1/0), optionally audioFormat (taken from
+the file extension otherwise) and sampleRate (pcm_s16le only). Relative
+paths are resolved against the manifest's directory. With --store the
+labelled rows of a feature store (build_feature_store.py) are used
+instead, without decoding any audio; manifest clips are decoded through
+the decoded-PCM cache (PCM_CACHE_DIR), so reruns skip decoding too.
+
+Usage: python train_voice_model.py (manifest.csv | --store STORE_DIR) [-o voice_model.joblib]
+                                   [--features analysis|all] [--trees 200] [--max-depth 12] [--jobs N]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+import problem1_voice_detection as voice_api
+from build_feature_store import current_store
+from feature_vector import FeatureMatrix
+from voice_model import export_forest, save_model
+
+LABELS = {'ai_generated': 1, 'ai': 1, '1': 1, 'human': 0, '0': 0}
+
+def read_manifest(path):
+    """[(clip path, label 0/1, audio format, sample rate)] from a training manifest"""
+    base = os.path.dirname(os.path.abspath(path))
+    clips = []
+    with open(path, newline='') as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            label = LABELS.get((row.get('label') or '').strip().lower())
+            if label is None:
+                raise ValueError(f"{path}:{line}: unknown label {row.get('label')!r}")
+            clip = os.path.join(base, row['path'])
+            audio_format = row.get('audioFormat') or os.path.splitext(clip)[1].lstrip('.').lower()
+            sample_rate = int(row['sampleRate']) if row.get('sampleRate') else None
+            clips.append((clip, label, audio_format, sample_rate))
+    return clips
+
+def clip_features(clip, feature_names):
+    """FeatureVector of one manifest entry over feature_names"""
+    path, _, audio_format, sample_rate = clip
+    return voice_api.extract_file_features(path, feature_names, audio_format, sample_rate)
+
+def extract_matrix(clips, feature_names, jobs):
+    """(n_clips, n_features) float32 matrix, extracted on jobs processes"""
+    if jobs <= 1:
+        rows = [clip_features(clip, feature_names) for clip in clips]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            rows = list(pool.map(clip_features, clips, [feature_names] * len(clips), chunksize=4))
+    return FeatureMatrix.stack(rows, feature_names).values
+
+def stored_matrix(store, feature_names):
+    """(X, labels) of a feature store's labelled rows"""
+    stored = current_store(store).load()
+    labelled = stored.labels >= 0
+    return stored.matrix.select(feature_names).values[labelled], stored.labels[labelled].astype(np.int64)
+
+def train(manifest, output, feature_set='analysis', trees=200, max_depth=12, min_samples_leaf=2, jobs=1, seed=0,
+          store=None):
+    """Fit and save a model from a manifest (or a feature store); returns the exported model dict"""
+    feature_names = voice_api.ANALYSIS_FEATURES if feature_set == 'analysis' else voice_api.ALL_FEATURES
+    start = time.perf_counter()
+    if store is not None:
+        X, labels = stored_matrix(store, feature_names)
+    else:
+        clips = read_manifest(manifest)
+        labels = np.array([label for _, label, _, _ in clips])
+    if len(set(labels.tolist())) < 2:
+        raise ValueError("Training needs both AI_GENERATED and HUMAN clips")
+    if store is None:
+        X = extract_matrix(clips, feature_names, jobs)
+    extract_seconds = time.perf_counter() - start
+
+    forest = RandomForestClassifier(
+        n_estimators=trees, max_depth=max_depth, min_samples_leaf=min_samples_leaf,
+        oob_score=len(labels) >= 20, random_state=seed, n_jobs=jobs
+    ).fit(X, labels)
+
+    metadata = {
+        'trained_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'clips': len(labels),
+        'ai_clips': int(labels.sum()),
+        'oob_accuracy': float(forest.oob_score_) if forest.oob_score else None,
+        'feature_config': voice_api.feature_config_hash(),
+        'trees': trees,
+        'max_depth': max_depth,
+    }
+    model = export_forest(forest, feature_names, metadata)
+    save_model(model, output)
+
+    print(f"{'Loaded' if store is not None else 'Extracted'} {len(feature_names)} features of {len(labels)} clips in {extract_seconds:.1f} s "
+          f"({metadata['ai_clips']} AI, {len(labels) - metadata['ai_clips']} human)")
+    if metadata['oob_accuracy'] is not None:
+        print(f"Out-of-bag accuracy: {metadata['oob_accuracy']:.3f}")
+    ranked = np.argsort(forest.feature_importances_)[::-1][:5]
+    print("Top features: " + ", ".join(f"{feature_names[i]} ({forest.feature_importances_[i]:.2f})" for i in ranked))
+    print(f"Saved model {model['model_id']} ({len(model['value'])} nodes, depth {model['depth']}) to {output}")
+    return model
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the voice classifier used with DECISION_MODE=model")
+    parser.add_argument('manifest', nargs='?', help="CSV with path,label[,audioFormat,sampleRate] columns")
+    parser.add_argument('--store', help="Train on a feature store's labelled rows instead of a manifest")
+    parser.add_argument('-o', '--output', default='voice_model.joblib')
+    parser.add_argument('--features', choices=['analysis', 'all'], default='analysis',
+                        help="ANALYSIS_FEATURES (the default feature set) or ALL_FEATURES")
+    parser.add_argument('--trees', type=int, default=200)
+    parser.add_argument('--max-depth', type=int, default=12)
+    parser.add_argument('--min-samples-leaf', type=int, default=2)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    if (args.manifest is None) == (args.store is None):
+        parser.error("give either a manifest or --store")
+    train(args.manifest, args.output, args.features, args.trees, args.max_depth, args.min_samples_leaf, args.jobs, args.seed,
+          args.store)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Energy-based voice activity detection
+Finds the speech regions of a decoded signal so silence can be dropped
+before feature extraction. Everything is computed on per-hop frame energies
+with array operations: one pass over the samples, then work proportional
+to the number of frames.
+
+A frame counts as speech when its energy is within top_db of the loudest
+frame and above an absolute floor. Silences shorter than min_silence are
+kept, so only real pauses are cut - never the gaps inside words. An
+optional hangover pads each region; it is off by default because every
+padded noise frame skews the pitch and zero-crossing statistics, while
+top_db already admits soft onsets and word endings.
+"""
+
+import numpy as np
+from audio_decode import iter_windows
+
+DEFAULT_TOP_DB = 40.0         # dB below the loudest frame still counted as speech
+DEFAULT_FLOOR_DB = -60.0      # dBFS; quieter frames are never speech
+DEFAULT_MIN_SILENCE = 0.5     # seconds; shorter pauses are kept
+DEFAULT_PAD = 0.0             # seconds of hangover around each speech region
+
+def frame_energy_db(y, frame_length):
+    """Mean-square energy (dBFS) of consecutive non-overlapping frames; a partial tail counts as a frame"""
+    n_full = len(y) // frame_length
+    full = y[:n_full * frame_length].reshape(n_full, frame_length)
+    energy = np.einsum('ij,ij->i', full, full, dtype=np.float64) / frame_length
+    tail = y[n_full * frame_length:]
+    if len(tail):
+        energy = np.append(energy, np.dot(tail, tail) / len(tail))
+    return 10 * np.log10(energy + 1e-12)
+
+def speech_regions(y, sr, frame_length=512, **kwargs):
+    """
+    Speech regions of y as an (n, 2) array of [start, end) sample indices
+
+    Returns an empty array when nothing rises above the floor. kwargs are
+    the thresholds of regions_from_energy.
+    """
+    return regions_from_energy(frame_energy_db(y, frame_length), len(y), sr, frame_length, **kwargs)
+
+def stream_speech_regions(blocks, sr, frame_length=512, **kwargs):
+    """
+    speech_regions for a stream of sample blocks
+
+    Frame energies are computed per block (a few floats per frame are all
+    that is kept), so the regions match speech_regions on the joined
+    signal. Returns (regions, total samples).
+    """
+    chunk = frame_length * 1024
+    energies = []
+    n_samples = 0
+    for _, samples in iter_windows(blocks, chunk, chunk):
+        energies.append(frame_energy_db(samples, frame_length))
+        n_samples += len(samples)
+    db = np.concatenate(energies) if energies else np.empty(0)
+    return regions_from_energy(db, n_samples, sr, frame_length, **kwargs), n_samples
+
+def regions_from_energy(db, n_samples, sr, frame_length, top_db=DEFAULT_TOP_DB, floor_db=DEFAULT_FLOOR_DB,
+                        min_silence=DEFAULT_MIN_SILENCE, pad=DEFAULT_PAD):
+    """Speech regions (sample indices) from per-frame energies in dBFS"""
+    if len(db) == 0 or db.max() < floor_db:
+        return np.empty((0, 2), dtype=np.int64)
+
+    mask = (db > db.max() - top_db) & (db > floor_db)
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], mask.view(np.int8), [0]])))
+    starts, ends = edges[::2], edges[1::2]
+
+    # Hangover, then merge regions separated by less than min_silence
+    pad_frames = int(round(pad * sr / frame_length))
+    starts = np.maximum(starts - pad_frames, 0)
+    ends = np.minimum(ends + pad_frames, len(db))
+    keep_gap = (starts[1:] - ends[:-1]) * frame_length >= min_silence * sr
+    starts = starts[np.concatenate([[True], keep_gap])]
+    ends = ends[np.concatenate([keep_gap, [True]])]
+
+    regions = np.stack([starts, ends], axis=1) * frame_length
+    regions[-1, 1] = min(regions[-1, 1], n_samples)
+    return regions
+
+def covers_everything(regions, n_samples):
+    """True when regions would cut nothing (or found no speech at all)"""
+    return len(regions) == 0 or (len(regions) == 1 and regions[0, 0] == 0 and regions[0, 1] == n_samples)
+
+def trim_to_speech(y, sr, **kwargs):
+    """
+    y with non-speech stretches removed (y itself when no speech is found
+    or nothing would be cut). kwargs are passed to speech_regions.
+    """
+    regions = speech_regions(y, sr, **kwargs)
+    if covers_everything(regions, len(y)):
+        return y
+    return np.concatenate([y[start:end] for start, end in regions])
+
+def iter_speech(blocks, regions):
+    """The samples of a block stream that fall inside regions, as a block stream"""
+    position = 0
+    region = 0
+    for block in blocks:
+        block_end = position + len(block)
+        while region < len(regions) and regions[region, 0] < block_end:
+            start, end = regions[region]
+            if end > position:
+                yield block[max(start - position, 0):min(end, block_end) - position]
+            if end > block_end:
+                break
+            region += 1
+        position = block_end
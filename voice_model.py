@@ -0,0 +1,149 @@
+"""
+Trained voice classifier: a random forest flattened into memory-mappable arrays
+train_voice_model.py fits a scikit-learn RandomForestClassifier offline and
+exports every tree into a handful of flat NumPy arrays (one entry per node,
+all trees concatenated), saved with joblib without compression. The service
+loads the file with mmap_mode='r': the arrays are mapped from the page cache,
+not copied, so every worker and pool process on the host shares one copy.
+
+Inference walks all trees for all rows at once, one tree level per NumPy
+step, so one clip and a batch of thousands cost the same handful of array
+operations - tens of microseconds for a single clip, and no scikit-learn
+import in the service.
+"""
+
+import hashlib
+import joblib
+import numpy as np
+from feature_vector import FeatureVector
+
+MODEL_FORMAT_VERSION = 1
+
+# Class order of the exported probabilities
+MODEL_CLASSES = ['HUMAN', 'AI_GENERATED']
+
+def export_forest(forest, feature_names, metadata=None):
+    """
+    Flatten a fitted binary RandomForestClassifier into the saved model dict
+
+    Per node: the feature compared, its threshold, both children
+    interleaved (children[2 * node + went_right]) and where NaNs go; leaves
+    point back at themselves, so a walk can run a fixed number of levels
+    without checking where it stopped. value holds each node's
+    P(AI_GENERATED), as predict_proba averages it.
+    """
+    if list(forest.classes_) != [0, 1]:
+        raise ValueError("The forest must be trained on 0 (HUMAN) / 1 (AI_GENERATED) labels")
+    arrays = {key: [] for key in ('feature', 'threshold', 'children', 'missing_right', 'value')}
+    roots = []
+    offset = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        nodes = np.arange(tree.node_count)
+        leaf = tree.children_left < 0
+        roots.append(offset)
+        arrays['feature'].append(np.where(leaf, 0, tree.feature))
+        arrays['threshold'].append(np.where(leaf, np.inf, tree.threshold))
+        left = np.where(leaf, nodes, tree.children_left) + offset
+        right = np.where(leaf, nodes, tree.children_right) + offset
+        arrays['children'].append(np.stack([left, right], axis=1).ravel())
+        missing_left = getattr(tree, 'missing_go_to_left', np.ones(tree.node_count, dtype=bool))
+        arrays['missing_right'].append(~np.asarray(missing_left, dtype=bool) & ~leaf)
+        counts = tree.value[:, 0, :]
+        arrays['value'].append(counts[:, 1] / counts.sum(axis=1))
+        offset += tree.node_count
+
+    model = {
+        'format_version': MODEL_FORMAT_VERSION,
+        'feature_names': list(feature_names),
+        'feature': np.concatenate(arrays['feature']).astype(np.int64),
+        'threshold': float32_thresholds(np.concatenate(arrays['threshold'])),
+        'children': np.concatenate(arrays['children']).astype(np.int64),
+        'missing_right': np.concatenate(arrays['missing_right']),
+        'value': np.concatenate(arrays['value']).astype(np.float64),
+        'roots': np.asarray(roots, dtype=np.int64),
+        'depth': max(estimator.tree_.max_depth for estimator in forest.estimators_),
+        'metadata': dict(metadata or {}),
+    }
+    model['model_id'] = model_digest(model)
+    return model
+
+def float32_thresholds(thresholds):
+    """
+    Float64 split thresholds as float32 that split float32 inputs identically
+
+    Rounding down to the nearest float32 keeps x <= t unchanged for every
+    float32 x, and halves the bytes each tree level reads.
+    """
+    rounded = thresholds.astype(np.float32)
+    above = rounded.astype(np.float64) > thresholds
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+def model_digest(model):
+    """Short hash of the feature schema and tree arrays (identifies a model in cache keys)"""
+    digest = hashlib.sha1(repr(model['feature_names']).encode('utf-8'))
+    for key in ('feature', 'threshold', 'children', 'missing_right', 'value', 'roots'):
+        digest.update(np.ascontiguousarray(model[key]).tobytes())
+    return digest.hexdigest()[:12]
+
+def save_model(model, path):
+    """Write an exported model; uncompressed so its arrays can be memory-mapped"""
+    joblib.dump(model, path, compress=0)
+
+class ForestModel:
+    """
+    A loaded forest: predict_proba over (n, F) feature matrices
+
+    feature_names is the column order rows must follow.
+    """
+
+    def __init__(self, model):
+        if model.get('format_version') != MODEL_FORMAT_VERSION:
+            raise ValueError(f"Unsupported voice model format: {model.get('format_version')}")
+        self.feature_names = list(model['feature_names'])
+        self.model_id = model['model_id']
+        self.metadata = model['metadata']
+        self.depth = int(model['depth'])
+        # Plain ndarray views on the (mapped) buffers: np.memmap's subclass
+        # hooks cost more than the small per-level gathers themselves
+        self.feature = np.asarray(model['feature'])
+        self.threshold = np.asarray(model['threshold'])
+        self.children = np.asarray(model['children'])
+        self.missing_right = np.asarray(model['missing_right'])
+        self.value = np.asarray(model['value'])
+        self.roots = np.asarray(model['roots'])
+
+    def predict_proba(self, X):
+        """
+        P(AI_GENERATED) for each row of X (a single row may be 1-D)
+
+        Matches the forest's predict_proba[:, 1]: rows are compared in
+        float32 like scikit-learn, and NaNs follow the trained missing-value
+        direction.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        n_rows, n_features = X.shape
+        flat = X.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.int64) * n_features)[:, None]
+        has_nan = bool(np.isnan(flat).any())
+        nodes = np.broadcast_to(self.roots, (n_rows, len(self.roots)))
+        for _ in range(self.depth):
+            values = flat.take(row_offsets + self.feature.take(nodes))
+            go_right = values > self.threshold.take(nodes)
+            if has_nan:
+                go_right |= np.isnan(values) & self.missing_right.take(nodes)
+            nodes = self.children.take(2 * nodes + go_right)
+        return self.value.take(nodes).mean(axis=1)
+
+    def vector(self, features):
+        """Feature row in this model's column order from a FeatureVector or features mapping"""
+        if isinstance(features, FeatureVector):
+            return features.select(self.feature_names).values
+        return np.array([features[name] for name in self.feature_names], dtype=np.float32)
+
+def load_model(path, mmap=True):
+    """Load a saved model; with mmap the node arrays stay memory-mapped (read-only)"""
+    return ForestModel(joblib.load(path, mmap_mode='r' if mmap else None))